@@ -0,0 +1,185 @@
+import os
+import uuid
+from course import course
+from sinks import CourseSink, DEFAULT_BATCH_SIZE
+from checkpoint import FileLastRun
+
+# pyarrow is only needed for the archive, the scraper runs without it
+try:
+	import pyarrow as pa
+	import pyarrow.dataset as ds
+	import pyarrow.parquet as pq
+	from pyarrow.fs import LocalFileSystem
+except ImportError:
+	pa = None
+
+COMPRESSION = "zstd"
+# Fields stored as they are, the other ones have one value per meeting
+SCALAR_FIELDS = (
+	"name", "subjectName", "subjectCode", "catalogNumber", "academicCareer", "sectionType", "sectionCode", "classNumber",
+	"session", "status", "seatsAvailable", "capacity", "waitlistAvailable", "waitlistCapacity", "reservedSeatsAvailable",
+	"reservedSeatsCapacity", "multipleMeetings", "dateTimeRetrieved"
+)
+
+def requirePyarrow():
+	if pa is None:
+		raise ImportError("The Parquet archive needs pyarrow, install it with 'pip install pyarrow'")
+
+def fileSchema():
+	"""
+	Columns stored in every archive file. Fields that have one value per meeting
+	are lists with one element per meeting, also for sections with a single meeting.
+	"""
+	return pa.schema([
+		("name", pa.string()),
+		("subjectName", pa.string()),
+		("subjectCode", pa.string()),
+		("catalogNumber", pa.string()),
+		("academicCareer", pa.string()),
+		("sectionType", pa.string()),
+		("sectionCode", pa.string()),
+		("classNumber", pa.int32()),
+		("session", pa.string()),
+		("days", pa.list_(pa.list_(pa.string()))),
+		("timeStart", pa.list_(pa.time32("s"))),
+		("timeEnd", pa.list_(pa.time32("s"))),
+		("classroom", pa.list_(pa.string())),
+		("instructor", pa.list_(pa.list_(pa.string()))),
+		("startDate", pa.list_(pa.date32())),
+		("endDate", pa.list_(pa.date32())),
+		("topic", pa.list_(pa.string())),
+		("status", pa.string()),
+		("seatsAvailable", pa.int32()),
+		("capacity", pa.int32()),
+		("waitlistAvailable", pa.int32()),
+		("waitlistCapacity", pa.int32()),
+		("reservedSeatsAvailable", pa.int32()),
+		("reservedSeatsCapacity", pa.int32()),
+		("multipleMeetings", pa.bool_()),
+		("dateTimeRetrieved", pa.timestamp("s"))
+	])
+
+def partitionSchema():
+	# Directories like semester=Spring/year=2025/date=2025-02-28, one date per run
+	return pa.schema([("semester", pa.string()), ("year", pa.int16()), ("date", pa.date32())])
+
+def partitionOf(section: course):
+	return (section.semester, section.year, section.dateTimeRetrieved.date())
+
+def partitionPath(root: str, partition: tuple):
+	semester, year, date = partition
+	return os.path.join(root, f"semester={semester}", f"year={year}", f"date={date.isoformat()}")
+
+def perMeeting(section: course, value):
+	return value if section.multipleMeetings else [value]
+
+def sectionsToTable(sections: list):
+	columns = {field: [] for field in fileSchema().names}
+	for section in sections:
+		for field in SCALAR_FIELDS:
+			columns[field].append(getattr(section, field))
+		columns["days"].append(perMeeting(section, section.days))
+		columns["timeStart"].append([value.time() for value in perMeeting(section, section.timeStart)])
+		columns["timeEnd"].append([value.time() for value in perMeeting(section, section.timeEnd)])
+		columns["classroom"].append(perMeeting(section, section.classroom))
+		columns["instructor"].append(perMeeting(section, section.instructor))
+		columns["startDate"].append([value.date() for value in perMeeting(section, section.startDate)])
+		columns["endDate"].append([value.date() for value in perMeeting(section, section.endDate)])
+		columns["topic"].append(None if section.topic is None else perMeeting(section, section.topic))
+	return pa.table(columns, schema=fileSchema())
+
+class ArchiveSink(CourseSink):
+	"""
+	Writes the sections to a typed, compressed Parquet archive partitioned by
+	term and retrieval date. Every flush is its own file, so a saved subject
+	survives a crash, and closing the sink merges the files of the run into
+	one file per partition.
+
+	Example:
+	with ArchiveSink("WebScraper/archive") as sink:
+		sink.addAll(scraper.scrape_term("Spring 2025"))
+	"""
+	def __init__(self, root: str, batchSize=DEFAULT_BATCH_SIZE, checkpoint=None):
+		requirePyarrow()
+		super().__init__(batchSize, checkpoint)
+		self.root = root
+		self.runId = uuid.uuid4().hex
+		self.partFiles = {}
+		# Same sidecar file as courses.csv, so course.wasDataCollectedToday(root) works for the archive
+		self.lastRun = FileLastRun.forCsv(root)
+
+	def write(self, sections: list):
+		partitions = {}
+		for section in sections:
+			partitions.setdefault(partitionOf(section), []).append(section)
+		for partition, partitionSections in partitions.items():
+			directory = partitionPath(self.root, partition)
+			os.makedirs(directory, exist_ok=True)
+			partFiles = self.partFiles.setdefault(partition, [])
+			filename = os.path.join(directory, f"part-{self.runId}-{len(partFiles):05d}.parquet")
+			pq.write_table(sectionsToTable(partitionSections), filename, compression=COMPRESSION)
+			partFiles.append(filename)
+
+	def close(self):
+		super().close()
+		self.compact()
+
+	def compact(self):
+		for partition, partFiles in self.partFiles.items():
+			if len(partFiles) < 2:
+				continue
+			filename = os.path.join(partitionPath(self.root, partition), f"run-{self.runId}.parquet")
+			# Files starting with "_" are skipped by readers, so a half written file is never read
+			temporaryFilename = os.path.join(partitionPath(self.root, partition), f"_run-{self.runId}.parquet")
+			pq.write_table(pa.concat_tables(pq.read_table(partFile, schema=fileSchema()) for partFile in partFiles),
+				temporaryFilename, compression=COMPRESSION)
+			os.replace(temporaryFilename, filename)
+			for partFile in partFiles:
+				os.remove(partFile)
+		self.partFiles = {}
+
+def openArchive(root: str):
+	"""The whole archive as a pyarrow dataset, with memory mapped files."""
+	requirePyarrow()
+	schema = pa.unify_schemas([fileSchema(), partitionSchema()])
+	return ds.dataset(root, schema=schema, format="parquet", partitioning=ds.partitioning(partitionSchema(), flavor="hive"),
+		filesystem=LocalFileSystem(use_mmap=True))
+
+def archiveFilter(term=None, subjectCode=None, subjectName=None, classNumber=None, startDate=None, endDate=None):
+	"""
+	Filter expression for readArchive. term ("Spring 2025"), startDate and endDate
+	only open the matching partitions, the other filters skip row groups by their statistics.
+	"""
+	conditions = []
+	if term is not None:
+		semester, year = term.split(" ")
+		conditions.append((ds.field("semester") == semester) & (ds.field("year") == int(year)))
+	if subjectCode is not None:
+		conditions.append(ds.field("subjectCode") == subjectCode)
+	if subjectName is not None:
+		conditions.append(ds.field("subjectName") == subjectName)
+	if classNumber is not None:
+		conditions.append(ds.field("classNumber") == classNumber)
+	if startDate is not None:
+		conditions.append(ds.field("date") >= startDate)
+	if endDate is not None:
+		conditions.append(ds.field("date") <= endDate)
+	expression = None
+	for condition in conditions:
+		expression = condition if expression is None else expression & condition
+	return expression
+
+def readArchive(root: str, columns=None, **filters):
+	"""
+	Read the matching rows of the archive as a pyarrow Table, only decoding the
+	requested columns. Use .to_pandas() or .to_pylist() on the result as needed.
+
+	Example:
+	seats = readArchive("WebScraper/archive", columns=["classNumber", "seatsAvailable", "dateTimeRetrieved"],
+											term="Spring 2025", subjectCode="ECE")
+	"""
+	return openArchive(root).to_table(columns=columns, filter=archiveFilter(**filters))
+
+def scanArchive(root: str, columns=None, **filters):
+	"""Like readArchive, but yields record batches so the result never has to fit in memory."""
+	yield from openArchive(root).to_batches(columns=columns, filter=archiveFilter(**filters))
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from httpScraper import HttpScraper, HttpScrapeError, RetryableHttpError, sectionToCourse
+
+DEFAULT_REQUESTS_PER_SECOND = float(os.getenv("CRAWL_REQUESTS_PER_SECOND", 5)) # sustained request rate sent to CaneLink
+DEFAULT_BURST = int(os.getenv("CRAWL_BURST", 5)) # requests that can be sent at once after a quiet period
+DEFAULT_IN_FLIGHT = int(os.getenv("CRAWL_IN_FLIGHT", 8)) # requests waiting for a response at the same time
+DEFAULT_RETRIES = 4
+DEFAULT_QUEUE_SIZE = 16 # scraped subjects waiting for the writer
+
+class TokenBucket:
+	"""
+	Allows rate requests per second on average, and up to capacity at once.
+
+	Example:
+	bucket = TokenBucket(5, 10)
+	await bucket.acquire() # returns once a token is available
+	"""
+	def __init__(self, rate: float, capacity: int):
+		self.rate = rate
+		self.capacity = capacity
+		self.tokens = float(capacity)
+		self.updated = time.monotonic()
+		self.lock = asyncio.Lock()
+
+	async def acquire(self):
+		# The lock makes the waiters take their tokens in order
+		async with self.lock:
+			while True:
+				now = time.monotonic()
+				self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+				self.updated = now
+				if self.tokens >= 1:
+					self.tokens -= 1
+					return
+				await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AsyncCrawler:
+	"""
+	Scrapes many (term, academic career, subject) work units at the same time with
+	an HttpScraper, without sending more than requestsPerSecond requests per second
+	or maxInFlight at once. Failed requests are retried with exponential backoff
+	and jitter. Every scraped subject is handed to a CourseSink by a single writer
+	task, so the sections are saved exactly like a browser crawl saves them
+	(saveCoursesToMongodb for MongoSink), subject by subject and checkpointed.
+
+	Example:
+	with HttpScraper(endpoint) as httpScraper, MongoSink(client) as sink:
+		stats = AsyncCrawler(httpScraper, requestsPerSecond=10).run(workUnits, sink)
+	"""
+	def __init__(self, httpScraper: HttpScraper, requestsPerSecond=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST,
+		maxInFlight=DEFAULT_IN_FLIGHT, retries=DEFAULT_RETRIES, backoff=1.0, queueSize=DEFAULT_QUEUE_SIZE):
+		self.httpScraper = httpScraper
+		self.requestsPerSecond = requestsPerSecond
+		self.burst = burst
+		self.maxInFlight = maxInFlight
+		self.retries = retries
+		self.backoff = backoff
+		self.queueSize = queueSize
+		self.requestsRetried = 0
+		self.sectionsScraped = 0
+
+	async def fetch(self, params: dict):
+		loop = asyncio.get_running_loop()
+		for attempt in range(self.retries + 1):
+			await self.bucket.acquire()
+			try:
+				async with self.inFlight:
+					# requests blocks, so every request in flight gets its own thread
+					return await loop.run_in_executor(self.executor, self.httpScraper.fetch, params)
+			except RetryableHttpError:
+				if attempt == self.retries:
+					raise
+				self.requestsRetried += 1
+			# Jitter keeps the retries of requests that failed together from coming back together
+			await asyncio.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+	async def scrapeWorkUnit(self, workUnit: tuple[str, str, str]):
+		sections = []
+		page = 1
+		while True:
+			results = await self.fetch(self.httpScraper.pageParams(workUnit, page))
+			sections.extend(self.httpScraper.pageSections(results))
+			if self.httpScraper.isLastPage(results, page):
+				break
+			page += 1
+		return [sectionToCourse(section, workUnit, self.httpScraper.dateTimeRetrieved, self.httpScraper.fieldMap) for section in sections]
+
+	async def produce(self, workUnits: asyncio.Queue, queue: asyncio.Queue, fallback):
+		# One of maxInFlight producers, each scrapes one work unit at a time
+		while not workUnits.empty():
+			workUnit = workUnits.get_nowait()
+			complete = True
+			try:
+				unitCourses = await self.scrapeWorkUnit(workUnit)
+			except HttpScrapeError as e:
+				if fallback is None:
+					raise
+				print("Falling back to the browser for", *workUnit, "-", e)
+				# One browser, so the fallbacks run one after the other
+				async with self.fallbackLock:
+					unitCourses, complete = await asyncio.to_thread(fallback.scrapeSubjectOrSkip, *workUnit)
+			# A full queue holds the producer back until the writer catches up
+			await queue.put((workUnit, unitCourses, complete))
+
+	async def write(self, queue: asyncio.Queue, sink, workUnitCount: int, showProgress: bool):
+		for i in range(workUnitCount):
+			workUnit, unitCourses, complete = await queue.get()
+			if sink is not None:
+				await asyncio.to_thread(sink.addAll, unitCourses)
+				await asyncio.to_thread(sink.endWorkUnit, workUnit, complete)
+			self.sectionsScraped += len(unitCourses)
+			if showProgress:
+				print(f"Finished {i + 1}/{workUnitCount}:", *workUnit)
+
+	async def crawl(self, workUnits: list[tuple[str, str, str]], sink=None, fallback=None, showProgress=True):
+		self.bucket = TokenBucket(self.requestsPerSecond, self.burst)
+		self.inFlight = asyncio.Semaphore(self.maxInFlight)
+		self.fallbackLock = asyncio.Lock()
+		queue = asyncio.Queue(self.queueSize)
+		workUnitQueue = asyncio.Queue()
+		for workUnit in workUnits:
+			workUnitQueue.put_nowait(workUnit)
+		with ThreadPoolExecutor(max_workers=self.maxInFlight) as self.executor:
+			writer = asyncio.create_task(self.write(queue, sink, len(workUnits), showProgress))
+			# At most queueSize scraped subjects wait for the writer, plus one held by each blocked producer
+			producers = [asyncio.create_task(self.produce(workUnitQueue, queue, fallback)) for _ in range(min(self.maxInFlight, len(workUnits)))]
+			try:
+				await asyncio.gather(writer, *producers)
+			except BaseException:
+				for task in producers + [writer]:
+					task.cancel()
+				raise
+
+	def run(self, workUnits: list[tuple[str, str, str]], sink=None, fallback=None, showProgress=True):
+		"""
+		Crawl the work units and save them to sink (e.g. CsvSink or MongoSink), in the
+		order they finish. fallback (a Selenium Scraper) scrapes the work units whose
+		requests keep failing. Returns the crawl statistics.
+		"""
+		start = time.perf_counter()
+		asyncio.run(self.crawl(workUnits, sink, fallback, showProgress))
+		seconds = time.perf_counter() - start
+		return {
+			"workUnits": len(workUnits),
+			"sections": self.sectionsScraped,
+			"requests": self.httpScraper.requestsSent,
+			"requestsRetried": self.requestsRetried,
+			"seconds": seconds,
+			"requestsPerSecond": self.httpScraper.requestsSent / seconds if seconds > 0 else 0.0
+		}
@@ -0,0 +1,76 @@
+import csv
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from course import course
+from archive import ArchiveSink, readArchive
+
+SECTION_COUNT = int(os.getenv("BENCHMARK_SECTIONS", 20000))
+RUN_COUNT = int(os.getenv("BENCHMARK_RUNS", 10))
+SUBJECTS = ["ACC", "BIL", "CHM", "ECE", "MTH", "PHY", "PSY", "ENG"]
+
+def createRun(runDateTime: datetime.datetime):
+	sections = []
+	for classNumber in range(SECTION_COUNT):
+		section = course(runDateTime)
+		section.name = "Principles of Financial Accounting"
+		# The scraper produces the sections subject by subject
+		section.subjectCode = SUBJECTS[classNumber * len(SUBJECTS) // SECTION_COUNT]
+		section.subjectName = section.subjectCode
+		section.catalogNumber = str(100 + classNumber % 400)
+		section.academicCareer = "Undergraduate"
+		section.semester = "Spring"
+		section.year = 2025
+		section.classNumber = classNumber
+		section.days = ["Monday", "Wednesday", "Friday"]
+		section.timeStart = datetime.datetime(1900, 1, 1, 18, 35)
+		section.timeEnd = datetime.datetime(1900, 1, 1, 21, 20)
+		section.instructor = ["William Green"]
+		section.startDate = datetime.datetime(2025, 1, 13)
+		section.endDate = datetime.datetime(2025, 4, 28)
+		section.status = "Open"
+		section.seatsAvailable = classNumber % 45
+		section.capacity = 45
+		sections.append(section)
+	return sections
+
+def directorySize(path: str):
+	return sum(os.path.getsize(os.path.join(directory, filename)) for directory, _, filenames in os.walk(path) for filename in filenames)
+
+def main():
+	workDirectory = tempfile.mkdtemp()
+	csvFilename = os.path.join(workDirectory, "courses.csv")
+	archiveRoot = os.path.join(workDirectory, "archive")
+	try:
+		for run in range(RUN_COUNT):
+			sections = createRun(datetime.datetime(2025, 1, 13, 23) + datetime.timedelta(days=run))
+			course.saveCoursesToCsv(sections, csvFilename)
+			with ArchiveSink(archiveRoot, batchSize=len(sections)) as sink:
+				sink.addAll(sections)
+		rowCount = SECTION_COUNT * RUN_COUNT
+		print(f"{rowCount} rows: csv {os.path.getsize(csvFilename) / 2**20:.1f} MiB, archive {directorySize(archiveRoot) / 2**20:.1f} MiB")
+
+		# Seat history of one subject, the typical analysis query
+		start = time.perf_counter()
+		with open(csvFilename, "r", newline="") as file:
+			csvRows = [(row["classNumber"], row["seatsAvailable"], row["dateTimeRetrieved"])
+				for row in csv.DictReader(file) if row["subject"] == "('ECE', 'ECE')"]
+		csvSeconds = time.perf_counter() - start
+
+		start = time.perf_counter()
+		archiveRows = readArchive(archiveRoot, columns=["classNumber", "seatsAvailable", "dateTimeRetrieved"], term="Spring 2025", subjectCode="ECE")
+		archiveSeconds = time.perf_counter() - start
+		if archiveRows.num_rows != len(csvRows):
+			raise AssertionError(f"The archive returned {archiveRows.num_rows} rows, the csv {len(csvRows)}")
+		print(f"seat history of one subject ({len(csvRows)} rows): csv {csvSeconds:.2f} s, archive {archiveSeconds:.3f} s "
+			f"({csvSeconds / archiveSeconds:.0f}x faster)")
+	finally:
+		shutil.rmtree(workDirectory)
+
+if __name__ == "__main__":
+	main()
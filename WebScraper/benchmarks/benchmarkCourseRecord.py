@@ -0,0 +1,94 @@
+import datetime
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from course import course, RECORD_FIELDS
+from parsing import parseTime, parseDateRange
+
+SECTION_COUNT = int(os.getenv("BENCHMARK_SECTIONS", 100000))
+REPEAT = int(os.getenv("BENCHMARK_REPEAT", 5))
+
+class dictCourse:
+	"""The course record as it was before it had __slots__: a __dict__ and a datetime.now per section."""
+	def __init__(self):
+		for field in RECORD_FIELDS:
+			setattr(self, field, "NULL")
+		EST = datetime.timezone(datetime.timedelta(hours=-5))
+		self.dateTimeRetrieved = datetime.datetime.now(EST).replace(tzinfo=None)
+
+	def addReservedSeats(self, reservedSeatsAvailable: int, reservedSeatsCapacity: int):
+		self.reservedSeatsAvailable = reservedSeatsAvailable
+		self.reservedSeatsCapacity = reservedSeatsCapacity
+
+def fillSection(section, classNumber: int):
+	# Like sectionParser, times and dates come from the memoized parsers and are shared by the sections
+	section.name = "Principles of Financial Accounting"
+	section.subjectName = "Accounting Bus Admin"
+	section.subjectCode = "ACC"
+	section.catalogNumber = "211"
+	section.academicCareer = "Undergraduate"
+	section.semester = "Spring"
+	section.year = 2025
+	section.sectionType = "Lecture"
+	section.sectionCode = "1U"
+	section.classNumber = classNumber
+	section.session = "Regular Academic"
+	section.days = ["Monday", "Wednesday", "Friday"]
+	section.timeStart = parseTime("06:35 PM")
+	section.timeEnd = parseTime("09:20 PM")
+	section.classroom = "Whitten LC 182"
+	section.instructor = ["William Green"]
+	section.startDate, section.endDate = parseDateRange("01/13 - 04/28", 2025)
+	section.status = "Open"
+	section.seatsAvailable = 45
+	section.capacity = 45
+	section.waitlistAvailable = 300
+	section.waitlistCapacity = 300
+	section.multipleMeetings = False
+	if classNumber % 10 == 0:
+		section.addReservedSeats(5, 5)
+	return section
+
+def createSections(createSection):
+	# Timed without tracemalloc, which slows allocations down a lot
+	start = time.perf_counter()
+	sections = [fillSection(createSection(), classNumber) for classNumber in range(SECTION_COUNT)]
+	elapsed = time.perf_counter() - start
+	del sections
+	tracemalloc.start()
+	sections = [fillSection(createSection(), classNumber) for classNumber in range(SECTION_COUNT)]
+	memory = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return sections, elapsed, memory
+
+def timeIt(function, sections):
+	"""Seconds of the fastest of REPEAT passes over sections."""
+	best = None
+	for _ in range(REPEAT):
+		start = time.perf_counter()
+		for section in sections:
+			function(section)
+		seconds = time.perf_counter() - start
+		best = seconds if best is None else min(best, seconds)
+	return best
+
+def main():
+	dictSections, dictSeconds, dictMemory = createSections(dictCourse)
+	print(f"__dict__ record: created in {dictSeconds:.2f} s, {dictMemory / 2**20:.1f} MiB")
+	dictToDictSeconds = timeIt(lambda section: dict(section.__dict__), dictSections)
+	print(f"  copy of __dict__: {dictToDictSeconds:.2f} s")
+	del dictSections
+
+	runDateTime = course.currentDateTime()
+	slottedSections, slottedSeconds, slottedMemory = createSections(lambda: course(runDateTime))
+	print(f"slotted record: created in {slottedSeconds:.2f} s, {slottedMemory / 2**20:.1f} MiB "
+		f"({dictMemory / slottedMemory:.2f}x less memory)")
+	for name, function in (("to_dict", course.to_dict), ("to_bson", course.to_bson), ("to_row", course.to_row)):
+		seconds = timeIt(function, slottedSections)
+		print(f"  {name}: {seconds:.2f} s ({dictToDictSeconds / seconds:.2f}x the speed of the __dict__ copy)")
+
+if __name__ == "__main__":
+	main()
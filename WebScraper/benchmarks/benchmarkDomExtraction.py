@@ -0,0 +1,61 @@
+import glob
+import json
+import os
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from htmlSnapshot import parseClassListings
+from selenium import webdriver
+from webScraper import Scraper, options
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "..", "fixtures", "classListings")
+ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", 20))
+
+# Needs Firefox and geckodriver, like the scraper. The saved results pages are opened
+# from disk, so the times only contain the WebDriver round trips and no network.
+
+def countRoundTrips(driver):
+	"""Count every WebDriver command sent by the driver from now on."""
+	counter = {"roundTrips": 0}
+	execute = driver.execute
+	def countingExecute(*args, **kwargs):
+		counter["roundTrips"] += 1
+		return execute(*args, **kwargs)
+	driver.execute = countingExecute
+	return counter
+
+def measure(counter, readListings):
+	counter["roundTrips"] = 0
+	start = time.perf_counter()
+	for _ in range(ITERATIONS):
+		classListings = readListings()
+	return classListings, counter["roundTrips"] // ITERATIONS, (time.perf_counter() - start) / ITERATIONS
+
+def main():
+	scraper = Scraper(headless=True)
+	# Not openBrowser, the class search page is not needed
+	scraper.driver = webdriver.Firefox(options=options)
+	try:
+		counter = countRoundTrips(scraper.driver)
+		paths = {
+			"webdriver": lambda: [(className, classInfo) for className, classInfo, _ in scraper.getClassListingsFromWebDriver()],
+			"page_source": lambda: [(className, classInfo) for className, classInfo, _ in parseClassListings(scraper.driver.page_source)],
+			"script": lambda: [(className, classInfo) for className, classInfo, _ in scraper.getClassListingsFromScript()]
+		}
+		for htmlFile in sorted(glob.glob(os.path.join(FIXTURES_PATH, "*.html"))):
+			with open(htmlFile.replace(".html", ".json"), "r") as file:
+				expected = [(listing["className"], listing["classInfo"]) for listing in json.load(file)]
+			scraper.driver.get(pathlib.Path(htmlFile).resolve().as_uri())
+			print(os.path.basename(htmlFile))
+			for name, readListings in paths.items():
+				classListings, roundTrips, seconds = measure(counter, readListings)
+				if classListings != expected:
+					raise AssertionError(f"The {name} path read different class listings from {os.path.basename(htmlFile)}")
+				print(f"  {name:<12}{roundTrips:>5} round trips {seconds * 1000:>9.1f} ms per subject")
+	finally:
+		scraper.closeBrowser()
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,44 @@
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from htmlSnapshot import parseClassListings
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "..", "fixtures", "classListings")
+ITERATIONS = 2000
+
+def countWebDriverRoundTrips(classListings):
+	# What getAllClasses costs per subject when it walks the DOM through WebDriver:
+	# find parentDiv + find classesDivs, then per card: find h2, read .text,
+	# find spans and one get_attribute("textContent") per span (including the removed first span)
+	roundTrips = 2
+	for _, classInfo, _ in classListings:
+		roundTrips += 3 + len(classInfo) + 1
+	return roundTrips
+
+def main():
+	for htmlFile in sorted(glob.glob(os.path.join(FIXTURES_PATH, "*.html"))):
+		with open(htmlFile, "r") as file:
+			html = file.read()
+		with open(htmlFile.replace(".html", ".json"), "r") as file:
+			expected = json.load(file)
+
+		classListings = parseClassListings(html)
+		parsed = [{"className": className, "classInfo": classInfo, "position": list(position)}
+							for className, classInfo, position in classListings]
+		if parsed != expected:
+			raise AssertionError(f"Parsed class listings do not match {os.path.basename(htmlFile)}")
+
+		start = time.perf_counter()
+		for _ in range(ITERATIONS):
+			parseClassListings(html)
+		elapsed = (time.perf_counter() - start) / ITERATIONS
+
+		print(f"{os.path.basename(htmlFile)}: {elapsed * 1000:.3f} ms per page, "
+					f"1 WebDriver round trip instead of {countWebDriverRoundTrips(classListings)}")
+
+if __name__ == "__main__":
+	main()
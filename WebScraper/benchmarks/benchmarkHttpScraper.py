@@ -0,0 +1,99 @@
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from httpScraper import HttpScraper, ReplayServer, recordResponse, DEFAULT_FIELD_MAP
+from asyncCrawler import AsyncCrawler
+
+TERM = "Spring 2025"
+CAREER = "Undergraduate"
+SUBJECT_COUNT = int(os.getenv("BENCHMARK_SUBJECTS", 200))
+SECTIONS_PER_PAGE = 50
+PAGES_PER_SUBJECT = 2
+LATENCY = float(os.getenv("BENCHMARK_LATENCY", 0.05)) # seconds the replay server waits before every response
+WORKER_COUNTS = (1, 8)
+REQUEST_RATES = (20, 100) # requests per second allowed to the async crawler
+
+def createSection(classNumber: int):
+	section = {
+		"name": "Principles of Financial Accounting",
+		"subjectCode": "ACC",
+		"catalogNumber": "211",
+		"sectionType": "Lecture",
+		"sectionCode": f"S{classNumber % 100:02d}",
+		"classNumber": classNumber,
+		"session": "Regular Academic",
+		"status": "Open",
+		"seatsAvailable": classNumber % 45,
+		"capacity": 45,
+		"waitlistAvailable": 300,
+		"waitlistCapacity": 300,
+		"meetings": [{"days": "Monday Wednesday", "timeStart": "6:35 pm", "timeEnd": "7:50 pm", "classroom": "Jenkins 114",
+			"instructor": "William Green", "startDate": "01/13", "endDate": "04/28"}]
+	}
+	if classNumber % 10 == 0:
+		section["meetings"] = [
+			{"days": "We", "timeStart": "6:30PM", "timeEnd": "8:50PM", "classroom": "Online Instruction ONL",
+				"instructor": "Mark Friedman", "startDate": "01/15/2025", "endDate": "03/05/2025"},
+			{"days": "Tu", "timeStart": "12:30PM", "timeEnd": "1:45PM", "classroom": "Stubblefield 204",
+				"instructor": "Mark Friedman", "startDate": "03/18/2025", "endDate": "04/22/2025"}
+		]
+	return section
+
+def recordSearches(directory: str):
+	"""Synthetic responses in the default field map layout, SUBJECT_COUNT subjects of PAGES_PER_SUBJECT pages."""
+	paramNames = DEFAULT_FIELD_MAP["params"]
+	workUnits = []
+	classNumber = 1000
+	for subjectIndex in range(SUBJECT_COUNT):
+		subject = f"Subject {subjectIndex}"
+		workUnits.append((TERM, CAREER, subject))
+		for page in range(1, PAGES_PER_SUBJECT + 1):
+			sections = []
+			for _ in range(SECTIONS_PER_PAGE):
+				sections.append(createSection(classNumber))
+				classNumber += 1
+			params = {paramNames["term"]: TERM, paramNames["career"]: CAREER, paramNames["subject"]: subject, paramNames["page"]: page}
+			recordResponse(directory, params, {"sections": sections, "totalPages": PAGES_PER_SUBJECT})
+	return workUnits
+
+def checkSections(sections: list):
+	if len(sections) != SUBJECT_COUNT * PAGES_PER_SUBJECT * SECTIONS_PER_PAGE:
+		raise AssertionError(f"Scraped {len(sections)} sections")
+	single = next(section for section in sections if not section.multipleMeetings)
+	if single.days != ["Monday", "Wednesday"] or single.startDate != datetime.datetime(2025, 1, 13) or single.instructor != ["William Green"]:
+		raise AssertionError(f"Unexpected section with one meeting: {single}")
+	multiple = next(section for section in sections if section.multipleMeetings)
+	if multiple.days != [["Wednesday"], ["Tuesday"]] or multiple.classroom != ["Online Instruction ONL", "Stubblefield 204"]:
+		raise AssertionError(f"Unexpected section with multiple meetings: {multiple}")
+
+def main():
+	directory = tempfile.mkdtemp()
+	try:
+		workUnits = recordSearches(directory)
+		with ReplayServer(directory, delay=LATENCY) as server:
+			for workers in WORKER_COUNTS:
+				start = time.perf_counter()
+				with HttpScraper(server.url, workers=workers) as httpScraper:
+					sections = list(httpScraper.scrapeWorkUnits(workUnits, showProgress=False))
+					requestsSent = httpScraper.requestsSent
+				seconds = time.perf_counter() - start
+				checkSections(sections)
+				print(f"{workers} workers: {len(workUnits)} subjects, {requestsSent} requests, {len(sections)} sections in {seconds:.2f} s "
+					f"({seconds / len(workUnits) * 1000:.1f} ms per subject, {LATENCY * 1000:.0f} ms latency per request)")
+			for requestsPerSecond in REQUEST_RATES:
+				# One pooled connection for every request in flight
+				with HttpScraper(server.url, workers=16) as httpScraper:
+					crawler = AsyncCrawler(httpScraper, requestsPerSecond, maxInFlight=16)
+					stats = crawler.run(workUnits, showProgress=False)
+				print(f"async at {requestsPerSecond} requests/s: {stats['requests']} requests in {stats['seconds']:.2f} s "
+					f"({stats['requestsPerSecond']:.1f} requests/s, {stats['sections']} sections)")
+	finally:
+		shutil.rmtree(directory)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,97 @@
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from pymongo import ReplaceOne
+from ingest import BulkIngester, createClient
+
+# Needs a MongoDB server that can be written to, the benchmark database is dropped at the end
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+DATABASE_NAME = "ingestBenchmark"
+DOCUMENT_COUNT = int(os.getenv("BENCHMARK_DOCUMENTS", 200000))
+BATCH_SIZE = int(os.getenv("BENCHMARK_BATCH_SIZE", 5000))
+WORKER_COUNTS = (1, 2, 4, 8)
+
+def createDocuments(count: int):
+	retrieved = datetime.datetime(2025, 2, 28, 23, 0, 0)
+	sections = []
+	sectionsTS = []
+	for classNumber in range(count):
+		sections.append({
+			'name': 'Principles of Financial Accounting',
+			'catalogNumber': '211',
+			'academicCareer': 'Undergraduate',
+			'semester': 'Spring',
+			'year': 2025,
+			'sectionType': 'Lecture',
+			'sectionCode': '1U',
+			'classNumber': classNumber,
+			'session': 'Regular Academic',
+			'days': ['Monday', 'Wednesday', 'Friday'],
+			'capacity': 45,
+			'waitlistCapacity': 300,
+			'dateTimeRetrieved': retrieved,
+			'subjectName': 'Accounting Bus Admin',
+			'subjectCode': 'ACC'
+		})
+		sectionsTS.append({
+			'dateTimeRetrieved': retrieved,
+			'courseInfo': {'semester': 'Spring', 'year': 2025, 'classNumber': classNumber},
+			'status': 'Open',
+			'seatsAvailable': 45,
+			'waitlistAvailable': 300
+		})
+	return sections, sectionsTS
+
+def resetCollections(db):
+	db.drop_collection('sections')
+	db.drop_collection('sectionsTS')
+	db['sections'].create_index([('semester', 1), ('year', 1), ('classNumber', 1)])
+
+def copyDocuments(documents: list):
+	# insert_many adds an _id to every document, so every run gets fresh copies
+	return [dict(document) for document in documents]
+
+def runSequential(db, sections: list, sectionsTS: list):
+	"""What csvToMongodb and saveCoursesToMongodb did before: one ordered call after the other."""
+	start = time.perf_counter()
+	for i in range(0, len(sectionsTS), BATCH_SIZE):
+		db['sectionsTS'].insert_many(sectionsTS[i:i + BATCH_SIZE])
+	for i in range(0, len(sections), BATCH_SIZE):
+		db['sections'].bulk_write([
+			ReplaceOne({'semester': section['semester'], 'year': section['year'], 'classNumber': section['classNumber']}, section, upsert=True)
+			for section in sections[i:i + BATCH_SIZE]
+		])
+	return time.perf_counter() - start
+
+def runIngester(client, db, sections: list, sectionsTS: list, workers: int):
+	start = time.perf_counter()
+	with BulkIngester(client, workers=workers, batchSize=BATCH_SIZE) as ingester:
+		ingester.insertMany(db['sectionsTS'], sectionsTS)
+		ingester.replaceMany(db['sections'], sections)
+	return time.perf_counter() - start
+
+def main():
+	client = createClient(MONGO_URI, max(WORKER_COUNTS))
+	db = client[DATABASE_NAME]
+	sections, sectionsTS = createDocuments(DOCUMENT_COUNT)
+	documentCount = len(sections) + len(sectionsTS)
+	try:
+		resetCollections(db)
+		elapsed = runSequential(db, copyDocuments(sections), copyDocuments(sectionsTS))
+		print(f"sequential ordered: {elapsed:.2f} s ({documentCount / elapsed:.0f} documents/sec)")
+		baseline = elapsed
+
+		for workers in WORKER_COUNTS:
+			resetCollections(db)
+			elapsed = runIngester(client, db, copyDocuments(sections), copyDocuments(sectionsTS), workers)
+			print(f"BulkIngester, {workers} workers: {elapsed:.2f} s ({documentCount / elapsed:.0f} documents/sec, "
+				f"{baseline / elapsed:.2f}x)")
+	finally:
+		client.drop_database(DATABASE_NAME)
+		client.close()
+
+if __name__ == "__main__":
+	main()
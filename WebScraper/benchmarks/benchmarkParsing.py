@@ -0,0 +1,79 @@
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import parsing
+from synthetic import createSections, createStatusTexts, createDayAbbreviations
+
+VALUE_COUNT = int(os.getenv("BENCHMARK_VALUES", 200000))
+DAYS_MAPPING = dict(parsing.DAYS_MAPPING)
+
+# What every section went through before the parsing module: strptime and split chains on every call
+
+def strptimeTime(text: str):
+	return datetime.datetime.strptime(text, "%I:%M %p")
+
+def strptimeDateRange(text: str, year: int):
+	startText, endText = text.split(" - ")[:2]
+	return (datetime.datetime.strptime(startText, "%m/%d").replace(year=year),
+		datetime.datetime.strptime(endText, "%m/%d").replace(year=year))
+
+def strptimeFullDate(text: str):
+	return datetime.datetime.strptime(text, "%m/%d/%Y")
+
+def splitDays(days: str):
+	if days == "TBA":
+		return ["TBA"]
+	daysList = []
+	for i in range(0, len(days), 2):
+		daysList.append(DAYS_MAPPING[days[i:i+2]])
+	return daysList
+
+def createValues():
+	"""The times, dates, days and status strings of VALUE_COUNT synthetic sections, in scraping order."""
+	generator = random.Random(0)
+	sections = createSections(VALUE_COUNT)
+	times = [section.timeStart.strftime("%I:%M %p").lstrip("0").lower() for section in sections if not section.multipleMeetings]
+	dateRanges = [f"{generator.randint(1, 12):02d}/{generator.randint(1, 28):02d} - 04/28" for _ in range(VALUE_COUNT)]
+	fullDates = [f"{generator.randint(1, 12):02d}/{generator.randint(1, 28):02d}/2025" for _ in range(VALUE_COUNT)]
+	statusTexts = [classInfo[0] for classInfo, _ in createStatusTexts(VALUE_COUNT)]
+	return {
+		"time": (times, strptimeTime, parsing.parseTime),
+		"date range": (dateRanges, lambda text: strptimeDateRange(text, 2025), lambda text: parsing.parseDateRange(text, 2025)),
+		"full date": (fullDates, strptimeFullDate, parsing.parseFullDate),
+		"days": (createDayAbbreviations(VALUE_COUNT), splitDays, parsing.mapDays),
+		"status": (statusTexts, parsing.splitStatusText, parsing.parseStatusText)
+	}
+
+def normalize(value):
+	return tuple(value) if isinstance(value, list) else value
+
+def clearCaches():
+	for parser in (parsing.parseTime, parsing.parseDate, parsing.parseFullDate, parsing.parseDateRange, parsing.mapDays,
+		parsing.parseSeatCount, parsing.parseStatusText):
+		parser.cache_clear()
+
+def timeIt(function, values: list):
+	start = time.perf_counter()
+	for value in values:
+		function(value)
+	return time.perf_counter() - start
+
+def main():
+	for name, (values, before, after) in createValues().items():
+		for value in set(values[:1000]):
+			if normalize(before(value)) != after(value):
+				raise AssertionError(f"{name}: {before(value)} != {after(value)} for {value!r}")
+		beforeSeconds = timeIt(before, values)
+		clearCaches()
+		coldSeconds = timeIt(after, values)
+		warmSeconds = timeIt(after, values)
+		print(f"{name:<11} {len(values)} values, {len(set(values))} distinct: {beforeSeconds / len(values) * 1e9:.0f} ns before, "
+			f"{coldSeconds / len(values) * 1e9:.0f} ns from an empty cache, {warmSeconds / len(values) * 1e9:.0f} ns warm "
+			f"({beforeSeconds / coldSeconds:.1f}x)")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,60 @@
+import datetime
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from sectionParser import parseSections, fillMeetingPatterns
+
+GOLDEN_FILENAME = os.path.join(os.path.dirname(__file__), "..", "fixtures", "sections", "golden.json")
+SECTION_COUNTS = (100, 1000, 10000, 40000)
+# Regular, waitlist with its waitlist text and reserved seats, and lab sections
+LOAD_CASE = "Waitlist followed by the waitlist seats and the reserved seats"
+
+def serialize(value):
+	if isinstance(value, datetime.datetime):
+		return value.isoformat()
+	if isinstance(value, (list, tuple)): # the empty default is a shared tuple, stored as an array like a list
+		return [serialize(item) for item in value]
+	return value
+
+def parseCase(case: dict, dateTimeRetrieved: datetime.datetime):
+	"""Same steps as Scraper.parseClassSections, with the recorded meeting patterns instead of the browser."""
+	sections = []
+	for section, _, hasMeetingPatterns in parseSections(case["classInfo"], case["className"], case["subjectName"],
+		case["academicCareer"], case["term"], dateTimeRetrieved):
+		if hasMeetingPatterns:
+			fillMeetingPatterns(section, case["meetingPatterns"][str(section.classNumber)])
+		sections.append(section)
+	return sections
+
+def checkGoldenCases(golden: dict):
+	# Recorded from the list mutating fillCourseObject this parser replaced
+	dateTimeRetrieved = datetime.datetime.fromisoformat(golden["dateTimeRetrieved"])
+	for case in golden["cases"]:
+		classInfo = list(case["classInfo"])
+		sections = [{field: serialize(value) for field, value in section.to_dict().items()} for section in parseCase(case, dateTimeRetrieved)]
+		if sections != case["expected"]:
+			raise AssertionError(f"Parsed sections do not match the golden case: {case['description']}")
+		if case["classInfo"] != classInfo:
+			raise AssertionError(f"classInfo was modified: {case['description']}")
+	print(f"{len(golden['cases'])} golden cases match")
+
+def main():
+	with open(GOLDEN_FILENAME, "r") as file:
+		golden = json.load(file)
+	checkGoldenCases(golden)
+
+	case = next(case for case in golden["cases"] if case["description"] == LOAD_CASE)
+	sectionsInCase = len(case["expected"])
+	dateTimeRetrieved = datetime.datetime.fromisoformat(golden["dateTimeRetrieved"])
+	for sectionCount in SECTION_COUNTS:
+		classInfo = case["classInfo"] * (sectionCount // sectionsInCase)
+		start = time.perf_counter()
+		sections = list(parseSections(classInfo, case["className"], case["subjectName"], case["academicCareer"], case["term"], dateTimeRetrieved))
+		elapsed = time.perf_counter() - start
+		print(f"{len(sections):>6} sections in one class card: {elapsed * 1e6 / len(sections):.1f} us per section")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,223 @@
+"""
+Throughput and memory of the parsing, serialization and ingestion hot paths on
+synthetic catalogs, appended to a history file so every run is compared with the
+previous one.
+
+Examples:
+python WebScraper/benchmarks/benchmarkSuite.py
+BENCHMARK_SIZES=10000,100000,1000000 BENCHMARK_ONLY=convertChunk,saveCoursesToCsv python WebScraper/benchmarks/benchmarkSuite.py
+BENCHMARK_MONGO_URI=mongodb://localhost:27017 python WebScraper/benchmarks/benchmarkSuite.py
+"""
+
+import datetime
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from course import course
+from sectionParser import parseSections, parseStatus, fillMeetingPatterns
+from csvToMongodb import readChunks, convertChunk
+from ingest import createClient
+from schema import INDEXES
+from synthetic import createSections, createClassCards, createStatusTexts, createDayAbbreviations
+
+SIZES = [int(size) for size in os.getenv("BENCHMARK_SIZES", "10000,100000").split(",")] # sections in each synthetic catalog
+ONLY = set(filter(None, os.getenv("BENCHMARK_ONLY", "").split(","))) # names of the benchmarks to run, all when empty
+REPEAT = int(os.getenv("BENCHMARK_REPEAT", 3)) # timed runs of each benchmark, the fastest one is kept
+MEASURE_MEMORY = os.getenv("BENCHMARK_MEMORY", "1") != "0" # one more run under tracemalloc for the peak memory
+HISTORY_FILENAME = os.getenv("BENCHMARK_HISTORY", os.path.join(os.path.dirname(__file__), "results", "history.jsonl"))
+# Needs a MongoDB server that can be written to (a local mongod), the benchmark database is dropped at the end
+MONGO_URI = os.getenv("BENCHMARK_MONGO_URI")
+DATABASE_NAME = "benchmarkSuite"
+
+def setupClassCards(size: int, workDirectory: str):
+	return createClassCards(size)
+
+def runParseSections(state):
+	"""Scraper.parseClassSections without the browser, the recorded meeting patterns are filled in."""
+	cards, dateTimeRetrieved = state
+	sectionCount = 0
+	for card in cards:
+		for section, _, hasMeetingPatterns in parseSections(card["classInfo"], card["className"], card["subjectName"],
+			card["academicCareer"], card["term"], dateTimeRetrieved):
+			if hasMeetingPatterns:
+				fillMeetingPatterns(section, card["meetingPatterns"][str(section.classNumber)])
+			sectionCount += 1
+	return sectionCount
+
+def runParseStatus(statusTexts):
+	section = course(datetime.datetime(2025, 2, 28, 23))
+	for classInfo, statusIndex in statusTexts:
+		parseStatus(section, classInfo, statusIndex)
+	return len(statusTexts)
+
+def runMapDays(days):
+	for abbreviation in days:
+		course.mapDaysAbrvToFull(abbreviation)
+	return len(days)
+
+def setupSections(size: int, workDirectory: str):
+	return createSections(size)
+
+def runCreateTimeSeriesEntry(sections):
+	for section in sections:
+		section.createTimeSeriesEntry()
+	return len(sections)
+
+def runCreateCourseReplacement(sections):
+	for section in sections:
+		section.createCourseReplacement()
+	return len(sections)
+
+def setupCsv(size: int, workDirectory: str):
+	return createSections(size), os.path.join(workDirectory, "saved.csv")
+
+def runSaveCoursesToCsv(state):
+	sections, filename = state
+	# saveCoursesToCsv appends, every run writes a new file
+	if os.path.exists(filename):
+		os.remove(filename)
+	course.saveCoursesToCsv(sections, filename)
+	return len(sections)
+
+def setupCsvChunks(size: int, workDirectory: str):
+	filename = os.path.join(workDirectory, "import.csv")
+	course.saveCoursesToCsv(createSections(size), filename)
+	# Read once, only the conversion is timed
+	return list(readChunks(filename))
+
+def runConvertChunk(chunks):
+	rowCount = 0
+	for header, rows in chunks:
+		convertChunk(header, rows)
+		rowCount += len(rows)
+	return rowCount
+
+def setupMongo(size: int, workDirectory: str):
+	client = createClient(MONGO_URI)
+	return client, client[DATABASE_NAME], createSections(size)
+
+def runSaveSectionsToMongodb(state):
+	"""course.saveCoursesToMongodb into the benchmark database instead of courses, every run starts from an empty one."""
+	client, db, sections = state
+	client.drop_database(DATABASE_NAME)
+	for name, indexes in INDEXES.items():
+		db[name].create_indexes(indexes)
+	course.saveCoursesToMongodb(client, sections, databaseName=DATABASE_NAME)
+	return len(sections)
+
+def cleanupMongo(state):
+	client = state[0]
+	client.drop_database(DATABASE_NAME)
+	client.close()
+
+# name: (setup(size, workDirectory) -> state, run(state) -> items processed, cleanup(state) or None, needs MONGO_URI)
+BENCHMARKS = {
+	"parseSections": (setupClassCards, runParseSections, None, False),
+	"parseStatus": (lambda size, workDirectory: createStatusTexts(size), runParseStatus, None, False),
+	"mapDaysAbrvToFull": (lambda size, workDirectory: createDayAbbreviations(size), runMapDays, None, False),
+	"createTimeSeriesEntry": (setupSections, runCreateTimeSeriesEntry, None, False),
+	"createCourseReplacement": (setupSections, runCreateCourseReplacement, None, False),
+	"saveCoursesToCsv": (setupCsv, runSaveCoursesToCsv, None, False),
+	"convertChunk": (setupCsvChunks, runConvertChunk, None, False),
+	"saveSectionsToMongodb": (setupMongo, runSaveSectionsToMongodb, cleanupMongo, True)
+}
+
+def measure(run, state):
+	"""Seconds of the fastest of REPEAT runs, the items processed and the peak memory of one run in bytes."""
+	bestSeconds = None
+	for _ in range(REPEAT):
+		gc.collect()
+		start = time.perf_counter()
+		items = run(state)
+		seconds = time.perf_counter() - start
+		bestSeconds = seconds if bestSeconds is None else min(bestSeconds, seconds)
+	peakMemory = None
+	if MEASURE_MEMORY:
+		# Timed separately, tracemalloc slows every allocation down
+		gc.collect()
+		tracemalloc.start()
+		run(state)
+		peakMemory = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+	return bestSeconds, items, peakMemory
+
+def currentCommit():
+	try:
+		result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+			capture_output=True, text=True, check=True)
+	except (OSError, subprocess.CalledProcessError):
+		return None
+	return result.stdout.strip()
+
+def loadHistory(filename: str):
+	if not os.path.exists(filename):
+		return []
+	with open(filename, "r") as file:
+		return [json.loads(line) for line in file if line.strip()]
+
+def previousResult(history: list, name: str, size: int):
+	"""The newest earlier result of a benchmark at a size, with the commit of its run."""
+	for run in reversed(history):
+		for result in run["results"]:
+			if result["name"] == name and result["size"] == size:
+				return result, run["commit"]
+	return None, None
+
+def appendHistory(filename: str, run: dict):
+	os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+	with open(filename, "a") as file:
+		file.write(json.dumps(run) + "\n")
+
+def main():
+	history = loadHistory(HISTORY_FILENAME)
+	run = {
+		"date": datetime.datetime.now().isoformat(timespec="seconds"),
+		"commit": currentCommit(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"cpus": os.cpu_count(),
+		"results": []
+	}
+	print(f"{'benchmark':<26}{'size':>9}{'best s':>9}{'items/s':>12}{'peak MiB':>10}  change")
+	workDirectory = tempfile.mkdtemp()
+	try:
+		for name, (setup, runBenchmark, cleanup, needsMongo) in BENCHMARKS.items():
+			if len(ONLY) > 0 and name not in ONLY:
+				continue
+			if needsMongo and MONGO_URI is None:
+				print(f"{name:<26}skipped, set BENCHMARK_MONGO_URI to a MongoDB server that can be written to")
+				continue
+			for size in SIZES:
+				state = setup(size, workDirectory)
+				try:
+					seconds, items, peakMemory = measure(runBenchmark, state)
+				finally:
+					if cleanup is not None:
+						cleanup(state)
+				del state
+				result = {"name": name, "size": size, "items": items, "seconds": seconds,
+					"itemsPerSecond": items / seconds if seconds > 0 else None, "peakMemoryBytes": peakMemory}
+				run["results"].append(result)
+				previous, previousCommit = previousResult(history, name, size)
+				change = ""
+				if previous is not None and previous["itemsPerSecond"] and result["itemsPerSecond"]:
+					change = f"{(result['itemsPerSecond'] / previous['itemsPerSecond'] - 1) * 100:+.1f}% vs {previousCommit}"
+				memory = f"{peakMemory / 2**20:.1f}" if peakMemory is not None else "-"
+				print(f"{name:<26}{size:>9}{seconds:>9.3f}{result['itemsPerSecond']:>12.0f}{memory:>10}  {change}")
+	finally:
+		shutil.rmtree(workDirectory)
+	if len(run["results"]) > 0:
+		appendHistory(HISTORY_FILENAME, run)
+		print("Results appended to", HISTORY_FILENAME)
+
+if __name__ == "__main__":
+	main()
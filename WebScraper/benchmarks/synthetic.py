@@ -0,0 +1,138 @@
+import datetime
+import json
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from course import course
+
+GOLDEN_FILENAME = os.path.join(os.path.dirname(__file__), "..", "fixtures", "sections", "golden.json")
+SUBJECTS = [
+	("Accounting Bus Admin", "ACC"), ("Biology", "BIL"), ("Chemistry", "CHM"), ("Computer Science", "CSC"),
+	("Economics", "ECO"), ("Electrical & Computer Engineering", "ECE"), ("English", "ENG"), ("Finance", "FIN"),
+	("History", "HIS"), ("Mathematics", "MTH"), ("Music Ensemble", "MDE"), ("Physics", "PHY"),
+	("Psychology", "PSY"), ("Spanish", "SPA"), ("Sociology", "SOC"), ("Theatre Arts", "THA")
+]
+SECTION_TYPES = ["Lecture", "Laboratory", "Discussion", "Seminar", "Ensemble"]
+DAYS = [["Monday", "Wednesday", "Friday"], ["Tuesday", "Thursday"], ["Monday", "Wednesday"], ["Friday"], ["TBA"]]
+CLASSROOMS = ["Whitten LC 182", "Cox Science 126", "Stubblefield 204", "Frost North Studio 330", "Online Instruction ONL"]
+INSTRUCTORS = ["William Green", "Charles Mallery", "Mark Friedman", "Roxana Amed", "Reynaldo Sanchez", "Kim Grinfeder"]
+CLASS_NUMBER_PATTERN = re.compile(r"Class Number\d+")
+# Share of the sections with each optional feature, about what a Spring term has
+MULTIPLE_MEETINGS_SHARE = 0.05
+RESERVED_SEATS_SHARE = 0.1
+TOPIC_SHARE = 0.03
+WAITLIST_SHARE = 0.15
+SECTIONS_PER_SUBJECT = 250
+
+def createSection(generator: random.Random, classNumber: int, runDateTime: datetime.datetime):
+	"""One section with the fields the scraper fills in, some with multiple meetings, reserved seats or a topic."""
+	section = course(runDateTime)
+	# The scraper produces the sections subject by subject
+	section.subjectName, section.subjectCode = SUBJECTS[classNumber // SECTIONS_PER_SUBJECT % len(SUBJECTS)]
+	section.name = f"{section.subjectName} {classNumber % 97}"
+	section.catalogNumber = str(100 + classNumber % 500)
+	section.academicCareer = "Graduate" if classNumber % 5 == 0 else "Undergraduate"
+	section.semester = "Spring"
+	section.year = 2025
+	section.sectionType = generator.choice(SECTION_TYPES)
+	section.sectionCode = f"{classNumber % 30:02d}"
+	section.classNumber = classNumber
+	section.session = "Regular Academic"
+	section.capacity = generator.randint(10, 300)
+	section.seatsAvailable = generator.randint(0, section.capacity)
+	section.status = "Open" if section.seatsAvailable > 0 else "Closed"
+	if generator.random() < WAITLIST_SHARE:
+		section.status = "Waitlist"
+		section.waitlistAvailable = generator.randint(0, section.waitlistCapacity)
+	if generator.random() < RESERVED_SEATS_SHARE:
+		reservedSeatsCapacity = generator.randint(1, 10)
+		section.addReservedSeats(generator.randint(0, reservedSeatsCapacity), reservedSeatsCapacity)
+	meetingCount = 2 if generator.random() < MULTIPLE_MEETINGS_SHARE else 1
+	meetings = []
+	for _ in range(meetingCount):
+		hour = generator.randint(8, 19)
+		start = datetime.datetime(1900, 1, 1, hour, generator.choice((0, 5, 30, 35)))
+		meetings.append((generator.choice(DAYS), start, start + datetime.timedelta(minutes=generator.choice((50, 75, 165))),
+			generator.choice(CLASSROOMS), generator.sample(INSTRUCTORS, generator.randint(1, 2)),
+			datetime.datetime(2025, 1, 13), datetime.datetime(2025, 4, 28)))
+	if meetingCount == 1:
+		section.days, section.timeStart, section.timeEnd, section.classroom, section.instructor, section.startDate, section.endDate = meetings[0]
+	else:
+		section.multipleMeetings = True
+		section.days, section.timeStart, section.timeEnd, section.classroom, section.instructor, section.startDate, section.endDate = map(list, zip(*meetings))
+	if generator.random() < TOPIC_SHARE:
+		section.addTopic([f"Topic {classNumber % 7}"] * meetingCount if section.multipleMeetings else f"Topic {classNumber % 7}")
+	return section
+
+def createSections(count: int, runDateTime=datetime.datetime(2025, 2, 28, 23), seed=0):
+	"""count sections of one run, the same ones for the same seed."""
+	generator = random.Random(seed)
+	return [createSection(generator, classNumber, runDateTime) for classNumber in range(1000, 1000 + count)]
+
+def loadGoldenCases():
+	with open(GOLDEN_FILENAME, "r") as file:
+		return json.load(file)
+
+def createClassCards(sectionCount: int):
+	"""
+	Class cards with at least sectionCount sections, the recorded cards of the golden
+	sections fixture over and over with new class numbers. Returns the cards (dicts
+	like the golden cases, with the meeting patterns of their sections) and the
+	dateTimeRetrieved of the fixture.
+	"""
+	golden = loadGoldenCases()
+	cards = []
+	classNumber = 10000
+	sections = 0
+	while sections < sectionCount:
+		for case in golden["cases"]:
+			card = dict(case)
+			renumbered = {}
+			classInfo = []
+			for text in case["classInfo"]:
+				match = CLASS_NUMBER_PATTERN.search(text)
+				if match is not None:
+					renumbered[match.group()[len("Class Number"):]] = str(classNumber)
+					text = text.replace(match.group(), f"Class Number{classNumber}")
+					classNumber += 1
+				classInfo.append(text)
+			card["classInfo"] = classInfo
+			card["meetingPatterns"] = {renumbered[number]: cells for number, cells in case["meetingPatterns"].items() if number in renumbered}
+			cards.append(card)
+			sections += len(case["expected"])
+			if sections >= sectionCount:
+				break
+	return cards, datetime.datetime.fromisoformat(golden["dateTimeRetrieved"])
+
+def createStatusTexts(count: int, seed=0):
+	"""(classInfo, statusIndex) pairs in every status layout parseStatus reads."""
+	generator = random.Random(seed)
+	layouts = []
+	for _ in range(count):
+		capacity = generator.randint(10, 300)
+		seats = generator.randint(0, capacity)
+		kind = generator.randrange(4)
+		if kind == 0:
+			layouts.append(([f"Open, {seats} of {capacity} seats available"], 0))
+		elif kind == 1:
+			layouts.append(([f"Open, {seats} of {capacity} seats available, reserved seats available", "5 of 5"], 0))
+		elif kind == 2:
+			layouts.append(([f"Waitlist, 300 of 300 waitlist seats available. {seats} of {capacity} seats available."], 0))
+		else:
+			layouts.append(([f"Waitlist, 295 of 300 waitlist seats available. 0 of {capacity} seats available.", "295 of 300", "5 of 5"], 0))
+	return layouts
+
+def createDayAbbreviations(count: int, seed=0):
+	"""Days of the meeting patterns tables, 'MoWeFr' or 'TBA'."""
+	generator = random.Random(seed)
+	abbreviations = list(course.days_mapping)
+	days = []
+	for _ in range(count):
+		if generator.random() < 0.02:
+			days.append("TBA")
+		else:
+			days.append("".join(sorted(generator.sample(abbreviations, generator.randint(1, 3)), key=abbreviations.index)))
+	return days
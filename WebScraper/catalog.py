@@ -0,0 +1,107 @@
+import os
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+from ingest import BulkIngester
+
+# Placeholders the scraper stores when a section has no real instructor
+NO_INSTRUCTOR = ("X TBA", "NULL", "-", "")
+
+def flattenInstructors(instructor):
+	"""Instructor names of a section, one list per meeting for sections with multiple meetings."""
+	if instructor is None:
+		return []
+	if isinstance(instructor, str):
+		return [instructor]
+	names = []
+	for value in instructor:
+		names.extend(flattenInstructors(value))
+	return names
+
+def termOf(section: dict):
+	return f"{section['semester']} {section['year']}"
+
+class CourseCatalog:
+	"""
+	Every course ever offered, keyed by (subjectCode, catalogNumber), with all
+	of its instructors and the class numbers of its sections in every term.
+	The number of sections in a term is the length of its offerings list.
+	Updated with $addToSet as sections are saved, so saving the same section
+	again changes nothing.
+
+	Example of a courseCatalog document:
+	{
+		'subjectCode': 'ECE',
+		'catalogNumber': '421',
+		'name': 'Embedded Systems',
+		'subjectName': 'Electrical & Computer Engr',
+		'instructors': ['Kamal Premaratne', 'Nigel John'],
+		'terms': ['Fall 2024', 'Spring 2025'],
+		'offerings': {'Fall 2024': [5385], 'Spring 2025': [8426, 8427]},
+		'lastSeen': datetime(2025, 2, 28, 23, 5, 7)
+	}
+	"""
+	def __init__(self, client: MongoClient, databaseName="courses"):
+		self.collection = client[databaseName]["courseCatalog"]
+
+	def update(self, sections: list, ingester: BulkIngester):
+		"""Add section documents (as in the sections collection) to the catalog entries of their courses."""
+		courses = {}
+		for section in sections:
+			key = (section["subjectCode"], section["catalogNumber"])
+			if key not in courses:
+				courses[key] = {"name": section["name"], "subjectName": section["subjectName"], "instructors": set(),
+					"offerings": {}, "lastSeen": section["dateTimeRetrieved"]}
+			entry = courses[key]
+			entry["instructors"].update(name for name in flattenInstructors(section["instructor"]) if name not in NO_INSTRUCTOR)
+			entry["offerings"].setdefault(termOf(section), set()).add(section["classNumber"])
+			entry["lastSeen"] = max(entry["lastSeen"], section["dateTimeRetrieved"])
+		keys = list(courses)
+		updates = [CourseCatalog.createUpdate(key, courses[key]) for key in keys]
+		ingester.bulkWriteByKey(self.collection, updates, keys)
+
+	@staticmethod
+	def createUpdate(key: tuple[str, str], entry: dict):
+		addToSet = {
+			"instructors": {"$each": sorted(entry["instructors"])},
+			"terms": {"$each": sorted(entry["offerings"])}
+		}
+		for term, classNumbers in entry["offerings"].items():
+			addToSet[f"offerings.{term}"] = {"$each": sorted(classNumbers)}
+		return UpdateOne(
+			{"subjectCode": key[0], "catalogNumber": key[1]},
+			{
+				"$addToSet": addToSet,
+				"$set": {"name": entry["name"], "subjectName": entry["subjectName"]},
+				"$max": {"lastSeen": entry["lastSeen"]}
+			},
+			upsert=True
+		)
+
+	def rebuild(self, client: MongoClient, ingester: BulkIngester):
+		"""
+		Add every saved section to the catalog, for data saved before the catalog existed.
+		The catalog is not dropped first, sections only keep their latest instructors
+		so the ones collected along the way would be lost.
+		"""
+		projection = {"subjectCode": 1, "catalogNumber": 1, "name": 1, "subjectName": 1, "semester": 1, "year": 1,
+			"classNumber": 1, "instructor": 1, "dateTimeRetrieved": 1, "_id": 0}
+		batch = []
+		sectionsAdded = 0
+		for section in client["courses"]["sections"].find({}, projection):
+			batch.append(section)
+			if len(batch) >= ingester.batchSize:
+				self.update(batch, ingester)
+				sectionsAdded += len(batch)
+				batch = []
+		self.update(batch, ingester)
+		ingester.flush()
+		return sectionsAdded + len(batch)
+
+if __name__ == "__main__":
+	# Load the environment variables
+	load_dotenv()
+	client = MongoClient(os.environ['MONGO_URI'])
+	with BulkIngester(client) as ingester:
+		sectionsAdded = CourseCatalog(client).rebuild(client, ingester)
+	print(f"Rebuilt the course catalog from {sectionsAdded} sections")
+	client.close()
@@ -0,0 +1,169 @@
+import datetime
+import json
+from pymongo import MongoClient
+from ingest import BulkIngester
+from sectionState import SectionStateCache, DYNAMIC_FIELDS, UNTRACKED_FIELDS, sectionKey, staticHash
+
+CHANGES_COLLECTION = "sectionChanges"
+INSERTED = "inserted"
+UPDATED = "updated"
+REMOVED = "removed"
+
+def changedFields(previousDocument: dict, document: dict):
+	"""{field: {"from": old, "to": new}} of the static fields that differ between two sections documents."""
+	changes = {}
+	for field in document.keys() | previousDocument.keys():
+		if field == "_id" or field in UNTRACKED_FIELDS:
+			continue
+		# Compared like staticHash serializes them, an empty tuple of a new record equals the empty list read back from sections
+		if json.dumps(previousDocument.get(field), default=str) != json.dumps(document.get(field), default=str):
+			changes[field] = {"from": previousDocument.get(field), "to": document.get(field)}
+	return changes
+
+def jsonValue(value):
+	if isinstance(value, datetime.datetime):
+		return value.isoformat()
+	return str(value)
+
+class ChangeFeed:
+	"""
+	Keyed diff of every saved section against the previous snapshot, written as
+	change events to the sectionChanges collection, or to a JSONL file when
+	filename is given, so downstream jobs only read what changed.
+
+	The previous snapshot is sectionsLatest (see SectionStateCache): a section is
+	updated when the staticHash of the fields createCourseReplacement writes or one
+	of its time series fields differs. Only for a different hash is the previous
+	document read from sections, to name the fields that changed. Sections that
+	were saved before but are missing from a completed subject are removed. The
+	first run with a change feed reports every section as inserted.
+
+	Examples of change events:
+	{'type': 'inserted', 'semester': 'Spring', 'year': 2025, 'classNumber': 5385, 'academicCareer': 'Undergraduate',
+	 'subjectName': 'Music Ensemble', 'dateTimeRetrieved': datetime(2025, 2, 28, 23, 0), 'section': {...}}
+	{'type': 'updated', ..., 'changes': {'instructor': {'from': ['Roxana Amed'], 'to': ['Reynaldo Sanchez']},
+	 'seatsAvailable': {'from': 1, 'to': 0}, 'status': {'from': 'Open', 'to': 'Closed'}}}
+	{'type': 'removed', 'semester': 'Spring', 'year': 2025, 'classNumber': 5386, ...}
+	"""
+	def __init__(self, client: MongoClient, stateCache: SectionStateCache = None, filename=None):
+		self.client = client
+		self.filename = filename
+		# Shared with the delta writes, which keep sectionsLatest up to date themselves
+		self.ownsStates = stateCache is None
+		self.stateCache = stateCache if stateCache is not None else SectionStateCache(client)
+		self.seen = {} # class numbers saved for each (semester, year, academicCareer, subjectName) of the run
+		self.lastDateTimeRetrieved = None
+		self.eventsWritten = 0
+
+	def diff(self, courses: list):
+		"""
+		Change events and new states of courses, to be called before they are written,
+		while sections and sectionsLatest still hold the previous snapshot.
+		"""
+		self.stateCache.prefetch([sectionKey(c.semester, c.year, c.classNumber) for c in courses])
+		events = []
+		states = []
+		staticChanges = {} # key -> (event, new document) of the sections whose static fields changed
+		for courseSection in courses:
+			self.seen.setdefault((courseSection.semester, courseSection.year, courseSection.academicCareer, courseSection.subjectName),
+				set()).add(courseSection.classNumber)
+			if self.lastDateTimeRetrieved is None or courseSection.dateTimeRetrieved > self.lastDateTimeRetrieved:
+				self.lastDateTimeRetrieved = courseSection.dateTimeRetrieved
+			key = sectionKey(courseSection.semester, courseSection.year, courseSection.classNumber)
+			document = courseSection.to_bson()
+			state = {
+				"semester": courseSection.semester,
+				"year": courseSection.year,
+				"classNumber": courseSection.classNumber,
+				"academicCareer": courseSection.academicCareer,
+				"subjectName": courseSection.subjectName,
+				"status": courseSection.status,
+				"seatsAvailable": courseSection.seatsAvailable,
+				"waitlistAvailable": courseSection.waitlistAvailable,
+				"staticHash": staticHash(document)
+			}
+			event = self.createEvent(INSERTED, state, courseSection.dateTimeRetrieved)
+			previousState = self.stateCache.get(key)
+			if previousState is None:
+				event["section"] = document
+			else:
+				event["type"] = UPDATED
+				event["changes"] = {field: {"from": previousState.get(field), "to": state[field]}
+					for field in DYNAMIC_FIELDS if previousState.get(field) != state[field]}
+				if previousState.get("staticHash") != state["staticHash"]:
+					staticChanges[key] = (event, document)
+				elif len(event["changes"]) == 0:
+					continue
+			events.append(event)
+			states.append(state)
+		self.addStaticChanges(staticChanges)
+		return events, states
+
+	def addStaticChanges(self, staticChanges: dict):
+		# One query per (semester, year) for the previous documents of the changed sections
+		classNumbers = {}
+		for semester, year, classNumber in staticChanges:
+			classNumbers.setdefault((semester, year), []).append(classNumber)
+		sections = self.client["courses"]["sections"]
+		for (semester, year), numbers in classNumbers.items():
+			for previousDocument in sections.find({"semester": semester, "year": year, "classNumber": {"$in": numbers}}):
+				event, document = staticChanges[sectionKey(semester, year, previousDocument["classNumber"])]
+				event["changes"].update(changedFields(previousDocument, document))
+
+	@staticmethod
+	def createEvent(eventType: str, state: dict, dateTimeRetrieved: datetime.datetime):
+		return {
+			"type": eventType,
+			"semester": state["semester"],
+			"year": state["year"],
+			"classNumber": state["classNumber"],
+			"academicCareer": state.get("academicCareer"),
+			"subjectName": state.get("subjectName"),
+			"dateTimeRetrieved": dateTimeRetrieved
+		}
+
+	def commit(self, events: list, states: list, ingester: BulkIngester):
+		"""Write the events of diff and remember the new states, once the sections themselves are written."""
+		if self.ownsStates:
+			self.stateCache.save(states)
+		self.write(events, ingester)
+
+	def endWorkUnit(self, workUnit: tuple[str, str, str], ingester: BulkIngester, completed=True):
+		"""
+		Removed events for the sections of a completed (term, academic career, subject)
+		that were not saved this run. Nothing is removed for a unit that did not complete,
+		or that had saved sections before but none this run: a search that timed out or a
+		response in an unexpected shape must not wipe out a whole subject.
+		"""
+		term, academicCareer, subjectName = workUnit
+		semester, year = term.split(" ")[:2]
+		year = int(year)
+		seen = self.seen.pop((semester, year, academicCareer, subjectName), set())
+		if not completed:
+			return
+		subjectFilter = {"semester": semester, "year": year, "academicCareer": academicCareer, "subjectName": subjectName}
+		removedStates = list(self.stateCache.collection.find(dict(subjectFilter, classNumber={"$nin": list(seen)}), {"_id": 0}))
+		if len(removedStates) == 0:
+			return
+		if len(seen) == 0:
+			print("No sections for", *workUnit, "but", len(removedStates), "were saved before, not reporting them as removed")
+			return
+		dateTimeRetrieved = self.lastDateTimeRetrieved if self.lastDateTimeRetrieved is not None else datetime.datetime.now()
+		self.write([self.createEvent(REMOVED, state, dateTimeRetrieved) for state in removedStates], ingester)
+		# A removed section is only reported once, sections keeps its last document
+		removedNumbers = [state["classNumber"] for state in removedStates]
+		self.stateCache.collection.delete_many(dict(subjectFilter, classNumber={"$in": removedNumbers}))
+		for classNumber in removedNumbers:
+			self.stateCache.states.pop(sectionKey(semester, year, classNumber), None)
+
+	def write(self, events: list, ingester: BulkIngester):
+		if len(events) == 0:
+			return
+		if self.filename is not None:
+			with open(self.filename, "a") as file:
+				for event in events:
+					file.write(json.dumps(event, default=jsonValue) + "\n")
+		else:
+			ingester.insertMany(self.client["courses"][CHANGES_COLLECTION], events)
+			ingester.flush()
+		self.eventsWritten += len(events)
@@ -0,0 +1,184 @@
+from abc import ABC, abstractmethod
+import datetime
+import json
+import os
+from pymongo import MongoClient
+
+# Status of today's run, as reported by course.wasDataCollectedToday
+NOT_COLLECTED = "none"
+PARTIALLY_COLLECTED = "partial"
+COLLECTED = "complete"
+
+def todayInEST():
+	EST = datetime.timezone(datetime.timedelta(hours=-5))
+	return datetime.datetime.now(EST).date().isoformat()
+
+class Checkpoint(ABC):
+	"""
+	Records which (term, academic career, subject) work units of today's run are
+	already saved, so an interrupted crawl can be resumed instead of rerun.
+
+	Example of the stored state:
+	{
+		'runDate': '2025-02-28',
+		'scope': ['Spring 2025', '', ''],
+		'completed': [['Spring 2025', 'Undergraduate', 'Accounting'], ...],
+		'complete': False
+	}
+	"""
+	def __init__(self, scope=("", "", "")):
+		self.runDate = todayInEST()
+		self.scope = list(scope)
+		self.completed = set()
+		self.complete = False
+		self.exists = False
+
+	def load(self):
+		state = self.read()
+		if state is not None and state["runDate"] == self.runDate and state["scope"] == self.scope:
+			self.completed = set(tuple(unit) for unit in state["completed"])
+			self.complete = state["complete"]
+			self.exists = True
+		else:
+			self.reset()
+		return self
+
+	def reset(self):
+		self.completed = set()
+		self.complete = False
+		self.exists = False
+
+	def status(self):
+		if not self.exists:
+			return NOT_COLLECTED
+		return COLLECTED if self.complete else PARTIALLY_COLLECTED
+
+	def isDone(self, workUnit: tuple[str, str, str]):
+		return tuple(workUnit) in self.completed
+
+	def markDone(self, workUnit: tuple[str, str, str]):
+		self.completed.add(tuple(workUnit))
+		self.exists = True
+		self.save()
+
+	def markRunComplete(self):
+		self.complete = True
+		self.exists = True
+		self.save()
+
+	def toDict(self):
+		return {
+			"runDate": self.runDate,
+			"scope": self.scope,
+			"completed": [list(unit) for unit in sorted(self.completed)],
+			"complete": self.complete
+		}
+
+	@abstractmethod
+	def read(self):
+		"""The stored state, or None when nothing was saved yet."""
+
+	@abstractmethod
+	def save(self):
+		"""Store toDict(), replacing the previous state."""
+
+class FileCheckpoint(Checkpoint):
+	def __init__(self, filename: str, scope=("", "", "")):
+		super().__init__(scope)
+		self.filename = filename
+
+	@staticmethod
+	def forCsv(csvFilename: str, scope=("", "", "")):
+		return FileCheckpoint(csvFilename + ".checkpoint.json", scope)
+
+	def read(self):
+		if not os.path.isfile(self.filename):
+			return None
+		with open(self.filename, "r") as file:
+			return json.load(file)
+
+	def save(self):
+		# Write to a temporary file first so a crash never leaves a truncated checkpoint
+		temporaryFilename = self.filename + ".tmp"
+		with open(temporaryFilename, "w") as file:
+			json.dump(self.toDict(), file)
+		os.replace(temporaryFilename, self.filename)
+
+class MongoCheckpoint(Checkpoint):
+	def __init__(self, client: MongoClient, scope=("", "", "")):
+		super().__init__(scope)
+		self.collection = client["courses"]["scrapeCheckpoints"]
+
+	def read(self):
+		return self.collection.find_one({"_id": self.runDate}, {"_id": 0})
+
+	def save(self):
+		self.collection.replace_one({"_id": self.runDate}, self.toDict(), upsert=True)
+
+class LastRun(ABC):
+	"""
+	Sidecar manifest with the retrieval time of the newest saved sections, so
+	course.wasDataCollectedToday does not have to read courses.csv or sort
+	sectionsTS to find it. Only ever moves forward in time.
+
+	Example of the stored state:
+	{
+		'dateTimeRetrieved': '2025-02-28T23:05:07',
+		'sectionsWritten': 1523
+	}
+	"""
+	def lastDateTime(self):
+		state = self.read()
+		if state is None:
+			return None
+		return datetime.datetime.fromisoformat(state["dateTimeRetrieved"])
+
+	@abstractmethod
+	def record(self, dateTimeRetrieved: datetime.datetime, sectionsWritten=0):
+		"""Store dateTimeRetrieved unless the stored one is newer."""
+
+	@abstractmethod
+	def read(self):
+		"""The stored state, or None when nothing was recorded yet."""
+
+class FileLastRun(LastRun):
+	def __init__(self, filename: str):
+		self.filename = filename
+
+	@staticmethod
+	def forCsv(csvFilename: str):
+		return FileLastRun(csvFilename + ".lastrun.json")
+
+	def read(self):
+		if not os.path.isfile(self.filename):
+			return None
+		with open(self.filename, "r") as file:
+			return json.load(file)
+
+	def record(self, dateTimeRetrieved: datetime.datetime, sectionsWritten=0):
+		lastDateTime = self.lastDateTime()
+		if lastDateTime is not None and lastDateTime > dateTimeRetrieved:
+			return
+		temporaryFilename = self.filename + ".tmp"
+		with open(temporaryFilename, "w") as file:
+			json.dump({"dateTimeRetrieved": dateTimeRetrieved.isoformat(), "sectionsWritten": sectionsWritten}, file)
+		os.replace(temporaryFilename, self.filename)
+
+class MongoLastRun(LastRun):
+	def __init__(self, client: MongoClient):
+		self.collection = client["courses"]["scrapeRuns"]
+
+	def read(self):
+		state = self.collection.find_one({"_id": "lastRun"}, {"_id": 0})
+		if state is None:
+			return None
+		state["dateTimeRetrieved"] = state["dateTimeRetrieved"].isoformat()
+		return state
+
+	def record(self, dateTimeRetrieved: datetime.datetime, sectionsWritten=0):
+		# $max keeps the newest time even when several writers record at once
+		self.collection.update_one(
+			{"_id": "lastRun"},
+			{"$max": {"dateTimeRetrieved": dateTimeRetrieved}, "$set": {"sectionsWritten": sectionsWritten}},
+			upsert=True
+		)
@@ -1,25 +1,105 @@
 import datetime
 from functools import cache
+from operator import attrgetter
 import csv
+import io
 import os
 from pymongo import MongoClient, ReplaceOne
+from ingest import BulkIngester
+from rollups import EnrollmentRollups
+from catalog import CourseCatalog
+from sectionState import SectionStateCache, DYNAMIC_FIELDS, sectionKey, staticHash
+from parsing import mapDays, DAYS_MAPPING
+from checkpoint import FileCheckpoint, MongoCheckpoint, FileLastRun, MongoLastRun, NOT_COLLECTED, PARTIALLY_COLLECTED, COLLECTED
+
+# Fixed schema of a course record, every one of them always has these fields
+RECORD_FIELDS = (
+		"name", "subjectName", "subjectCode", "catalogNumber", "academicCareer", "semester", "year",
+		"sectionType", "sectionCode", "classNumber", "session", "days", "timeStart", "timeEnd", "classroom",
+		"instructor", "startDate", "endDate", "status", "seatsAvailable", "capacity", "waitlistAvailable",
+		"waitlistCapacity", "multipleMeetings", "dateTimeRetrieved"
+)
+# Fields only some sections have, None when a section does not have them
+OPTIONAL_FIELDS = ("reservedSeatsAvailable", "reservedSeatsCapacity", "topic")
+# Header of courses.csv, the same one csvToMongodb reads
+CSV_FIELDS = (
+		"name", "subject", "catalogNumber", "academicCareer", "semester", "year", "sectionType", "sectionCode",
+		"classNumber", "session", "days", "timeStart", "timeEnd", "classroom", "instructor", "startDate", "endDate",
+		"status", "seatsAvailable", "capacity", "waitlistAvailable", "waitlistCapacity", "reservedSeatsAvailable",
+		"reservedSeatsCapacity", "multipleMeetings", "topic", "dateTimeRetrieved", "notes"
+)
+# Fields that hold one value per meeting when a section has multiple meetings
+MEETING_FIELDS = ("days", "timeStart", "timeEnd", "classroom", "instructor", "startDate", "endDate", "topic")
+# Fields of the sections collection, the time series fields go to sectionsTS
+BSON_FIELDS = tuple(field for field in RECORD_FIELDS if field not in DYNAMIC_FIELDS)
+# Defaults shared by every record, the parsers replace them instead of changing them in place
+NULL_DATETIME = datetime.datetime(1900, 1, 1)
+NO_VALUES = ()
+
+getRecordFields = attrgetter(*RECORD_FIELDS)
+getBsonFields = attrgetter(*BSON_FIELDS)
+
+# Only a few hundred distinct times and dates show up in a crawl, so each one is only formatted once
+@cache
+def formatTime(value: datetime.datetime):
+		return value.strftime("%I:%M %p")
+
+@cache
+def formatDate(value: datetime.datetime):
+		return value.strftime("%m/%d/%Y")
+
+def readLastCsvRow(filename: str, blockSize=4096):
+		"""
+		Read only the header and the last record of a csv file by seeking backwards
+		from its end, as a dict like csv.DictReader would give. None if the file has no records.
+		"""
+		if not os.path.isfile(filename):
+				return None
+		with open(filename, 'rb') as input_file:
+				header = next(csv.reader([input_file.readline().decode()]), None)
+				headerEnd = input_file.tell()
+				fileSize = input_file.seek(0, os.SEEK_END)
+				if header is None or fileSize == headerEnd:
+						return None
+				while True:
+						start = max(headerEnd, fileSize - blockSize)
+						input_file.seek(start)
+						lines = input_file.read(fileSize - start).decode(errors='replace').splitlines(keepends=True)
+						while lines and not lines[-1].strip():
+								lines.pop()
+						# Walk back until the quotes balance, a quoted field with a newline in it spans several lines
+						record = ""
+						for i in range(len(lines) - 1, -1, -1):
+								record = lines[i] + record
+								if record.count('"') % 2 == 0:
+										# The first line of the block may be cut off, only trust it if the block reaches the header
+										if i > 0 or start == headerEnd:
+												lastRow = next(csv.reader(io.StringIO(record)))
+												if len(lastRow) == len(header):
+														return dict(zip(header, lastRow))
+										break
+						if start == headerEnd:
+								break
+						blockSize *= 2
+				# Fall back to parsing the whole file
+				input_file.seek(headerEnd)
+				# Blank lines are read as empty rows
+				rows = [row for row in csv.reader(io.StringIO(input_file.read().decode(errors='replace'))) if row]
+				return dict(zip(header, rows[-1])) if rows else None
 
 class course:
 		#semesters = ["Spring", "Summer", "Fall", "Non-credit Term"]
 		#sessions = ["Regular Academic", "Summer Session A 5W", "Summer Scholars Program"]
-		status = ["Open", "Closed", "Waitlist"]
-		days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday", "TBA"]
-		days_mapping = {
-				"Mo" : "Monday",
-				"Tu" : "Tuesday",
-				"We" : "Wednesday",
-				"Th" : "Thursday",
-				"Fr" : "Friday",
-				"Sa" : "Saturday",
-				"Su" : "Sunday",
-		}
-
-		def __init__(self):
+		allStatuses = ["Open", "Closed", "Waitlist"]
+		allDays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday", "TBA"]
+		days_mapping = DAYS_MAPPING
+		__slots__ = RECORD_FIELDS + OPTIONAL_FIELDS
+
+		def __init__(self, dateTimeRetrieved: datetime.datetime = None):
+				"""
+				dateTimeRetrieved is shared by every section of a run, pass
+				course.currentDateTime() once instead of looking up the time for every section.
+				"""
 				self.name = "NULL"
 				self.subjectName = "NULL"
 				self.subjectCode = "NULL"
@@ -31,32 +111,36 @@ class course:
 				self.sectionCode = "NULL"
 				self.classNumber = 0
 				self.session = "NULL"
-				self.days = []
-				self.timeStart = datetime.datetime(1900, 1, 1)
-				self.timeEnd = datetime.datetime(1900, 1, 1)
+				self.days = NO_VALUES
+				self.timeStart = NULL_DATETIME
+				self.timeEnd = NULL_DATETIME
 				self.classroom = "NULL"
-				self.instructor = []
-				self.startDate = datetime.datetime(1900, 1, 1)
-				self.endDate = datetime.datetime(1900, 1, 1)
+				self.instructor = NO_VALUES
+				self.startDate = NULL_DATETIME
+				self.endDate = NULL_DATETIME
 				self.status = "NULL"
 				self.seatsAvailable = 0
 				self.capacity = 0
 				self.waitlistAvailable = 300
 				self.waitlistCapacity = 300
 				self.multipleMeetings = False
-				# Make sure that the datetime is in EST but is timezone naive
-				EST = datetime.timezone(datetime.timedelta(hours=-5))
-				self.dateTimeRetrieved = datetime.datetime.now(EST).replace(tzinfo=None)
-				# self.reservedSeatsAvailable = 0
-				# self.reservedSeatsCapacity = 0
-				# self.topic = "NULL"
+				self.dateTimeRetrieved = dateTimeRetrieved if dateTimeRetrieved is not None else course.currentDateTime()
+				self.reservedSeatsAvailable = None
+				self.reservedSeatsCapacity = None
+				self.topic = None
 				# self.notes = "NULL"
 				# self.decription = ""
 				# self.prerequisites = ""
 				# self.units = ""
 
 		def __repr__(self):
-				return str(self.__dict__)
+				return str(self.to_dict())
+
+		@staticmethod
+		def currentDateTime():
+				# Make sure that the datetime is in EST but is timezone naive
+				EST = datetime.timezone(datetime.timedelta(hours=-5))
+				return datetime.datetime.now(EST).replace(tzinfo=None)
 		
 		def addTopic(self, topic):
 				self.topic = topic
@@ -64,32 +148,94 @@ class course:
 		def addReservedSeats(self, reservedSeatsAvailable: int, reservedSeatsCapacity: int):
 				self.reservedSeatsAvailable = reservedSeatsAvailable
 				self.reservedSeatsCapacity = reservedSeatsCapacity
+
+		def to_dict(self):
+				"""Every field of the section, optional fields only if the section has them."""
+				return self.addOptionalFields(dict(zip(RECORD_FIELDS, getRecordFields(self))))
+
+		def to_bson(self):
+				"""Document stored in the sections collection, the time series fields go to sectionsTS."""
+				return self.addOptionalFields(dict(zip(BSON_FIELDS, getBsonFields(self))))
+
+		def addOptionalFields(self, record: dict):
+				if self.reservedSeatsAvailable is not None:
+						record["reservedSeatsAvailable"] = self.reservedSeatsAvailable
+				if self.reservedSeatsCapacity is not None:
+						record["reservedSeatsCapacity"] = self.reservedSeatsCapacity
+				if self.topic is not None:
+						record["topic"] = self.topic
+				return record
+
+		def meetingCount(self):
+				return len(self.startDate) if self.multipleMeetings else 1
+
+		def to_row(self, meeting=0):
+				"""
+				One csv row in the order of CSV_FIELDS. A section with multiple meetings
+				has one row per meeting, see meetingCount.
+				"""
+				def meetingValue(value):
+						if not self.multipleMeetings or not isinstance(value, list):
+								return value
+						return value[meeting] if meeting < len(value) else None
+
+				days = meetingValue(self.days)
+				timeStart = meetingValue(self.timeStart)
+				timeEnd = meetingValue(self.timeEnd)
+				classroom = meetingValue(self.classroom)
+				instructor = meetingValue(self.instructor)
+				startDate = meetingValue(self.startDate)
+				endDate = meetingValue(self.endDate)
+				topic = meetingValue(self.topic)
+				return [
+						self.name,
+						str((self.subjectName, self.subjectCode)),
+						self.catalogNumber,
+						self.academicCareer,
+						self.semester,
+						self.year,
+						self.sectionType,
+						self.sectionCode,
+						self.classNumber,
+						self.session,
+						" ".join(days),
+						formatTime(timeStart) if timeStart is not None else "NULL",
+						formatTime(timeEnd) if timeEnd is not None else "NULL",
+						classroom if classroom is not None else "NULL",
+						", ".join(instructor) if instructor else "NULL",
+						formatDate(startDate) if startDate is not None else "NULL",
+						formatDate(endDate) if endDate is not None else "NULL",
+						self.status,
+						self.seatsAvailable,
+						self.capacity,
+						self.waitlistAvailable,
+						self.waitlistCapacity,
+						self.reservedSeatsAvailable if self.reservedSeatsAvailable is not None else 0,
+						self.reservedSeatsCapacity if self.reservedSeatsCapacity is not None else 0,
+						self.multipleMeetings,
+						topic if topic else "NULL",
+						self.dateTimeRetrieved.strftime("%Y-%m-%d %H:%M:%S"),
+						"NULL"
+				]
 		
 		# Method to map abbreviated days to full days
 		# Example: "MoWeFr" -> ["Monday", "Wednesday", "Friday"]
-		# Memoization is used to speed up the process
+		# Memoized in parsing.mapDays, every call gets its own list
 		@staticmethod
-		@cache
 		def mapDaysAbrvToFull(days: str):
-				if days == "TBA":
-						return ["TBA"]
-				daysList = []
-				for i in range(0, len(days), 2):
-						daysList.append(course.days_mapping[days[i:i+2]])
-				return daysList
+				return list(mapDays(days))
 
 		@staticmethod
 		def saveCoursesToCsv(courses, filename="courses.csv"):
-				keys = list(course().__dict__.keys())
 				file_exists = os.path.isfile(filename)
 				
 				with open(filename, 'a', newline='') as output_file:
-						dict_writer = csv.DictWriter(output_file, fieldnames=keys)
+						writer = csv.writer(output_file)
 						if not file_exists:
-								dict_writer.writeheader()
+								writer.writerow(CSV_FIELDS)
 						for courseSection in courses:
 								try:
-										dict_writer.writerow(courseSection.course_to_dict())
+										writer.writerows([courseSection.to_row(meeting) for meeting in range(courseSection.meetingCount())])
 								except Exception as e:
 										print(type(e).__name__, e)
 										print(courseSection)
@@ -107,11 +253,11 @@ class course:
 					"seatsAvailable": self.seatsAvailable,
 					"wailistAvailable": self.waitlistAvailable
 				}
-				del self.status
-				del self.seatsAvailable
-				del self.waitlistAvailable
 				return tsEntry
 		
+		def createRollupPoint(self):
+				return (sectionKey(self.semester, self.year, self.classNumber), self.capacity, self.seatsAvailable, self.dateTimeRetrieved)
+
 		def createCourseReplacement(self):
 				return ReplaceOne(
 					{
@@ -119,44 +265,119 @@ class course:
 						"year": self.year,
 						"classNumber": self.classNumber
 					},
-					self.__dict__,
+					self.to_bson(),
 					upsert=True
 				)
 
 		@staticmethod
-		def saveCoursesToMongodb(client: MongoClient, courses: list):
-				db = client["courses"]
+		def saveCoursesToMongodb(client: MongoClient, courses: list, stateCache: SectionStateCache = None, ingester: BulkIngester = None, changeFeed=None, databaseName="courses"):
+				if ingester is None:
+						with BulkIngester(client) as ingester:
+								course.saveCoursesToMongodb(client, courses, stateCache, ingester, changeFeed, databaseName)
+						return
+				if changeFeed is not None:
+						# Diffed before the writes replace the previous snapshot
+						changes, changedStates = changeFeed.diff(courses)
+				EnrollmentRollups(client, databaseName).update([courseSection.createRollupPoint() for courseSection in courses], ingester)
+				CourseCatalog(client, databaseName).update([courseSection.to_dict() for courseSection in courses], ingester)
+				if stateCache is not None:
+						course.saveCourseChangesToMongodb(client, courses, stateCache, ingester, databaseName)
+				else:
+						db = client[databaseName]
+						sections = db['sections']
+						sectionsTS = db['sectionsTS']
+						keys = [sectionKey(courseSection.semester, courseSection.year, courseSection.classNumber) for courseSection in courses]
+						ingester.insertMany(sectionsTS, [courseSection.createTimeSeriesEntry() for courseSection in courses])
+						ingester.bulkWriteByKey(sections, [courseSection.createCourseReplacement() for courseSection in courses], keys)
+						# Wait for the writes so a saved batch can be checkpointed right after
+						ingester.flush()
+				if changeFeed is not None:
+						changeFeed.commit(changes, changedStates, ingester)
+
+		# Delta mode of saveCoursesToMongodb
+		# A time series entry is only written when status, seatsAvailable or waitlistAvailable changed
+		# and a section is only replaced when one of its static fields changed
+		# Use sectionState.reconstructDailySeries to get a dense daily series back
+		@staticmethod
+		def saveCourseChangesToMongodb(client: MongoClient, courses: list, stateCache: SectionStateCache, ingester: BulkIngester, databaseName="courses"):
+				db = client[databaseName]
 				sections = db['sections']
 				sectionsTS = db['sectionsTS']
-				sectionsTS.insert_many([courseSection.createTimeSeriesEntry() for courseSection in courses])
-				sections.bulk_write([courseSection.createCourseReplacement() for courseSection in courses])
+				stateCache.prefetch([sectionKey(c.semester, c.year, c.classNumber) for c in courses])
+				timeSeriesEntries = []
+				replacements = []
+				replacementKeys = []
+				changedStates = []
+				for courseSection in courses:
+						previousState = stateCache.get(sectionKey(courseSection.semester, courseSection.year, courseSection.classNumber))
+						state = {
+							"semester": courseSection.semester,
+							"year": courseSection.year,
+							"classNumber": courseSection.classNumber,
+							"academicCareer": courseSection.academicCareer, # finds the removed sections of a subject, see changeFeed
+							"subjectName": courseSection.subjectName,
+							"status": courseSection.status,
+							"seatsAvailable": courseSection.seatsAvailable,
+							"waitlistAvailable": courseSection.waitlistAvailable
+						}
+						timeSeriesEntry = courseSection.createTimeSeriesEntry()
+						state["staticHash"] = staticHash(courseSection.to_bson())
+						dynamicChanged = previousState is None or any(previousState.get(field) != state[field] for field in DYNAMIC_FIELDS)
+						staticChanged = previousState is None or previousState.get("staticHash") != state["staticHash"]
+						if dynamicChanged:
+								timeSeriesEntries.append(timeSeriesEntry)
+						if staticChanged:
+								replacements.append(courseSection.createCourseReplacement())
+								replacementKeys.append(sectionKey(courseSection.semester, courseSection.year, courseSection.classNumber))
+						if dynamicChanged or staticChanged:
+								changedStates.append(state)
+				ingester.insertMany(sectionsTS, timeSeriesEntries)
+				ingester.bulkWriteByKey(sections, replacements, replacementKeys)
+				ingester.flush()
+				# Only remember the new state once it is written
+				stateCache.save(changedStates)
 												
 		@staticmethod
 		def wasDataCollectedToday(filename = None, client: MongoClient = None):
+				"""
+				Report whether today's data is already collected: checkpoint.COLLECTED,
+				checkpoint.PARTIALLY_COLLECTED (an interrupted run that can be resumed)
+				or checkpoint.NOT_COLLECTED.
+				"""
+				if client is None and filename is None:
+						raise ValueError("Either filename or client must be provided.")
+				runCheckpoint = MongoCheckpoint(client) if client is not None else FileCheckpoint.forCsv(filename)
+				state = runCheckpoint.read()
+				if state is not None and state["runDate"] == runCheckpoint.runDate:
+						return COLLECTED if state["complete"] else PARTIALLY_COLLECTED
+				today = datetime.date.fromisoformat(runCheckpoint.runDate)
+				lastRun = MongoLastRun(client) if client is not None else FileLastRun.forCsv(filename)
+				lastDateTime = lastRun.lastDateTime()
+				if lastDateTime is None:
+						lastDateTime = course.findLastDateTimeRetrieved(filename, client)
+						if lastDateTime is not None and lastDateTime.date() == today:
+								# Sinks record the manifest once a subject is checkpointed, data of today
+								# without one is from a run that stopped before its first checkpoint
+								return NOT_COLLECTED
+						if lastDateTime is not None:
+								# Saved data from before the manifest existed, only look it up once
+								lastRun.record(lastDateTime)
+				# Runs without a checkpoint are complete if their data is from today
+				if lastDateTime is not None and lastDateTime.date() == today:
+						return COLLECTED
+				return NOT_COLLECTED
+
+		@staticmethod
+		def findLastDateTimeRetrieved(filename = None, client: MongoClient = None):
+				"""Newest dateTimeRetrieved in the saved data itself, or None if nothing was saved yet."""
 				if client is not None:
-						db = client["courses"]
-						sectionsTS = db['sectionsTS']
-						today_entry = sectionsTS.find_one(
+						lastEntry = client["courses"]["sectionsTS"].find_one(
 							{},
 							{'dateTimeRetrieved': 1, '_id': 0},
 							sort=[('dateTimeRetrieved', -1)]
 						)
-						if today_entry:
-							dateTimeRetrieved = today_entry["dateTimeRetrieved"]
-							EST = datetime.timezone(datetime.timedelta(hours=-5))
-							today = datetime.datetime.now(EST).date()
-							if dateTimeRetrieved.date() == today:
-								return True
-						return False
-				if filename is not None:
-					if not os.path.isfile(filename):
-							raise FileNotFoundError(f"File {filename} not found.")
-					with open(filename, 'r') as input_file:
-							reader = csv.DictReader(input_file)
-							last_row = list(reader)[-1] if reader else None
-							if last_row:
-									dateTimeRetrieved = datetime.datetime.strptime(last_row["dateTimeRetrieved"], "%Y-%m-%d %H:%M:%S")
-									if dateTimeRetrieved.date() == datetime.date.today():
-											return True
-					return False
-				raise ValueError("Either filename or client must be provided.")
\ No newline at end of file
+						return lastEntry["dateTimeRetrieved"] if lastEntry else None
+				lastRow = readLastCsvRow(filename)
+				if lastRow is None:
+						return None
+				return datetime.datetime.strptime(lastRow["dateTimeRetrieved"], "%Y-%m-%d %H:%M:%S")
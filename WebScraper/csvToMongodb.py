@@ -1,164 +1,227 @@
 import datetime
 import os
 import csv
+import time
+from functools import cache
+from itertools import islice
 from dotenv import load_dotenv
-from pymongo import MongoClient, ReplaceOne
+from pymongo import MongoClient
+from checkpoint import MongoLastRun
+from schema import ensureSchema
+from catalog import CourseCatalog
+from parsing import parseTime, parseFullDate, parseDateTime
+from ingest import BulkIngester, createClient, DEFAULT_BATCH_SIZE, DEFAULT_WORKERS
 from wakepy import keep
 
-# Load the environment variables
-load_dotenv()
-MONGO_URI = os.environ['MONGO_URI'] + "&socketTimeoutMS=60000&connectTimeoutMS=30000"
-
-# Read the csv file
-def read_csv(filename):
-	with open(filename, 'r') as file:
-		reader = csv.DictReader(file)
-		return list(reader)
-with keep.presenting():
-	csvCourses = read_csv("WebScraper/courses.csv")
+CSV_FILENAME = "WebScraper/courses.csv"
+CHUNK_SIZE = 30000 # rows converted and written at a time
+
+# This range captures data for Spring, Summer, and Fall 2024
+STARTING_IDX_FALL_2024 = 54788
+ENDING_IDX_SPRING_2024 = 70719
+
+# This range captures the latest data for Spring 2025
+LATEST_IDX_SPRING_2025 = 802899
+
+"""
+Example of a course:
+{
+	'name': 'Principles of Financial Accounting',
+	'subject': "('Accounting Bus Admin', 'ACC')",
+	'catalogNumber': '211',
+	'academicCareer': 'Undergraduate',
+	'semester': 'Spring',
+	'year': '2025',
+	'sectionType': 'Lecture',
+	'sectionCode': '1U',
+	'classNumber': '8429',
+	'session': 'Regular Academic',
+	'days': 'Monday Wednesday Friday ',
+	'timeStart': '06:35 PM',
+	'timeEnd': '09:20 PM',
+	'classroom': 'Whitten LC 182',
+	'instructor': 'William Green, Kim Grinfeder, Denis Hector',
+	'startDate': '01/13/2025',
+	'endDate': '04/28/2025',
+	'status': 'Open',
+	'seatsAvailable': '45',
+	'capacity': '45',
+	'waitlistAvailable': '300',
+	'waitlistCapacity': '300',
+	'reservedSeatsAvailable': '0',
+	'reservedSeatsCapacity': '0',
+	'multipleMeetings': 'False',
+	'topic': 'NULL',
+	'dateTimeRetrieved': '2024-11-04 00:14:53',
+	'notes': 'NULL'
+}
+"""
+
+# The same few hundred times, dates and subjects repeat across the whole file,
+# so every distinct string is only parsed once (the times and dates by the parsing module)
+@cache
+def splitSubject(subject: str):
+	subjectName = subject.split(",")[0].replace("(", "").replace("'", "").strip()
+	subjectCode = subject.split(",")[1].replace(")", "").replace("'", "").strip()
+	return (subjectName, subjectCode)
+
+@cache
+def splitDays(days: str):
+	return tuple(days.split())
+
+@cache
+def splitInstructor(instructor: str):
+	instructors = tuple(instructor.split(", "))
+	return () if instructors[0] == 'NULL' else instructors
+
+# A meeting without a time or dates ("-" on the class card) is written as NULL
+@cache
+def parseOptionalTime(time: str):
+	return None if time == 'NULL' else parseTime(time)
+
+@cache
+def parseOptionalDate(date: str):
+	return None if date == 'NULL' else parseFullDate(date)
+
+def inferSemester(startDate: datetime.datetime):
+	# Semesters in csv are Spring 2024, Summer 2024, Fall 2024, Spring 2025
+	if startDate < datetime.datetime(2024, 5, 13):
+		return ('Spring', 2024)
+	elif startDate < datetime.datetime(2024, 8, 19):
+		return ('Summer', 2024)
+	elif startDate < datetime.datetime(2025, 1, 13):
+		return ('Fall', 2024)
+	return ('Spring', 2025)
+
+def readChunks(filename: str, chunkSize=CHUNK_SIZE, startRow=0, endRow=None):
 	"""
-	Example of a course:
-	{
-		'name': 'Principles of Financial Accounting', 
-		'subject': "('Accounting Bus Admin', 'ACC')", 
-		'catalogNumber': '211', 
-		'academicCareer': 'Undergraduate', 
-		'semester': 'Spring', 
-		'year': '2025', 
-		'sectionType': 'Lecture', 
-		'sectionCode': '1U', 
-		'classNumber': '8429', 
-		'session': 'Regular Academic', 
-		'days': 'Monday Wednesday Friday ', 
-		'timeStart': '06:35 PM', 
-		'timeEnd': '09:20 PM', 
-		'classroom': 'Whitten LC 182', 
-		'instructor': 'William Green, Kim Grinfeder, Denis Hector', 
-		'startDate': '01/13/2025', 
-		'endDate': '04/28/2025', 
-		'status': 'Open', 
-		'seatsAvailable': '45', 
-		'capacity': '45', 
-		'waitlistAvailable': '300', 
-		'waitlistCapacity': '300', 
-		'reservedSeatsAvailable': '0', 
-		'reservedSeatsCapacity': '0', 
-		'multipleMeetings': 'False', 
-		'topic': 'NULL', 
-		'dateTimeRetrieved': '2024-11-04 00:14:53', 
-		'notes': 'NULL'
-	}
+	Yield (header, rows) chunks of about chunkSize raw csv rows.
+	A chunk never ends in the middle of the meetings of a multiple meetings section,
+	the remaining meetings are moved to the end of that chunk.
 	"""
-	# This range captures data for Spring, Summer, and Fall 2024
-	STARTING_IDX_FALL_2024 = 54788
-	ENDING_IDX_SPRING_2024 = 70719
+	with open(filename, 'r', newline='') as file:
+		reader = csv.reader(file)
+		header = next(reader)
+		classNumberIdx = header.index('classNumber')
+		multipleMeetingsIdx = header.index('multipleMeetings')
+		rows = islice(reader, startRow, endRow)
+		pending = None
+		while True:
+			chunk = list(islice(rows, chunkSize))
+			if pending is not None:
+				chunk.insert(0, pending)
+				pending = None
+			if len(chunk) == 0:
+				return
+			lastRow = chunk[-1]
+			if lastRow[multipleMeetingsIdx] == 'True':
+				for row in rows:
+					if row[classNumberIdx] != lastRow[classNumberIdx]:
+						pending = row
+						break
+					chunk.append(row)
+			yield header, chunk
 
-	# This range captures the latest data for Spring 2025
-	LATEST_IDX_SPRING_2025 = 802899
-	ENDING_IDX_SPRING_2025 = len(csvCourses)
+def convertChunk(header: list, rows: list):
+	"""
+	Convert one chunk of raw csv rows into section documents and time series documents.
+	Every column is converted in one pass with the cached parsers before the
+	documents are assembled row by row.
+	"""
+	columns = dict(zip(header, zip(*rows)))
+	rowCount = len(rows)
+	subjects = list(map(splitSubject, columns['subject']))
+	years = list(map(int, columns['year']))
+	classNumbers = list(map(int, columns['classNumber']))
+	seatsAvailable = list(map(int, columns['seatsAvailable']))
+	capacities = list(map(int, columns['capacity']))
+	waitlistAvailable = list(map(int, columns['waitlistAvailable']))
+	waitlistCapacities = list(map(int, columns['waitlistCapacity']))
+	reservedSeatsAvailable = list(map(int, columns['reservedSeatsAvailable']))
+	reservedSeatsCapacities = list(map(int, columns['reservedSeatsCapacity']))
+	days = list(map(splitDays, columns['days']))
+	instructors = list(map(splitInstructor, columns['instructor']))
+	timeStarts = list(map(parseOptionalTime, columns['timeStart']))
+	timeEnds = list(map(parseOptionalTime, columns['timeEnd']))
+	startDates = list(map(parseOptionalDate, columns['startDate']))
+	endDates = list(map(parseOptionalDate, columns['endDate']))
+	dateTimesRetrieved = list(map(parseDateTime, columns['dateTimeRetrieved']))
+	classrooms = [None if classroom == 'NULL' else classroom for classroom in columns['classroom']]
+	topics = [None if topic == 'NULL' else topic for topic in columns['topic']]
+	multipleMeetings = [value == 'True' for value in columns['multipleMeetings']]
 
-	# Convert the csv courses to the format that will be inserted into the database
 	courses = []
 	coursesTS = []
-	prevClassNum = 0
 	idx = 0
-	while idx < len(csvCourses):
-		course = csvCourses[idx]
-		course.pop('notes')
-		course['subjectName'] = course['subject'].split(",")[0].replace("(", "").replace("'", "").strip()
-		course['subjectCode'] = course['subject'].split(",")[1].replace(")", "").replace("'", "").strip()
-		course.pop('subject')
-		course['year'] = int(course['year'])
-		course['classNumber'] = int(course['classNumber'])
-		course['seatsAvailable'] = int(course['seatsAvailable'])
-		course['capacity'] = int(course['capacity'])
-		course['waitlistAvailable'] = int(course['waitlistAvailable'])
-		course['waitlistCapacity'] = int(course['waitlistCapacity'])
-		course['reservedSeatsAvailable'] = int(course['reservedSeatsAvailable'])
-		course['reservedSeatsCapacity'] = int(course['reservedSeatsCapacity'])
-		course['days'] = course['days'].split()
-		course['instructor'] = course['instructor'].split(", ")
-
-		if course['instructor'][0] == 'NULL':
-			course['instructor'] = []
-		if course['classroom'] == 'NULL':
-			course['classroom'] = None
-		if course['reservedSeatsCapacity'] == 0:
-			course.pop('reservedSeatsAvailable')
-			course.pop('reservedSeatsCapacity')
-		if course['topic'] == 'NULL':
-			course.pop('topic')
-
-		course['timeStart'] = datetime.datetime.strptime(course['timeStart'], "%I:%M %p")
-		course['timeEnd'] = datetime.datetime.strptime(course['timeEnd'], "%I:%M %p")
-		course['startDate'] = datetime.datetime.strptime(course['startDate'], "%m/%d/%Y")
-		course['endDate'] = datetime.datetime.strptime(course['endDate'], "%m/%d/%Y")
-		course['dateTimeRetrieved'] = datetime.datetime.strptime(course['dateTimeRetrieved'], "%Y-%m-%d %H:%M:%S")
-
-		if course['semester'] == 'NULL':
-			# Semesters in csv are Spring 2024, Summer 2024, Fall 2024, Spring 2025
-			if course['startDate'] < datetime.datetime(2024, 5, 13):
-				course['semester'] = 'Spring'
-				course['year'] = 2024
-			elif course['startDate'] < datetime.datetime(2024, 8, 19):
-				course['semester'] = 'Summer'
-				course['year'] = 2024
-			elif course['startDate'] < datetime.datetime(2025, 1, 13):
-				course['semester'] = 'Fall'
-				course['year'] = 2024
-			else:
-				course['semester'] = 'Spring'
-				course['year'] = 2025
+	while idx < rowCount:
+		semester = columns['semester'][idx]
+		year = years[idx]
+		if semester == 'NULL':
+			semester, year = inferSemester(startDates[idx])
+		course = {
+			'name': columns['name'][idx],
+			'catalogNumber': columns['catalogNumber'][idx],
+			'academicCareer': columns['academicCareer'][idx],
+			'semester': semester,
+			'year': year,
+			'sectionType': columns['sectionType'][idx],
+			'sectionCode': columns['sectionCode'][idx],
+			'classNumber': classNumbers[idx],
+			'session': columns['session'][idx],
+			'days': list(days[idx]),
+			'timeStart': timeStarts[idx],
+			'timeEnd': timeEnds[idx],
+			'classroom': classrooms[idx],
+			'instructor': list(instructors[idx]),
+			'startDate': startDates[idx],
+			'endDate': endDates[idx],
+			'capacity': capacities[idx],
+			'waitlistCapacity': waitlistCapacities[idx],
+			'multipleMeetings': multipleMeetings[idx],
+			'dateTimeRetrieved': dateTimesRetrieved[idx],
+			'subjectName': subjects[idx][0],
+			'subjectCode': subjects[idx][1]
+		}
+		if reservedSeatsCapacities[idx] != 0:
+			course['reservedSeatsAvailable'] = reservedSeatsAvailable[idx]
+			course['reservedSeatsCapacity'] = reservedSeatsCapacities[idx]
+		if topics[idx] is not None:
+			course['topic'] = topics[idx]
 
 		courseTS = {
-			"dateTimeRetrieved": course['dateTimeRetrieved'],
+			"dateTimeRetrieved": dateTimesRetrieved[idx],
 			"courseInfo": {
-				"semester": course['semester'],
-				"year": course['year'],
-				"classNumber": course['classNumber']
+				"semester": semester,
+				"year": year,
+				"classNumber": classNumbers[idx]
 			},
-			"status": course['status'],
-			"seatsAvailable": course['seatsAvailable'],
-			"waitlistAvailable": course['waitlistAvailable']
+			"status": columns['status'][idx],
+			"seatsAvailable": seatsAvailable[idx],
+			"waitlistAvailable": waitlistAvailable[idx]
 		}
 		if 'reservedSeatsAvailable' in course:
 			courseTS['reservedSeatsAvailable'] = course['reservedSeatsAvailable']
 		coursesTS.append(courseTS)
-		course.pop('status')
-		course.pop('seatsAvailable')
-		course.pop('waitlistAvailable')
-		prevClassNum = course['classNumber']
 
 		# Add multiple meetings
-		course['multipleMeetings'] = course['multipleMeetings'] == 'True'
 		if course['multipleMeetings']:
-			course['timeStart'] = [course['timeStart']]
-			course['timeEnd'] = [course['timeEnd']]
-			course['startDate'] = [course['startDate']]
-			course['endDate'] = [course['endDate']]
-			course['classroom'] = [course['classroom']]
-			course['days'] = [course['days']]
-			course['instructor'] = [course['instructor']]
+			for key in ('timeStart', 'timeEnd', 'startDate', 'endDate', 'classroom', 'days', 'instructor'):
+				course[key] = [course[key]]
 			if 'topic' in course:
 				course['topic'] = [course['topic']]
+			prevClassNum = classNumbers[idx]
 			idx += 1
-			while idx < len(csvCourses) and int(csvCourses[idx]['classNumber']) == prevClassNum:
-				meeting = csvCourses[idx]
-				course['days'].append(meeting['days'].split())
-				course['timeStart'].append(datetime.datetime.strptime(meeting['timeStart'], "%I:%M %p"))
-				course['timeEnd'].append(datetime.datetime.strptime(meeting['timeEnd'], "%I:%M %p"))
-				course['startDate'].append(datetime.datetime.strptime(meeting['startDate'], "%m/%d/%Y"))
-				course['endDate'].append(datetime.datetime.strptime(meeting['endDate'], "%m/%d/%Y"))
-				course['classroom'].append(meeting['classroom'])
-				if meeting['classroom'] == 'NULL':
-					course['classroom'][-1] = None
-				meeting['instructor'] = meeting['instructor'].split(", ")
-				if meeting['instructor'][0] == 'NULL':
-					meeting['instructor'] = []
-				course['instructor'].append(meeting['instructor'])
+			while idx < rowCount and classNumbers[idx] == prevClassNum:
+				course['days'].append(list(days[idx]))
+				course['timeStart'].append(timeStarts[idx])
+				course['timeEnd'].append(timeEnds[idx])
+				course['startDate'].append(startDates[idx])
+				course['endDate'].append(endDates[idx])
+				course['classroom'].append(classrooms[idx])
+				course['instructor'].append(list(instructors[idx]))
 				if 'topic' not in course:
 					course['topic'] = [None]
-				course['topic'].append(meeting['topic'] if meeting['topic'] != 'NULL' else None)
+				course['topic'].append(topics[idx])
 				idx += 1
 
 			if all(topic is None for topic in course['topic']):
@@ -167,41 +230,50 @@ with keep.presenting():
 
 		courses.append(course)
 		idx += 1
+	return courses, coursesTS
 
-
-	# Connect to the MongoDB database
-	client = MongoClient(MONGO_URI)
-
-	# Get the database and collections
+def importCsv(client: MongoClient, filename=CSV_FILENAME, chunkSize=CHUNK_SIZE, startRow=0, endRow=None, workers=DEFAULT_WORKERS, batchSize=DEFAULT_BATCH_SIZE):
+	"""
+	Stream the csv into the sections and sectionsTS collections chunk by chunk.
+	The next chunk is converted while the previous ones are being written by the
+	ingester, which only lets a few batches wait on the database so memory stays flat.
+	"""
+	ensureSchema(client)
 	db = client['courses']
 	sectionsTS = db['sectionsTS']
 	sections = db['sections']
+	courseCatalog = CourseCatalog(client)
+	rowsImported = 0
+	lastDateTime = None
+	startTime = time.time()
+	with BulkIngester(client, workers=workers, batchSize=batchSize) as ingester:
+		for header, rows in readChunks(filename, chunkSize, startRow, endRow):
+			courses, coursesTS = convertChunk(header, rows)
+			ingester.insertMany(sectionsTS, coursesTS)
+			# Replace the document if it exists, or insert if it doesn't
+			ingester.replaceMany(sections, courses)
+			courseCatalog.update(courses, ingester)
+			chunkLastDateTime = max(courseTS['dateTimeRetrieved'] for courseTS in coursesTS)
+			lastDateTime = chunkLastDateTime if lastDateTime is None else max(lastDateTime, chunkLastDateTime)
+			rowsImported += len(rows)
+			elapsed = time.time() - startTime
+			print(f"{rowsImported} rows converted ({rowsImported / elapsed:.0f} rows/sec)")
+	if lastDateTime is not None:
+		MongoLastRun(client).record(lastDateTime, rowsImported)
+	elapsed = time.time() - startTime
+	print(f"Imported {rowsImported} rows in {elapsed:.1f} seconds ({rowsImported / max(elapsed, 1e-9):.0f} rows/sec, "
+		f"{ingester.documentsPerSecond():.0f} documents/sec written, {ingester.batchesRetried} batches retried)")
+	return rowsImported
 
-	# Insert the coursesTS into the database in batches
-	batch_size = 30000
-	for i in range(0, len(coursesTS), batch_size):
-		sectionsTS.insert_many(coursesTS[i:i + batch_size])
-
-	# Create bulk operations for sections - replacing existing documents with the latest data
-	bulk_operations = []
-	for course in courses:
-		# Create a filter to identify unique sections
-		filter_doc = {
-			'classNumber': course['classNumber'],
-			'semester': course['semester'],
-			'year': course['year']
-		}
-		
-		# Replace the document if it exists, or insert if it doesn't
-		bulk_operations.append(
-			ReplaceOne(filter_doc, course, upsert=True)
-		)
-
-	# Execute the bulk operations in batches
-	for i in range(0, len(bulk_operations), batch_size):
-		sections.bulk_write(bulk_operations[i:i + batch_size])
-
-	print("Courses inserted/updated in the database")
+if __name__ == "__main__":
+	# Load the environment variables
+	load_dotenv()
+	MONGO_URI = os.environ['MONGO_URI']
+	with keep.presenting():
+		# Connect to the MongoDB database
+		client = createClient(MONGO_URI)
+		importCsv(client)
+		print("Courses inserted/updated in the database")
 
-	# Close the connection to the database
-	client.close()
\ No newline at end of file
+		# Close the connection to the database
+		client.close()
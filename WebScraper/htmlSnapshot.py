@@ -0,0 +1,148 @@
+from html.parser import HTMLParser
+
+# Class names used by the CaneLink class search results (same as the XPaths in webScraper.py)
+RESULTS_CONTAINER_CLASS = "cx-MuiGrid-root cx-MuiGrid-container cx-MuiGrid-spacing-xs-1 cx-MuiGrid-direction-xs-column"
+CLASS_CARD_CLASS = "cx-MuiGrid-root cx-MuiGrid-item cx-MuiGrid-grid-xs-12"
+SCREEN_READER_CLASS = "sr-only"
+# Same walk as parseClassListings, run in the browser so a results page is read with one
+# WebDriver round trip and only the strings cross the wire instead of the whole page source
+CLASS_LISTINGS_SCRIPT = """
+const [containerClass, cardClass, screenReaderClass] = arguments;
+const childDivs = (node, className) => Array.from(node.children).filter(
+	child => child.tagName === "DIV" && (className === undefined || child.className === className));
+const containerChildren = [];
+for (const container of document.getElementsByClassName(containerClass)) {
+	if (container.tagName === "DIV" && container.className === containerClass) {
+		containerChildren.push(...childDivs(container));
+	}
+}
+if (containerChildren.length < 3) {
+	return [];
+}
+const classListings = [];
+const classesDivs = childDivs(containerChildren[2]).flatMap(div => childDivs(div));
+classesDivs.forEach((classesDiv, classesDivIndex) => {
+	const classes = childDivs(classesDiv, cardClass);
+	// The first element is the header
+	for (let classIndex = 1; classIndex < classes.length; classIndex++) {
+		const h2 = classes[classIndex].querySelector("h2");
+		const className = h2 === null ? "" : h2.textContent.split(/\\s+/).filter(Boolean).join(" ");
+		const classInfo = Array.from(classes[classIndex].getElementsByTagName("span"))
+			.filter(span => span.className === screenReaderClass).map(span => span.textContent);
+		classListings.push({className: className, classInfo: classInfo.slice(1), position: [classesDivIndex, classIndex]});
+	}
+});
+return classListings;
+"""
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+class Node:
+	__slots__ = ("tag", "attrs", "children", "parent")
+
+	def __init__(self, tag: str, attrs: dict, parent=None):
+		self.tag = tag
+		self.attrs = attrs
+		self.children = []
+		self.parent = parent
+
+	def childElements(self, tag=None, className=None):
+		return [child for child in self.children
+						if isinstance(child, Node)
+						and (tag is None or child.tag == tag)
+						and (className is None or child.attrs.get("class") == className)]
+
+	def iterDescendants(self):
+		stack = list(reversed(self.children))
+		while stack:
+			node = stack.pop()
+			if isinstance(node, Node):
+				yield node
+				stack.extend(reversed(node.children))
+
+	def textContent(self):
+		parts = []
+		stack = [self]
+		while stack:
+			node = stack.pop()
+			if isinstance(node, Node):
+				stack.extend(reversed(node.children))
+			else:
+				parts.append(node)
+		return "".join(parts)
+
+class TreeBuilder(HTMLParser):
+	"""
+	Minimal DOM builder on top of html.parser. Only keeps what is needed to
+	reproduce the XPaths used by the scraper: tags, attributes and text.
+	"""
+	def __init__(self):
+		super().__init__(convert_charrefs=True)
+		self.root = Node("#document", {})
+		self.current = self.root
+
+	def handle_starttag(self, tag, attrs):
+		node = Node(tag, {name: value or "" for name, value in attrs}, self.current)
+		self.current.children.append(node)
+		if tag not in VOID_ELEMENTS:
+			self.current = node
+
+	def handle_startendtag(self, tag, attrs):
+		self.current.children.append(Node(tag, {name: value or "" for name, value in attrs}, self.current))
+
+	def handle_endtag(self, tag):
+		node = self.current
+		while node is not self.root and node.tag != tag:
+			node = node.parent
+		if node is not self.root:
+			self.current = node.parent
+
+	def handle_data(self, data):
+		self.current.children.append(data)
+
+def buildTree(html: str) -> Node:
+	builder = TreeBuilder()
+	builder.feed(html)
+	builder.close()
+	return builder.root
+
+def parseClassListings(html: str) -> list[tuple[str, list[str], tuple[int, int]]]:
+	"""
+	Parse the page source (or the results container's outerHTML) of one subject's
+	search results into the same strings getAllClasses reads through WebDriver.
+
+	Returns one (className, classInfo, position) tuple per class card, where
+	position is (index of the classes div, index of the card inside it) so the
+	matching WebElement can still be looked up for sections with multiple meetings.
+
+	Example of one returned tuple:
+	('Small Contemporary Ensemble | MDE 139',
+	 ['ENS Section AMS, Class Number5385', 'Regular Academic', 'Friday', ...],
+	 (0, 1))
+	"""
+	root = buildTree(html)
+	# Equivalent of //div[@class=RESULTS_CONTAINER_CLASS]/child::div
+	containerChildren = []
+	for node in root.iterDescendants():
+		if node.tag == "div" and node.attrs.get("class") == RESULTS_CONTAINER_CLASS:
+			containerChildren.extend(node.childElements("div"))
+	if len(containerChildren) < 3:
+		return []
+	parentDiv = containerChildren[2]
+
+	classListings = []
+	classesDivs = [classesDiv for div in parentDiv.childElements("div") for classesDiv in div.childElements("div")]
+	for classesDivIndex, classesDiv in enumerate(classesDivs):
+		classes = classesDiv.childElements("div", CLASS_CARD_CLASS)
+		# The first element is the header
+		for classIndex, c in enumerate(classes[1:], start=1):
+			h2 = next((node for node in c.iterDescendants() if node.tag == "h2"), None)
+			className = " ".join(h2.textContent().split()) if h2 is not None else ""
+			classInfo = [node.textContent() for node in c.iterDescendants()
+									 if node.tag == "span" and node.attrs.get("class") == SCREEN_READER_CLASS]
+			classInfo = classInfo[1:] # Remove useless element
+			classListings.append((className, classInfo, (classesDivIndex, classIndex)))
+	return classListings
+
+def parseScriptClassListings(classListings: list[dict]) -> list[tuple[str, list[str], tuple[int, int]]]:
+	"""Turn the result of CLASS_LISTINGS_SCRIPT into the tuples returned by parseClassListings."""
+	return [(listing["className"], listing["classInfo"], tuple(listing["position"])) for listing in classListings]
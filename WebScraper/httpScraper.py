@@ -0,0 +1,380 @@
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+from urllib.parse import parse_qsl, urlsplit
+from course import course
+from parsing import parseFormatted, parseDate as parseCardDate
+
+# requests is only needed for the HTTP backend, the Selenium scraper runs without it
+try:
+	import requests
+	from requests.adapters import HTTPAdapter
+except ImportError:
+	requests = None
+
+# The class search page loads its results over XHR. There is no default for that URL,
+# copy it from the network tab of the browser (or record it with the replay server below).
+ENDPOINT = os.getenv("CANELINK_SEARCH_API")
+FIELD_MAP_FILENAME = os.getenv("CANELINK_FIELD_MAP") # JSON file overriding DEFAULT_FIELD_MAP
+DEFAULT_WORKERS = int(os.getenv("HTTP_SCRAPER_WORKERS", 8)) # subjects requested at the same time
+DEFAULT_RETRIES = 3
+DEFAULT_TIMEOUT = 30 # seconds
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+INTEGER_FIELDS = ("classNumber", "seatsAvailable", "capacity", "waitlistAvailable", "waitlistCapacity", "reservedSeatsAvailable", "reservedSeatsCapacity")
+
+# How a search request is built and how its JSON response maps to course fields.
+# Keys are course fields, values are the keys of the JSON section (or meeting).
+# Every part can be overridden with the file in CANELINK_FIELD_MAP, e.g.
+# {"fields": {"classNumber": "class_nbr"}, "meetingFields": {"classroom": "facility_descr"}}
+DEFAULT_FIELD_MAP = {
+	"params": {"term": "term", "career": "career", "subject": "subject", "page": "page"},
+	"sections": "sections", # list of sections in a response
+	"totalPages": "totalPages", # missing when the results are not paginated
+	"meetings": "meetings", # list of meetings of a section
+	"fields": {
+		"name": "name",
+		"subjectCode": "subjectCode",
+		"catalogNumber": "catalogNumber",
+		"sectionType": "sectionType",
+		"sectionCode": "sectionCode",
+		"classNumber": "classNumber",
+		"session": "session",
+		"status": "status",
+		"seatsAvailable": "seatsAvailable",
+		"capacity": "capacity",
+		"waitlistAvailable": "waitlistAvailable",
+		"waitlistCapacity": "waitlistCapacity",
+		"reservedSeatsAvailable": "reservedSeatsAvailable",
+		"reservedSeatsCapacity": "reservedSeatsCapacity"
+	},
+	"meetingFields": {
+		"days": "days",
+		"timeStart": "timeStart",
+		"timeEnd": "timeEnd",
+		"classroom": "classroom",
+		"instructor": "instructor",
+		"startDate": "startDate",
+		"endDate": "endDate",
+		"topic": "topic"
+	},
+	"timeFormat": "%I:%M%p",
+	"dateFormat": "%m/%d/%Y"
+}
+
+class HttpScrapeError(Exception):
+	pass
+
+class RetryableHttpError(HttpScrapeError):
+	pass
+
+def requireRequests():
+	if requests is None:
+		raise ImportError("The HTTP scraper needs requests, install it with 'pip install requests'")
+
+def loadFieldMap(filename=FIELD_MAP_FILENAME):
+	fieldMap = json.loads(json.dumps(DEFAULT_FIELD_MAP))
+	if filename is None:
+		return fieldMap
+	with open(filename, "r") as file:
+		overrides = json.load(file)
+	for key, value in overrides.items():
+		if isinstance(value, dict):
+			fieldMap[key].update(value)
+		else:
+			fieldMap[key] = value
+	return fieldMap
+
+def requestKey(params: dict):
+	"""Name of the recorded response of a request, the same for any order of the parameters."""
+	# Values are compared as strings, a page number sent as 1 comes back from the query string as "1"
+	return hashlib.sha1(json.dumps(sorted((str(name), str(value)) for name, value in params.items())).encode()).hexdigest()
+
+def recordResponse(directory: str, params: dict, results):
+	"""Save the response to a request so ReplayServer can serve it."""
+	os.makedirs(directory, exist_ok=True)
+	with open(os.path.join(directory, requestKey(params) + ".json"), "w") as file:
+		json.dump({"params": params, "response": results}, file)
+
+def parseDays(days):
+	if days is None or days == "" or days == "-":
+		return []
+	if isinstance(days, list):
+		return days
+	if days.split()[0] in course.allDays:
+		return days.split() # Like the class cards: "Tuesday Thursday"
+	return course.mapDaysAbrvToFull(days) # Like the meeting patterns table: "TuTh"
+
+def parseInstructors(instructor):
+	if instructor is None:
+		return []
+	if isinstance(instructor, list):
+		return instructor
+	return instructor.replace("\n\r", " ").split(", ")
+
+def parseTime(value, fieldMap: dict):
+	if value is None or value == "" or value == "-":
+		return None
+	return parseFormatted(value.replace(" ", "").upper(), fieldMap["timeFormat"])
+
+def parseDate(value, year: int, fieldMap: dict):
+	if value is None or value == "" or value == "-":
+		return None
+	if value.count("/") == 1:
+		return parseCardDate(value, year) # Like the class cards: "01/13"
+	date = parseFormatted(value, fieldMap["dateFormat"])
+	return date.replace(year=year) if date.year == 1900 else date
+
+def parseMeeting(meeting: dict, year: int, fieldMap: dict):
+	keys = fieldMap["meetingFields"]
+	return {
+		"days": parseDays(meeting.get(keys["days"])),
+		"timeStart": parseTime(meeting.get(keys["timeStart"]), fieldMap),
+		"timeEnd": parseTime(meeting.get(keys["timeEnd"]), fieldMap),
+		"classroom": meeting.get(keys["classroom"]) or "NULL",
+		"instructor": parseInstructors(meeting.get(keys["instructor"])),
+		"startDate": parseDate(meeting.get(keys["startDate"]), year, fieldMap),
+		"endDate": parseDate(meeting.get(keys["endDate"]), year, fieldMap),
+		"topic": meeting.get(keys["topic"])
+	}
+
+def sectionToCourse(section: dict, workUnit: tuple[str, str, str], dateTimeRetrieved: datetime.datetime, fieldMap=DEFAULT_FIELD_MAP):
+	"""
+	Turn one section of a search response into a course, with the same structure
+	as the Selenium scraper: scalar meeting fields for one meeting, lists with one
+	value per meeting (and multipleMeetings) for more than one.
+	"""
+	term, career, subject = workUnit
+	currentCourse = course(dateTimeRetrieved)
+	currentCourse.subjectName = subject
+	currentCourse.academicCareer = career
+	currentCourse.semester = term.split(" ")[0]
+	currentCourse.year = int(term.split(" ")[1])
+	for field, key in fieldMap["fields"].items():
+		value = section.get(key)
+		if value is None:
+			continue
+		if field in INTEGER_FIELDS:
+			setattr(currentCourse, field, int(value))
+		else:
+			setattr(currentCourse, field, str(value))
+	meetings = [parseMeeting(meeting, currentCourse.year, fieldMap) for meeting in section.get(fieldMap["meetings"]) or []]
+	if len(meetings) == 1:
+		for field, value in meetings[0].items():
+			if value is not None and field != "topic":
+				setattr(currentCourse, field, value)
+	elif len(meetings) > 1:
+		currentCourse.multipleMeetings = True
+		for field in ("days", "classroom", "instructor"):
+			setattr(currentCourse, field, [meeting[field] for meeting in meetings])
+		# Like the meeting patterns table, missing times are left out instead of stored as placeholders
+		for field in ("timeStart", "timeEnd", "startDate", "endDate"):
+			setattr(currentCourse, field, [meeting[field] for meeting in meetings if meeting[field] is not None])
+		if any(meeting["topic"] is not None for meeting in meetings):
+			currentCourse.addTopic([meeting["topic"] or "" for meeting in meetings])
+	return currentCourse
+
+class HttpScraper:
+	"""
+	Requests the class search results the way the class search page does, over a
+	pooled HTTP session, and turns the JSON into course objects without a browser.
+	Has the same scrape_subject as Scraper, so it can replace it per work unit.
+	Responses can be recorded to a directory and served again with ReplayServer.
+
+	Example:
+	with HttpScraper(os.environ["CANELINK_SEARCH_API"]) as httpScraper:
+		for section in httpScraper.scrape_subject("Spring 2025", "Undergraduate", "Accounting"):
+			print(section)
+	"""
+	def __init__(self, endpoint: str, fieldMap=None, workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES, backoff=1.0,
+		timeout=DEFAULT_TIMEOUT, dateTimeRetrieved=None, recordDirectory=None):
+		requireRequests()
+		if endpoint is None:
+			raise ValueError("No class search endpoint, set CANELINK_SEARCH_API")
+		self.endpoint = endpoint
+		self.fieldMap = fieldMap if fieldMap is not None else loadFieldMap()
+		self.workers = workers
+		self.retries = retries
+		self.backoff = backoff
+		self.timeout = timeout
+		self.dateTimeRetrieved = dateTimeRetrieved if dateTimeRetrieved is not None else course.currentDateTime()
+		self.recordDirectory = recordDirectory
+		self.session = requests.Session()
+		# One kept alive connection per worker thread
+		adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+		self.session.mount("http://", adapter)
+		self.session.mount("https://", adapter)
+		self.requestsSent = 0
+		self.requestsRetried = 0
+		self.lock = threading.Lock()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
+
+	def close(self):
+		self.session.close()
+
+	def fetch(self, params: dict):
+		"""
+		One request of the class search. Raises RetryableHttpError when trying
+		again later can help (rate limited, server or network errors).
+		"""
+		try:
+			response = self.session.get(self.endpoint, params=params, timeout=self.timeout)
+		except (requests.ConnectionError, requests.Timeout) as e:
+			raise RetryableHttpError(f"{type(e).__name__} for {params}: {e}") from e
+		with self.lock:
+			self.requestsSent += 1
+		if response.status_code in RETRY_STATUS_CODES:
+			raise RetryableHttpError(f"{response.status_code} from the class search for {params}")
+		try:
+			response.raise_for_status()
+			results = response.json()
+		except (requests.HTTPError, ValueError) as e:
+			raise HttpScrapeError(f"Unusable class search response for {params}: {e}") from e
+		if self.recordDirectory is not None:
+			recordResponse(self.recordDirectory, params, results)
+		return results
+
+	def get(self, params: dict):
+		for attempt in range(self.retries + 1):
+			try:
+				return self.fetch(params)
+			except RetryableHttpError as e:
+				if attempt == self.retries:
+					raise
+				with self.lock:
+					self.requestsRetried += 1
+			time.sleep(self.backoff * 2 ** attempt)
+
+	def pageParams(self, workUnit: tuple[str, str, str], page: int):
+		paramNames = self.fieldMap["params"]
+		term, career, subject = workUnit
+		params = {paramNames["term"]: term, paramNames["career"]: career, paramNames["subject"]: subject}
+		if paramNames.get("page") is not None:
+			params[paramNames["page"]] = page
+		return params
+
+	def pageSections(self, results: dict):
+		"""
+		The JSON sections of a response. Raises HttpScrapeError for a response in an
+		unexpected shape, so it is not saved (and checkpointed) as a subject without classes.
+		"""
+		if not isinstance(results, dict) or self.fieldMap["sections"] not in results:
+			raise HttpScrapeError(f"Class search response without {self.fieldMap['sections']!r}: {str(results)[:200]}")
+		sections = results[self.fieldMap["sections"]]
+		if sections is None:
+			return []
+		if not isinstance(sections, list):
+			raise HttpScrapeError(f"{self.fieldMap['sections']!r} of a class search response is not a list: {str(sections)[:200]}")
+		return sections
+
+	def isLastPage(self, results: dict, page: int):
+		return self.fieldMap["params"].get("page") is None or page >= (results.get(self.fieldMap["totalPages"]) or 1)
+
+	def searchSubject(self, term: str, career: str, subject: str):
+		"""The JSON sections of one (term, academic career, subject), from every page of the results."""
+		sections = []
+		page = 1
+		while True:
+			results = self.get(self.pageParams((term, career, subject), page))
+			sections.extend(self.pageSections(results))
+			if self.isLastPage(results, page):
+				return sections
+			page += 1
+
+	def scrape_subject(self, term: str, career: str, subject: str) -> Iterator[course]:
+		for section in self.searchSubject(term, career, subject):
+			yield sectionToCourse(section, (term, career, subject), self.dateTimeRetrieved, self.fieldMap)
+
+	def scrapeWorkUnits(self, workUnits: list[tuple[str, str, str]], fallback=None, onSubjectDone=None, showProgress=True):
+		"""
+		Scrape the work units over workers threads and yield their courses in work unit order.
+		A work unit whose requests keep failing is scraped with fallback (a Selenium Scraper)
+		when one is given, otherwise the HttpScrapeError is raised. onSubjectDone is called
+		with each work unit and whether it completed, a fallback search can time out. Only twice workers work
+		units are submitted ahead of the one being yielded, so a long crawl holds a bounded
+		number of subjects in memory.
+		"""
+		def scrapeWorkUnit(workUnit):
+			try:
+				return list(self.scrape_subject(*workUnit)), None
+			except HttpScrapeError as e:
+				return None, e
+
+		workers = max(1, self.workers)
+		with ThreadPoolExecutor(max_workers=workers) as executor:
+			# Futures of the submitted work units, oldest first
+			pending = deque()
+			submitted = 0
+			for i in range(len(workUnits)):
+				while submitted < len(workUnits) and len(pending) < 2 * workers:
+					pending.append(executor.submit(scrapeWorkUnit, workUnits[submitted]))
+					submitted += 1
+				unitCourses, error = pending.popleft().result()
+				if error is not None:
+					if fallback is None:
+						raise error
+					print("Falling back to the browser for", *workUnits[i], "-", error)
+					unitCourses, complete = fallback.scrapeSubjectOrSkip(*workUnits[i])
+				else:
+					complete = True
+				yield from unitCourses
+				if onSubjectDone is not None:
+					onSubjectDone(workUnits[i], complete)
+				if showProgress:
+					print(f"Finished {i + 1}/{len(workUnits)}:", *workUnits[i])
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+	def do_GET(self):
+		params = dict(parse_qsl(urlsplit(self.path).query))
+		filename = os.path.join(self.server.directory, requestKey(params) + ".json")
+		if not os.path.isfile(filename):
+			self.send_error(404, "No recorded response")
+			return
+		with open(filename, "rb") as file:
+			body = json.dumps(json.load(file)["response"]).encode()
+		if self.server.delay > 0:
+			time.sleep(self.server.delay)
+		self.send_response(200)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+class ReplayServer:
+	"""
+	Local stand-in for the class search endpoint that serves the responses recorded
+	with HttpScraper(recordDirectory=...).
+
+	Example:
+	with ReplayServer("WebScraper/fixtures/searchResponses") as server:
+		scraper = HttpScraper(server.url)
+	"""
+	def __init__(self, directory: str, delay=0.0, port=0):
+		self.server = ThreadingHTTPServer(("127.0.0.1", port), ReplayRequestHandler)
+		self.server.directory = directory
+		self.server.delay = delay # seconds added to every response, to stand in for the network
+		self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+		self.url = f"http://127.0.0.1:{self.server.server_address[1]}/search"
+
+	def __enter__(self):
+		self.thread.start()
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.server.shutdown()
+		self.server.server_close()
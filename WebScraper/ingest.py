@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient, ReplaceOne
+from pymongo.errors import AutoReconnect, BulkWriteError, ConnectionFailure, NetworkTimeout
+
+DEFAULT_BATCH_SIZE = int(os.getenv("MONGO_BATCH_SIZE", 30000)) # documents per insert_many/bulk_write call
+DEFAULT_WORKERS = int(os.getenv("MONGO_WRITE_WORKERS", 4)) # batches sent at the same time
+DEFAULT_RETRIES = 3
+DUPLICATE_KEY_ERROR = 11000
+SECTION_KEY_FIELDS = ("semester", "year", "classNumber")
+
+def createClient(uri: str, workers=DEFAULT_WORKERS):
+	"""MongoClient with a connection pool sized for the ingestion threads."""
+	return MongoClient(
+		uri,
+		maxPoolSize=max(workers * 2, 10),
+		minPoolSize=workers,
+		socketTimeoutMS=60000,
+		connectTimeoutMS=30000,
+		retryWrites=True,
+		compressors="zlib"
+	)
+
+class BulkIngester:
+	"""
+	Sends insert_many/bulk_write batches concurrently with unordered semantics.
+
+	Every worker has its own lane (a single thread), so operations on the same
+	key always go through the same lane in the order they were submitted, while
+	different keys are written in parallel. At most maxPending batches wait for
+	the database, which keeps memory bounded. Failed batches are retried with
+	exponential backoff: only the failed operations of a BulkWriteError, the
+	whole batch after a network error. Inserts that may already have been applied
+	(a network error or a write concern error) are only sent again for the
+	documents whose _id is not in the collection yet, time series collections like
+	sectionsTS do not reject a second copy of a document.
+
+	Example:
+	with BulkIngester(client) as ingester:
+		ingester.insertMany(db['sectionsTS'], coursesTS)
+		ingester.replaceMany(db['sections'], courses)
+	print(ingester.documentsPerSecond())
+	"""
+	def __init__(self, client: MongoClient, workers=DEFAULT_WORKERS, batchSize=DEFAULT_BATCH_SIZE, retries=DEFAULT_RETRIES, backoff=1.0, maxPending=None):
+		self.client = client
+		self.workers = max(1, workers)
+		self.batchSize = batchSize
+		self.retries = retries
+		self.backoff = backoff
+		self.lanes = [ThreadPoolExecutor(max_workers=1) for _ in range(self.workers)]
+		self.pending = threading.BoundedSemaphore(maxPending or self.workers * 2)
+		self.futures = []
+		self.nextLane = 0
+		self.lock = threading.Lock()
+		self.documentsWritten = 0
+		self.batchesWritten = 0
+		self.batchesRetried = 0
+		self.firstSubmitTime = None
+		self.secondsWriting = 0.0 # wall-clock time from the first submitted batch until it was all flushed
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
+
+	def insertMany(self, collection, documents: list):
+		for i in range(0, len(documents), self.batchSize):
+			self.submit(self.nextRoundRobinLane(), self.writeInsertBatch, collection, documents[i:i + self.batchSize])
+
+	def replaceMany(self, collection, documents: list, keyFields=SECTION_KEY_FIELDS):
+		"""Upsert documents by keyFields."""
+		operations = []
+		keys = []
+		for document in documents:
+			keyFilter = {field: document[field] for field in keyFields}
+			operations.append(ReplaceOne(keyFilter, document, upsert=True))
+			keys.append(tuple(keyFilter.values()))
+		self.bulkWriteByKey(collection, operations, keys)
+
+	def bulkWriteByKey(self, collection, operations: list, keys: list):
+		"""
+		Write operations that target the documents identified by keys.
+		Only the last operation of a key in this call is sent, and a key always
+		goes through the same lane so later calls are applied after earlier ones.
+		"""
+		latest = {}
+		for key, operation in zip(keys, operations):
+			latest.pop(key, None)
+			latest[key] = operation
+		laneOperations = [[] for _ in range(self.workers)]
+		for key, operation in latest.items():
+			laneOperations[hash(key) % self.workers].append(operation)
+		self.bulkWriteLanes(collection, laneOperations)
+
+	def bulkWrite(self, collection, operations: list):
+		"""Write operations that do not depend on each other's order."""
+		for i in range(0, len(operations), self.batchSize):
+			self.submit(self.nextRoundRobinLane(), self.writeBulkBatch, collection, operations[i:i + self.batchSize])
+
+	def bulkWriteLanes(self, collection, laneOperations: list):
+		for lane, operations in enumerate(laneOperations):
+			for i in range(0, len(operations), self.batchSize):
+				self.submit(lane, self.writeBulkBatch, collection, operations[i:i + self.batchSize])
+
+	def nextRoundRobinLane(self):
+		lane = self.nextLane
+		self.nextLane = (self.nextLane + 1) % self.workers
+		return lane
+
+	def submit(self, lane: int, function, collection, batch: list):
+		if len(batch) == 0:
+			return
+		if self.firstSubmitTime is None:
+			self.firstSubmitTime = time.perf_counter()
+		self.pending.acquire()
+		future = self.lanes[lane].submit(self.runWithRetries, function, collection, batch)
+		future.add_done_callback(lambda _: self.pending.release())
+		self.futures.append(future)
+
+	def runWithRetries(self, function, collection, batch: list):
+		batchLength = len(batch)
+		inserting = function is BulkIngester.writeInsertBatch
+		mayBeApplied = False # some of the batch may have been written by the failed attempt
+		attempt = 0
+		while True:
+			try:
+				if inserting and mayBeApplied:
+					batch = BulkIngester.unappliedInserts(collection, batch)
+				if len(batch) > 0:
+					function(collection, batch)
+				break
+			except BulkWriteError as e:
+				# Duplicate keys will never succeed, everything else is retried on its own
+				failedIndexes = [error["index"] for error in e.details.get("writeErrors", []) if error.get("code") != DUPLICATE_KEY_ERROR]
+				if attempt >= self.retries or (len(failedIndexes) == 0 and not e.details.get("writeConcernErrors")):
+					raise
+				if len(failedIndexes) > 0:
+					# Operations with a write error were not applied
+					batch = [batch[i] for i in failedIndexes]
+					mayBeApplied = False
+				else:
+					# Applied, but not acknowledged by enough members
+					mayBeApplied = True
+			except (AutoReconnect, NetworkTimeout, ConnectionFailure):
+				if attempt >= self.retries:
+					raise
+				mayBeApplied = True
+			attempt += 1
+			with self.lock:
+				self.batchesRetried += 1
+			time.sleep(self.backoff * 2 ** (attempt - 1))
+		with self.lock:
+			self.documentsWritten += batchLength
+			self.batchesWritten += 1
+
+	@staticmethod
+	def writeInsertBatch(collection, documents: list):
+		collection.insert_many(documents, ordered=False)
+
+	@staticmethod
+	def unappliedInserts(collection, documents: list):
+		"""The documents of an insert batch that are not in collection, by the _id insert_many gave them before sending."""
+		ids = [document["_id"] for document in documents if "_id" in document]
+		applied = set()
+		if len(ids) > 0:
+			applied = {document["_id"] for document in collection.find({"_id": {"$in": ids}}, {"_id": 1})}
+		return [document for document in documents if document.get("_id") not in applied]
+
+	@staticmethod
+	def writeBulkBatch(collection, operations: list):
+		collection.bulk_write(operations, ordered=False)
+
+	def flush(self):
+		"""Wait for every submitted batch and raise the first error, if any."""
+		futures = self.futures
+		self.futures = []
+		error = None
+		for future in futures:
+			exception = future.exception()
+			if exception is not None and error is None:
+				error = exception
+		if self.firstSubmitTime is not None:
+			self.secondsWriting += time.perf_counter() - self.firstSubmitTime
+			self.firstSubmitTime = None
+		if error is not None:
+			raise error
+
+	def close(self):
+		try:
+			self.flush()
+		finally:
+			for lane in self.lanes:
+				lane.shutdown(wait=True)
+
+	def documentsPerSecond(self):
+		return self.documentsWritten / self.secondsWriting if self.secondsWriting > 0 else 0.0
@@ -0,0 +1,270 @@
+import datetime
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_TIMEOUT = 20 # seconds, what every wait used before it had any latencies to learn from
+MIN_TIMEOUT = 2
+MIN_SAMPLES = 5 # latencies needed before a timeout is learned
+RECENT_SAMPLES = 50
+TIMEOUT_FACTOR = 3 # learned timeout is this many times the 95th percentile of recent latencies
+PROMETHEUS_FILENAME = "scraper.prom"
+REPORT_DIRECTORY = os.getenv("SCRAPER_METRICS_DIRECTORY", "WebScraper/metrics") # run reports, None in main to not write them
+NESTED_STAGES = ("wait",) # stages timed inside other stages, left out of the time of a work unit
+
+class WaitMetrics:
+	"""
+	How long every named wait of the crawl took, and the timeouts learned from it.
+	A wait that usually takes 0.3s gets a timeout of a few seconds instead of the
+	blanket 20s, so a wait that hangs (e.g. a meeting patterns table that never
+	opens) is given up on and retried after a few seconds instead of 20s.
+
+	Example:
+	metrics.record("search results", 0.42)
+	metrics.timeoutFor("search results") -> 20 until MIN_SAMPLES latencies were recorded
+	print(metrics.report())
+	"""
+	def __init__(self):
+		self.stats = {}
+
+	def statsFor(self, name: str):
+		if name not in self.stats:
+			self.stats[name] = {"count": 0, "totalSeconds": 0.0, "maxSeconds": 0.0, "timeouts": 0, "recent": deque(maxlen=RECENT_SAMPLES)}
+		return self.stats[name]
+
+	def record(self, name: str, seconds: float, timedOut=False):
+		stats = self.statsFor(name)
+		stats["count"] += 1
+		stats["totalSeconds"] += seconds
+		stats["maxSeconds"] = max(stats["maxSeconds"], seconds)
+		# A timeout still counts as a latency, so a wait that keeps timing out gets a longer timeout
+		stats["recent"].append(seconds)
+		if timedOut:
+			stats["timeouts"] += 1
+
+	def timeoutFor(self, name: str, default=DEFAULT_TIMEOUT):
+		stats = self.stats.get(name)
+		if stats is None or len(stats["recent"]) < MIN_SAMPLES:
+			return default
+		recent = sorted(stats["recent"])
+		percentile95 = recent[int(0.95 * (len(recent) - 1))]
+		return min(max(percentile95 * TIMEOUT_FACTOR, MIN_TIMEOUT), default)
+
+	def merge(self, other: dict):
+		"""Add the stats of another WaitMetrics.toDict(), e.g. from a worker process."""
+		for name, otherStats in other.items():
+			stats = self.statsFor(name)
+			stats["count"] += otherStats["count"]
+			stats["totalSeconds"] += otherStats["totalSeconds"]
+			stats["maxSeconds"] = max(stats["maxSeconds"], otherStats["maxSeconds"])
+			stats["timeouts"] += otherStats["timeouts"]
+			stats["recent"].extend(otherStats["recent"])
+
+	def toDict(self):
+		return {name: dict(stats, recent=list(stats["recent"])) for name, stats in self.stats.items()}
+
+	def report(self):
+		lines = [f"{'wait':<28}{'count':>7}{'total s':>10}{'mean s':>9}{'max s':>8}{'timeouts':>10}{'timeout s':>11}"]
+		for name, stats in sorted(self.stats.items(), key=lambda item: item[1]["totalSeconds"], reverse=True):
+			mean = stats["totalSeconds"] / stats["count"] if stats["count"] > 0 else 0.0
+			lines.append(f"{name:<28}{stats['count']:>7}{stats['totalSeconds']:>10.1f}{mean:>9.2f}{stats['maxSeconds']:>8.2f}"
+				f"{stats['timeouts']:>10}{self.timeoutFor(name):>11.1f}")
+		return "\n".join(lines)
+
+class RunMetrics:
+	"""
+	Timers and counters of one crawl, in total and per (term, academic career, subject)
+	work unit, with the waits of the crawl in waits. Written at the end of a run as a
+	JSON report and a Prometheus textfile, so slow subjects and regressions can be
+	compared run over run.
+
+	Stages: navigation (page loads, the dropdowns of the search form, clicks), wait
+	(WebDriver waits), extraction (reading the results page), parsing, meetingPatterns
+	(expanding sections with multiple meetings) and write (saving to the sink).
+	Every wait has to happen inside the timer of another stage, its time is then also
+	part of that stage, so the time of a work unit is the sum of its other stages.
+	Counters: sections, meetingPatterns (expansions), sectionsWritten, timeouts and retries.
+	Safe to update from several threads, e.g. the browser and a ParsePipeline writing to the sink.
+
+	Example:
+	with metrics.timer("navigation"):
+		scraper.loadClassSearchPage()
+	metrics.count("sections")
+	metrics.writeReport("WebScraper/metrics")
+	"""
+	def __init__(self):
+		self.waits = WaitMetrics()
+		self.started = time.time()
+		self.lock = threading.RLock()
+		self.reset()
+
+	def reset(self):
+		"""Forget the timers and counters, but keep the timeouts learned by the waits."""
+		with self.lock:
+			self.stages = {}
+			self.counters = {}
+			self.workUnits = {}
+			self.currentUnit = None
+			for stats in self.waits.stats.values():
+				stats.update(count=0, totalSeconds=0.0, maxSeconds=0.0, timeouts=0)
+
+	def startWorkUnit(self, workUnit: tuple[str, str, str]):
+		self.currentUnit = tuple(workUnit)
+
+	def unitStats(self, workUnit):
+		if workUnit not in self.workUnits:
+			self.workUnits[workUnit] = {"stages": {}, "counters": {}}
+		return self.workUnits[workUnit]
+
+	def addTime(self, stage: str, seconds: float, workUnit=None):
+		with self.lock:
+			stats = self.stages.setdefault(stage, {"count": 0, "totalSeconds": 0.0, "maxSeconds": 0.0})
+			stats["count"] += 1
+			stats["totalSeconds"] += seconds
+			stats["maxSeconds"] = max(stats["maxSeconds"], seconds)
+			workUnit = workUnit if workUnit is not None else self.currentUnit
+			if workUnit is not None:
+				unitStages = self.unitStats(workUnit)["stages"]
+				unitStages[stage] = unitStages.get(stage, 0.0) + seconds
+
+	def count(self, name: str, amount=1, workUnit=None):
+		with self.lock:
+			self.counters[name] = self.counters.get(name, 0) + amount
+			workUnit = workUnit if workUnit is not None else self.currentUnit
+			if workUnit is not None:
+				unitCounters = self.unitStats(workUnit)["counters"]
+				unitCounters[name] = unitCounters.get(name, 0) + amount
+
+	@contextmanager
+	def timer(self, stage: str, workUnit=None):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.addTime(stage, time.perf_counter() - start, workUnit)
+
+	def timed(self, stage: str, iterable):
+		"""Yield the items of iterable, timing only the time it takes to produce them."""
+		iterator = iter(iterable)
+		while True:
+			start = time.perf_counter()
+			item = next(iterator, None)
+			self.addTime(stage, time.perf_counter() - start)
+			if item is None:
+				return
+			yield item
+
+	def recordWait(self, name: str, seconds: float, timedOut=False):
+		with self.lock:
+			self.waits.record(name, seconds, timedOut)
+			self.addTime("wait", seconds)
+			if timedOut:
+				self.count("timeouts")
+
+	def merge(self, other: dict):
+		"""Add the timers and counters of another RunMetrics.toDict(), e.g. from a worker process."""
+		with self.lock:
+			self.waits.merge(other["waits"])
+			for stage, otherStats in other["stages"].items():
+				stats = self.stages.setdefault(stage, {"count": 0, "totalSeconds": 0.0, "maxSeconds": 0.0})
+				stats["count"] += otherStats["count"]
+				stats["totalSeconds"] += otherStats["totalSeconds"]
+				stats["maxSeconds"] = max(stats["maxSeconds"], otherStats["maxSeconds"])
+			for name, amount in other["counters"].items():
+				self.counters[name] = self.counters.get(name, 0) + amount
+			for unit in other["workUnits"]:
+				stats = self.unitStats((unit["term"], unit["career"], unit["subject"]))
+				for stage, seconds in unit["stages"].items():
+					stats["stages"][stage] = stats["stages"].get(stage, 0.0) + seconds
+				for name, amount in unit["counters"].items():
+					stats["counters"][name] = stats["counters"].get(name, 0) + amount
+
+	def toDict(self):
+		with self.lock:
+			workUnits = []
+			for (term, career, subject), stats in self.workUnits.items():
+				seconds = sum(seconds for stage, seconds in stats["stages"].items() if stage not in NESTED_STAGES)
+				workUnits.append({"term": term, "career": career, "subject": subject, "seconds": seconds,
+					"stages": dict(stats["stages"]), "counters": dict(stats["counters"])})
+			workUnits.sort(key=lambda unit: unit["seconds"], reverse=True)
+			return {
+				"started": datetime.datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+				"seconds": time.time() - self.started,
+				"stages": {stage: dict(stats) for stage, stats in self.stages.items()},
+				"counters": dict(self.counters),
+				"waits": self.waits.toDict(),
+				"workUnits": workUnits
+			}
+
+	def toPrometheus(self):
+		"""The report in the Prometheus text format, for the node exporter textfile collector."""
+		report = self.toDict()
+		lines = [
+			"# HELP scraper_run_seconds Duration of the last crawl.",
+			"# TYPE scraper_run_seconds gauge",
+			f"scraper_run_seconds {report['seconds']:.3f}",
+			"# HELP scraper_run_timestamp_seconds When the last crawl started.",
+			"# TYPE scraper_run_timestamp_seconds gauge",
+			f"scraper_run_timestamp_seconds {self.started:.0f}",
+			"# HELP scraper_stage_seconds Time spent in each stage of the last crawl.",
+			"# TYPE scraper_stage_seconds gauge"
+		]
+		for stage, stats in report["stages"].items():
+			lines.append(f"scraper_stage_seconds{{stage={prometheusLabel(stage)}}} {stats['totalSeconds']:.3f}")
+		lines += ["# HELP scraper_events Events counted during the last crawl.", "# TYPE scraper_events gauge"]
+		for name, amount in report["counters"].items():
+			lines.append(f"scraper_events{{event={prometheusLabel(name)}}} {amount}")
+		lines += ["# HELP scraper_wait_seconds Time spent in each wait of the last crawl.", "# TYPE scraper_wait_seconds gauge"]
+		for name, stats in report["waits"].items():
+			lines.append(f"scraper_wait_seconds{{wait={prometheusLabel(name)}}} {stats['totalSeconds']:.3f}")
+		lines += ["# HELP scraper_wait_timeouts Timed out waits of the last crawl.", "# TYPE scraper_wait_timeouts gauge"]
+		for name, stats in report["waits"].items():
+			lines.append(f"scraper_wait_timeouts{{wait={prometheusLabel(name)}}} {stats['timeouts']}")
+		lines += ["# HELP scraper_work_unit_seconds Time spent on each subject of the last crawl.", "# TYPE scraper_work_unit_seconds gauge"]
+		for unit in report["workUnits"]:
+			labels = f"term={prometheusLabel(unit['term'])},career={prometheusLabel(unit['career'])},subject={prometheusLabel(unit['subject'])}"
+			lines.append(f"scraper_work_unit_seconds{{{labels}}} {unit['seconds']:.3f}")
+		lines += ["# HELP scraper_work_unit_events Events counted for each subject of the last crawl.", "# TYPE scraper_work_unit_events gauge"]
+		for unit in report["workUnits"]:
+			labels = f"term={prometheusLabel(unit['term'])},career={prometheusLabel(unit['career'])},subject={prometheusLabel(unit['subject'])}"
+			for name, amount in unit["counters"].items():
+				lines.append(f"scraper_work_unit_events{{{labels},event={prometheusLabel(name)}}} {amount}")
+		return "\n".join(lines) + "\n"
+
+	def writeReport(self, directory: str):
+		"""
+		Write run-<start time>.json (one file per run, kept for comparisons) and
+		scraper.prom (replaced by every run) to directory, returns the JSON filename.
+		"""
+		os.makedirs(directory, exist_ok=True)
+		started = datetime.datetime.fromtimestamp(self.started).strftime("%Y-%m-%dT%H-%M-%S")
+		filename = os.path.join(directory, f"run-{started}.json")
+		with open(filename, "w") as file:
+			json.dump(self.toDict(), file, indent=2)
+		# Written next to it and renamed, so the collector never reads half a file
+		prometheusFilename = os.path.join(directory, PROMETHEUS_FILENAME)
+		with open(prometheusFilename + ".tmp", "w") as file:
+			file.write(self.toPrometheus())
+		os.replace(prometheusFilename + ".tmp", prometheusFilename)
+		return filename
+
+	def report(self, slowestUnits=10):
+		report = self.toDict()
+		lines = [f"{'stage':<28}{'count':>7}{'total s':>10}{'max s':>8}"]
+		for stage, stats in sorted(report["stages"].items(), key=lambda item: item[1]["totalSeconds"], reverse=True):
+			lines.append(f"{stage:<28}{stats['count']:>7}{stats['totalSeconds']:>10.1f}{stats['maxSeconds']:>8.2f}")
+		lines.append(", ".join(f"{name}: {amount}" for name, amount in sorted(report["counters"].items())))
+		with self.lock:
+			lines.append(self.waits.report())
+		workUnits = report["workUnits"][:slowestUnits]
+		if len(workUnits) > 0:
+			lines.append("Slowest subjects:")
+			for unit in workUnits:
+				lines.append(f"{unit['seconds']:>8.1f} s  {unit['term']} {unit['career']} {unit['subject']}")
+		return "\n".join(lines)
+
+def prometheusLabel(value: str):
+	return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
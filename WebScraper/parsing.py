@@ -0,0 +1,127 @@
+import datetime
+import re
+from functools import cache, lru_cache
+
+"""
+Parsers for the strings every section goes through: times, dates, days and the
+status strings of the class cards. A term only has a few hundred distinct times,
+dates and days, so every parser is memoized and a distinct string is only parsed
+once per process (the last STATUS_CACHE_SIZE status strings). The parsers return
+immutable values (datetimes, tuples), callers that need a list make their own.
+"""
+
+TIME_PATTERN = re.compile(r"(\d{1,2}):(\d{2}) ?([AaPp])[Mm]") # "10:10 am", "06:35 PM" and "6:30PM"
+DATE_PATTERN = re.compile(r"(\d{1,2})/(\d{1,2})(?:/(\d{4}))?") # "01/13" and "01/15/2025"
+# "Open, 10 of 12 seats available" and "Waitlist, 300 of 300 waitlist seats available. 40 of 40 seats available."
+# with an optional ", reserved seats available" at the end
+STATUS_PATTERN = re.compile(r"(\w+), (\d+) of (\d+) seats available(, reserved seats available)?")
+WAITLIST_STATUS_PATTERN = re.compile(r"(\w+), (\d+) of (\d+) waitlist seats available\. (\d+) of (\d+) seats available\.?(, reserved seats available)?")
+SEAT_COUNT_PATTERN = re.compile(r"(\d+) of (\d+)") # reserved seats and waitlist text after a status: "5 of 5"
+STATUS_CACHE_SIZE = 65536 # seat counts make far more distinct status strings than times or dates
+DAYS_MAPPING = {"Mo": "Monday", "Tu": "Tuesday", "We": "Wednesday", "Th": "Thursday", "Fr": "Friday", "Sa": "Saturday", "Su": "Sunday"}
+
+@cache
+def parseTime(text: str):
+	"""A time of day on 1900-01-01 like strptime with "%I:%M %p" or "%I:%M%p", raises ValueError for anything else."""
+	match = TIME_PATTERN.fullmatch(text)
+	if match is None:
+		raise ValueError(f"time data {text!r} does not match '%I:%M %p'")
+	hour, minute = int(match.group(1)), int(match.group(2))
+	if not 1 <= hour <= 12:
+		raise ValueError(f"hour out of range in {text!r}")
+	hour = hour % 12 + (12 if match.group(3) in "Pp" else 0)
+	return datetime.datetime(1900, 1, 1, hour, minute)
+
+@cache
+def parseDate(text: str, year: int):
+	"""A "%m/%d" date in year, 02/29 included."""
+	match = DATE_PATTERN.fullmatch(text)
+	if match is None or match.group(3) is not None:
+		raise ValueError(f"time data {text!r} does not match '%m/%d'")
+	return datetime.datetime(year, int(match.group(1)), int(match.group(2)))
+
+@cache
+def parseFullDate(text: str):
+	"""A "%m/%d/%Y" date."""
+	match = DATE_PATTERN.fullmatch(text)
+	if match is None or match.group(3) is None:
+		raise ValueError(f"time data {text!r} does not match '%m/%d/%Y'")
+	return datetime.datetime(int(match.group(3)), int(match.group(1)), int(match.group(2)))
+
+@cache
+def parseDateRange(text: str, year: int = None):
+	"""
+	(start, end) of "01/13 - 04/28" in year, or of "01/15/2025 - 03/05/2025" without a year.
+	"""
+	startText, endText = text.split(" - ")[:2]
+	if year is None:
+		return parseFullDate(startText), parseFullDate(endText)
+	return parseDate(startText, year), parseDate(endText, year)
+
+@cache
+def parseDateTime(text: str):
+	"""A "%Y-%m-%d %H:%M:%S" date and time, like dateTimeRetrieved in the csv."""
+	return datetime.datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+
+@cache
+def parseFormatted(text: str, format: str):
+	"""datetime.strptime for a format only known at runtime."""
+	return datetime.datetime.strptime(text, format)
+
+@cache
+def mapDays(days: str):
+	"""
+	Full day names of the days of a meeting patterns table.
+
+	Examples:
+	'MoWeFr' -> ('Monday', 'Wednesday', 'Friday')
+	'TBA' -> ('TBA',)
+	"""
+	if days == "TBA":
+		return ("TBA",)
+	return tuple(DAYS_MAPPING[days[i:i + 2]] for i in range(0, len(days), 2))
+
+@lru_cache(maxsize=STATUS_CACHE_SIZE)
+def parseSeatCount(text: str):
+	"""(available, capacity) of "5 of 12", None for any other string."""
+	match = SEAT_COUNT_PATTERN.fullmatch(text)
+	if match is None:
+		return None
+	return int(match.group(1)), int(match.group(2))
+
+@lru_cache(maxsize=STATUS_CACHE_SIZE)
+def parseStatusText(text: str):
+	"""
+	(status, seatsAvailable, capacity, waitlistAvailable, waitlistCapacity, hasReservedNote)
+	of the status string of a section, the waitlist seats are None without a waitlist.
+
+	Examples:
+	'Open, 5 of 12 seats available, reserved seats available' -> ('Open', 5, 12, None, None, True)
+	'Waitlist, 300 of 300 waitlist seats available. 40 of 40 seats available.' -> ('Waitlist', 40, 40, 300, 300, False)
+	"""
+	match = WAITLIST_STATUS_PATTERN.fullmatch(text)
+	if match is not None:
+		return (match.group(1), int(match.group(4)), int(match.group(5)), int(match.group(2)), int(match.group(3)),
+			match.group(6) is not None)
+	match = STATUS_PATTERN.fullmatch(text)
+	if match is not None:
+		return match.group(1), int(match.group(2)), int(match.group(3)), None, None, match.group(4) is not None
+	return splitStatusText(text)
+
+def splitStatusText(text: str):
+	"""parseStatusText for the layouts the patterns do not know, by splitting the string apart."""
+	statusStrings = text.split(", ")
+	hasReservedNote = False
+	for j, statusString in enumerate(statusStrings):
+		if "reserved" in statusString:
+			hasReservedNote = True
+			del statusStrings[j]
+			break
+	status = statusStrings[0]
+	if status == "Waitlist":
+		waitlistText, seatsText = statusStrings[1].split(". ")[:2]
+		waitlistWords = waitlistText.split(" ")
+		seatsWords = seatsText.split(" ")
+		return status, int(seatsWords[0]), int(seatsWords[2]), int(waitlistWords[0]), int(waitlistWords[2]), hasReservedNote
+	seatsWords = statusStrings[1].split(" ")
+	return status, int(seatsWords[0]), int(seatsWords[2]), None, None, hasReservedNote
@@ -0,0 +1,150 @@
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from course import course
+from sectionParser import parseSections, fillMeetingPatterns
+
+DEFAULT_QUEUE_SIZE = 4 # captured subjects waiting to be parsed, the browser waits when the queue is full
+
+def parseSubject(payload: dict) -> list[course]:
+	"""
+	Course objects of a subject captured by Scraper.captureSubject, the same ones
+	Scraper.scrape_subject yields. Runs in a worker process, payload only holds strings.
+	"""
+	term, academicCareer, subjectName = payload["workUnit"]
+	sections = []
+	for cardIndex, (className, classInfo) in enumerate(payload["classListings"]):
+		for section, sectionIndex, hasMeetingPatterns in parseSections(classInfo, className, subjectName, academicCareer, term,
+			payload["dateTimeRetrieved"]):
+			if hasMeetingPatterns:
+				fillMeetingPatterns(section, payload["meetingPatterns"][(cardIndex, sectionIndex)])
+			sections.append(section)
+	return sections
+
+class ParsePipeline:
+	"""
+	Parses and saves captured subjects on a thread of its own, so the browser can go
+	on to the next subject while the previous ones are parsed and written. The
+	browser thread hands raw payloads (see Scraper.captureSubject) to submit, which
+	blocks once queueSize of them are waiting. With parseWorkers the payloads are
+	parsed by that many processes, otherwise by the pipeline thread itself. Subjects
+	are written to the sink and checkpointed in the order they were submitted, the
+	ones whose search timed out are not checkpointed.
+
+	Example:
+	with MongoSink(client) as sink, ParsePipeline(sink) as pipeline:
+		for workUnit in workUnits:
+			pipeline.submit(scraper.captureSubject(*workUnit))
+	"""
+	def __init__(self, sink=None, parseWorkers=0, queueSize=DEFAULT_QUEUE_SIZE, metrics=None, showProgress=True):
+		self.sink = sink
+		self.parseWorkers = parseWorkers
+		self.metrics = metrics
+		self.showProgress = showProgress
+		self.queue = queue.Queue(queueSize)
+		self.executor = None
+		self.error = None
+		self.subjectsWritten = 0
+		self.sectionsParsed = 0
+		self.thread = None
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		# Subjects that were captured completely are still saved when the browser fails
+		self.close(raiseError=excType is None)
+
+	def start(self):
+		if self.parseWorkers > 0:
+			self.executor = ProcessPoolExecutor(max_workers=self.parseWorkers, mp_context=multiprocessing.get_context("spawn"))
+		self.thread = threading.Thread(target=self.consume, name="ParsePipeline", daemon=True)
+		self.thread.start()
+
+	def submit(self, payload: dict):
+		"""Queue a captured subject, raises the error the pipeline failed with, if any."""
+		while True:
+			if self.error is not None:
+				raise self.error
+			try:
+				self.queue.put(payload, timeout=1)
+				return
+			except queue.Full:
+				continue
+
+	def run(self, scraper, workUnits: list[tuple[str, str, str]]):
+		"""Capture every work unit with scraper (a Scraper) and save them, returns the number of sections saved."""
+		with self:
+			for workUnit in workUnits:
+				self.submit(scraper.captureSubject(*workUnit))
+		return self.sectionsParsed
+
+	def consume(self):
+		try:
+			# Futures of the subjects being parsed, oldest first
+			pending = deque()
+			while True:
+				payload = self.queue.get()
+				if payload is not None:
+					if self.executor is not None:
+						pending.append((payload, self.executor.submit(parseSubject, payload)))
+					else:
+						start = time.perf_counter()
+						sections = parseSubject(payload)
+						self.record("parsing", time.perf_counter() - start, payload["workUnit"])
+						self.write(payload, sections)
+				while len(pending) > 0 and (payload is None or len(pending) > self.parseWorkers or pending[0][1].done()):
+					submitted, future = pending.popleft()
+					self.write(submitted, future.result())
+				if payload is None:
+					return
+		except BaseException as e:
+			self.error = e
+			# Unblock a browser thread waiting in submit
+			while True:
+				try:
+					self.queue.get_nowait()
+				except queue.Empty:
+					break
+
+	def record(self, stage: str, seconds: float, workUnit: tuple[str, str, str]):
+		if self.metrics is not None:
+			self.metrics.addTime(stage, seconds, workUnit)
+
+	def write(self, payload: dict, sections: list):
+		workUnit = payload["workUnit"]
+		self.sectionsParsed += len(sections)
+		if self.metrics is not None:
+			self.metrics.count("sections", len(sections), workUnit)
+		if self.sink is not None:
+			self.sink.addAll(sections)
+			# Not checkpointed when the search timed out, a resumed run captures it again
+			self.sink.endWorkUnit(workUnit, payload["complete"])
+		if not payload["complete"]:
+			if self.showProgress:
+				print("Not saved:", *workUnit)
+			return
+		self.subjectsWritten += 1
+		if self.showProgress:
+			print(f"Saved {len(sections)} sections:", *workUnit)
+
+	def close(self, raiseError=True):
+		"""Wait until every submitted subject is parsed and saved."""
+		if self.thread is not None:
+			while self.thread.is_alive():
+				try:
+					self.queue.put(None, timeout=1)
+					break
+				except queue.Full:
+					continue
+			self.thread.join()
+			self.thread = None
+		if self.executor is not None:
+			self.executor.shutdown(cancel_futures=self.error is not None)
+			self.executor = None
+		if raiseError and self.error is not None:
+			raise self.error
@@ -0,0 +1,170 @@
+import datetime
+import os
+from dotenv import load_dotenv
+from pymongo import MongoClient, ReplaceOne
+from ingest import BulkIngester
+
+DAYS_IN_WEEK = 7
+
+def filledPercentage(capacity: int, seatsAvailable: int):
+	if capacity <= 0:
+		return 0.0
+	return max((capacity - seatsAvailable) / capacity * 100, 0.0)
+
+def summarizeFilled(filled: list):
+	"""
+	Daily and weekly change of a dense daily series of filled percentages.
+	change[i] is the change from day i to day i + 1, and weeklyChange[w] is the sum
+	of the changes into the days 7w..7w+6 (the first week has six of them, the last
+	week may be partial), so the weekly changes add up to the change of the whole series.
+
+	Not the numbers of StatsService.CalculateEnrollmentRates, which works on the
+	window of one request: its weeks sum the changes of the last 6 (first week) or 7
+	days whenever the number of days is a multiple of that, leaving out the change
+	between the first and the second week, a gap in the retrievals becomes a single
+	day with the previous value and the series is padded to numDays with 0 changes.
+	Here every day from the first retrieval on has its own value, see applyPoint.
+	"""
+	change = [filled[i + 1] - filled[i] for i in range(len(filled) - 1)]
+	weeklyChange = []
+	for weekStart in range(0, len(filled), DAYS_IN_WEEK):
+		weekEnd = min(weekStart + DAYS_IN_WEEK, len(filled)) - 1
+		weeklyChange.append(filled[weekEnd] - filled[max(weekStart - 1, 0)])
+	return change, weeklyChange
+
+def applyPoint(rollup: dict, capacity: int, seatsAvailable: int, dateTimeRetrieved: datetime.datetime):
+	"""
+	Put one retrieval into the daily series of a rollup, the last retrieval of a
+	day wins and days without one carry the previous value forward.
+	"""
+	day = datetime.datetime.combine(dateTimeRetrieved.date(), datetime.time())
+	filled = filledPercentage(capacity, seatsAvailable)
+	rollup["capacity"] = capacity
+	if "firstDate" not in rollup:
+		rollup["firstDate"] = day
+		rollup["filled"] = [filled]
+		return rollup
+	dayIndex = (day - rollup["firstDate"]).days
+	if dayIndex < 0:
+		return rollup # Older than the whole series, a rebuild takes care of it
+	if dayIndex < len(rollup["filled"]):
+		rollup["filled"][dayIndex] = filled
+	else:
+		rollup["filled"].extend([rollup["filled"][-1]] * (dayIndex - len(rollup["filled"])))
+		rollup["filled"].append(filled)
+	return rollup
+
+def extendRollup(rollup: dict, lastDay: datetime.datetime):
+	"""Carry the last value forward until lastDay, for days that have no retrieval of the section."""
+	missingDays = (lastDay - rollup["firstDate"]).days + 1 - len(rollup["filled"])
+	if missingDays > 0:
+		rollup["filled"].extend([rollup["filled"][-1]] * missingDays)
+	return rollup
+
+def finishRollup(rollup: dict):
+	rollup["change"], rollup["weeklyChange"] = summarizeFilled(rollup["filled"])
+	rollup["lastDate"] = rollup["firstDate"] + datetime.timedelta(days=len(rollup["filled"]) - 1)
+	return rollup
+
+class EnrollmentRollups:
+	"""
+	Materialized daily enrollment of every section, so an enrollment curve is one
+	indexed document fetch instead of a $lookup over the whole sectionsTS history.
+	Only the sections of each saved batch are updated.
+
+	Example of a sectionRollups document:
+	{
+		'semester': 'Spring',
+		'year': 2025,
+		'classNumber': 5385,
+		'capacity': 10,
+		'firstDate': datetime(2024, 11, 4),
+		'lastDate': datetime(2024, 11, 6),
+		'filled': [0.0, 20.0, 30.0], # percentage of seats filled on each day
+		'change': [20.0, 10.0], # change from one day to the next
+		'weeklyChange': [30.0] # change over each week
+	}
+	"""
+	def __init__(self, client: MongoClient, databaseName="courses"):
+		self.collection = client[databaseName]["sectionRollups"]
+
+	def fetch(self, keys):
+		"""Current rollups of the given (semester, year, classNumber) keys with one query per (semester, year)."""
+		classNumbersByTerm = {}
+		for semester, year, classNumber in keys:
+			classNumbersByTerm.setdefault((semester, year), []).append(classNumber)
+		rollups = {}
+		for (semester, year), classNumbers in classNumbersByTerm.items():
+			cursor = self.collection.find({"semester": semester, "year": year, "classNumber": {"$in": classNumbers}}, {"_id": 0})
+			for rollup in cursor:
+				rollups[(rollup["semester"], rollup["year"], rollup["classNumber"])] = rollup
+		return rollups
+
+	def update(self, points: list, ingester: BulkIngester):
+		"""
+		Add (key, capacity, seatsAvailable, dateTimeRetrieved) points to the rollups
+		of their sections. The writes go through the ingester, flush it before the
+		same sections are updated again.
+		"""
+		if len(points) == 0:
+			return
+		rollups = self.fetch(key for key, _, _, _ in points)
+		for key, capacity, seatsAvailable, dateTimeRetrieved in points:
+			if key not in rollups:
+				rollups[key] = {"semester": key[0], "year": key[1], "classNumber": key[2]}
+			applyPoint(rollups[key], capacity, seatsAvailable, dateTimeRetrieved)
+		self.write(rollups, ingester)
+
+	def write(self, rollups: dict, ingester: BulkIngester, lastDays=None):
+		keys = list(rollups)
+		if lastDays is not None:
+			for key in keys:
+				extendRollup(rollups[key], lastDays[(key[0], key[1])])
+		replacements = [
+			ReplaceOne({"semester": key[0], "year": key[1], "classNumber": key[2]}, finishRollup(rollups[key]), upsert=True)
+			for key in keys
+		]
+		ingester.bulkWriteByKey(self.collection, replacements, keys)
+
+	def rebuild(self, client: MongoClient, ingester: BulkIngester):
+		"""Recompute every rollup from the full sectionsTS history, for data saved before rollups existed."""
+		db = client["courses"]
+		capacities = {}
+		for section in db["sections"].find({}, {"semester": 1, "year": 1, "classNumber": 1, "capacity": 1, "_id": 0}):
+			capacities[(section["semester"], section["year"], section["classNumber"])] = section["capacity"]
+		# Delta writes leave out days where nothing changed, so every section of a
+		# term is carried forward until the last retrieval of that term
+		lastDays = {}
+		for term in db["sectionsTS"].aggregate([
+			{"$group": {"_id": {"semester": "$courseInfo.semester", "year": "$courseInfo.year"}, "last": {"$max": "$dateTimeRetrieved"}}}
+		]):
+			lastDays[(term["_id"]["semester"], term["_id"]["year"])] = datetime.datetime.combine(term["last"].date(), datetime.time())
+		rollups = {}
+		cursor = db["sectionsTS"].find({}, {"courseInfo": 1, "seatsAvailable": 1, "dateTimeRetrieved": 1, "_id": 0}).sort(
+			[("courseInfo.semester", 1), ("courseInfo.year", 1), ("courseInfo.classNumber", 1), ("dateTimeRetrieved", 1)]
+		)
+		sectionsRebuilt = 0
+		for entry in cursor:
+			key = (entry["courseInfo"]["semester"], entry["courseInfo"]["year"], entry["courseInfo"]["classNumber"])
+			if key not in capacities:
+				continue
+			if key not in rollups:
+				# The history is sorted by section, so the previous sections are complete
+				if len(rollups) >= ingester.batchSize:
+					self.write(rollups, ingester, lastDays)
+					sectionsRebuilt += len(rollups)
+					rollups = {}
+				rollups[key] = {"semester": key[0], "year": key[1], "classNumber": key[2]}
+			applyPoint(rollups[key], capacities[key], entry["seatsAvailable"], entry["dateTimeRetrieved"])
+		self.write(rollups, ingester, lastDays)
+		ingester.flush()
+		return sectionsRebuilt + len(rollups)
+
+if __name__ == "__main__":
+	# Load the environment variables
+	load_dotenv()
+	client = MongoClient(os.environ['MONGO_URI'])
+	with BulkIngester(client) as ingester:
+		sectionsRebuilt = EnrollmentRollups(client).rebuild(client, ingester)
+	print(f"Rebuilt the enrollment rollups of {sectionsRebuilt} sections")
+	client.close()
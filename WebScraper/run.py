@@ -38,7 +38,7 @@ with open("WebScraper/log.txt", "a") as log:
 	exitCode = subprocess.run([PYTHON_PATH, WEB_SCRAPER_PATH], stdout=log, stderr=log)
 	if exitCode.returncode != 0:
 		log.write("WebScraper run failed.\n")
-		log.write("Attempting to run the WebScraper again...\n")
+		log.write("Attempting to resume the WebScraper run from its checkpoint...\n")
 		log.flush()
 		exitCode = subprocess.run([PYTHON_PATH, WEB_SCRAPER_PATH], stdout=log, stderr=log)
 		if exitCode.returncode != 0:
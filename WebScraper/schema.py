@@ -0,0 +1,111 @@
+import datetime
+import json
+import os
+import sys
+import weakref
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient
+from pymongo.errors import CollectionInvalid
+
+DATABASE_NAME = "courses"
+
+# sectionsTS gets one measurement per section per run, the scraper runs about once a day
+TIME_SERIES_COLLECTIONS = {
+	"sectionsTS": {"timeField": "dateTimeRetrieved", "metaField": "courseInfo", "granularity": "hours"}
+}
+
+# Everything is looked up by (semester, year, classNumber), see sectionState.sectionKey
+INDEXES = {
+	"sections": [
+		IndexModel([("semester", ASCENDING), ("year", ASCENDING), ("classNumber", ASCENDING)], unique=True, name="sectionKey"),
+		IndexModel([("subjectCode", ASCENDING), ("catalogNumber", ASCENDING)], name="courseKey")
+	],
+	"sectionsTS": [
+		# History of one section in time order, used by the $lookup from sections
+		IndexModel([("courseInfo.semester", ASCENDING), ("courseInfo.year", ASCENDING), ("courseInfo.classNumber", ASCENDING), ("dateTimeRetrieved", ASCENDING)], name="sectionHistory"),
+		IndexModel([("dateTimeRetrieved", DESCENDING)], name="latest")
+	],
+	"sectionsLatest": [
+		IndexModel([("semester", ASCENDING), ("year", ASCENDING), ("classNumber", ASCENDING)], unique=True, name="sectionKey"),
+		# Sections of a subject, to find the ones a run did not see again
+		IndexModel([("semester", ASCENDING), ("year", ASCENDING), ("academicCareer", ASCENDING), ("subjectName", ASCENDING)], name="workUnit")
+	],
+	"sectionChanges": [
+		IndexModel([("dateTimeRetrieved", ASCENDING)], name="changesSince"),
+		IndexModel([("semester", ASCENDING), ("year", ASCENDING), ("classNumber", ASCENDING), ("dateTimeRetrieved", ASCENDING)], name="sectionChanges")
+	],
+	"sectionRollups": [
+		IndexModel([("semester", ASCENDING), ("year", ASCENDING), ("classNumber", ASCENDING)], unique=True, name="sectionKey")
+	],
+	"courseCatalog": [
+		IndexModel([("subjectCode", ASCENDING), ("catalogNumber", ASCENDING)], unique=True, name="courseKey"),
+		IndexModel([("instructors", ASCENDING)], name="instructors")
+	]
+}
+
+# Queries the scraper and the backend run all the time, each of them has to be answered from an index
+QUERY_SHAPES = {
+	"section by key": ("sections", {"semester": "Spring", "year": 2025, "classNumber": 5385}, None),
+	"sections of a course": ("sections", {"subjectCode": "ECE", "catalogNumber": "421"}, None),
+	"history of a section": ("sectionsTS", {"courseInfo.semester": "Spring", "courseInfo.year": 2025, "courseInfo.classNumber": 5385}, [("dateTimeRetrieved", ASCENDING)]),
+	"latest retrieval": ("sectionsTS", {}, [("dateTimeRetrieved", DESCENDING)]),
+	"latest state of a section": ("sectionsLatest", {"semester": "Spring", "year": 2025, "classNumber": 5385}, None),
+	"sections of a subject": ("sectionsLatest", {"semester": "Spring", "year": 2025, "academicCareer": "Undergraduate", "subjectName": "Music Ensemble"}, None),
+	"changes since a run": ("sectionChanges", {"dateTimeRetrieved": {"$gt": datetime.datetime(2025, 2, 27, 23)}}, [("dateTimeRetrieved", ASCENDING)]),
+	"enrollment rollup of a section": ("sectionRollups", {"semester": "Spring", "year": 2025, "classNumber": 5385}, None),
+	"catalog entry of a course": ("courseCatalog", {"subjectCode": "ECE", "catalogNumber": "421"}, None),
+	"courses of an instructor": ("courseCatalog", {"instructors": "Kamal Premaratne"}, None)
+}
+
+ensuredClients = weakref.WeakSet()
+
+def isTimeSeries(db, name: str):
+	collection = next(db.list_collections(filter={"name": name}), None)
+	return collection is not None and collection.get("type") == "timeseries"
+
+def ensureSchema(client: MongoClient, force=False):
+	"""
+	Create the time series collections and the indexes that are missing.
+	Only checks the database once per client unless force is set, so it can be
+	called before every ingestion.
+	"""
+	if client in ensuredClients and not force:
+		return
+	db = client[DATABASE_NAME]
+	existing = set(db.list_collection_names())
+	for name, options in TIME_SERIES_COLLECTIONS.items():
+		if name not in existing:
+			try:
+				db.create_collection(name, timeseries=options)
+			except CollectionInvalid:
+				pass # Created by another writer in the meantime
+		elif not isTimeSeries(db, name):
+			# A regular collection can not be turned into a time series one in place
+			print(f"Warning: {name} is not a time series collection, copy it into a new one created with {options}")
+	for name, indexes in INDEXES.items():
+		db[name].create_indexes(indexes)
+	ensuredClients.add(client)
+
+def checkQueryShapes(client: MongoClient):
+	"""Map each query of QUERY_SHAPES to whether its winning plan uses an index."""
+	db = client[DATABASE_NAME]
+	usesIndex = {}
+	for shape, (name, queryFilter, sort) in QUERY_SHAPES.items():
+		cursor = db[name].find(queryFilter).limit(1)
+		if sort is not None:
+			cursor = cursor.sort(sort)
+		plan = cursor.explain()
+		usesIndex[shape] = "IXSCAN" in json.dumps(plan, default=str)
+	return usesIndex
+
+if __name__ == "__main__":
+	# Load the environment variables
+	load_dotenv()
+	client = MongoClient(os.environ['MONGO_URI'])
+	ensureSchema(client)
+	for name in INDEXES:
+		print(name, sorted(client[DATABASE_NAME][name].index_information()))
+	if "--check" in sys.argv:
+		for shape, usesIndex in checkQueryShapes(client).items():
+			print(f"{shape}: {'index' if usesIndex else 'COLLECTION SCAN'}")
+	client.close()
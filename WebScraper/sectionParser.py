@@ -0,0 +1,219 @@
+import datetime
+from typing import Iterator
+from course import course
+from parsing import parseTime, parseDateRange, parseStatusText, parseSeatCount, mapDays
+
+STRINGS_IN_EACH_TABLE_ROW = 6 # number of strings in each row of the meeting patterns table (for sections with multiple meetings)
+STRINGS_IN_EACH_TABLE_ROW_WITH_TOPIC = 7 # number of strings in each row of the meeting patterns table with the additional 'Topic' column (for sections with multiple meetings)
+# Offsets of the strings of a section from its header, for each layout
+REGULAR_STATUS_OFFSET = 8 # header, session, days, start, end, classroom, instructor, dates, status
+MEETINGS_SUMMARY_STATUS_OFFSET = 14 # header, session, 6 "Meeting 1: ..." strings, days ... dates of the last meeting, status
+SINGLE_DAY_STATUS_OFFSET = 3 # header, session, days, status (the meetings are only in the meeting patterns table)
+MINIMAL_STATUS_OFFSET = 2 # header, session, status
+WAITLIST_TEXT_MINIMUM = 50 # "0 of 300" after a waitlist status repeats the waitlist seats
+MEETING_PATTERNS_STATUS_OFFSETS = (MEETINGS_SUMMARY_STATUS_OFFSET, SINGLE_DAY_STATUS_OFFSET) # layouts whose meetings are only in the meeting patterns table
+
+def readStatus(classInfo: list[str], statusIndex: int):
+	"""
+	(parseStatusText of the status string, index of the reserved seats string or None,
+	index of the first string of the next section) of the status of a section.
+	"""
+	statusText = parseStatusText(classInfo[statusIndex])
+	hasReservedSeats = statusText[5]
+	isWaitlist = statusText[3] is not None
+	# Without the "reserved" note, a "5 of 5" after the status (after the waitlist text of a waitlist) are the reserved seats
+	if not hasReservedSeats and len(classInfo) > statusIndex + 2:
+		hasReservedSeats = parseSeatCount(classInfo[statusIndex + (2 if isWaitlist else 1)]) is not None
+	nextIndex = statusIndex + 1
+	if isWaitlist and len(classInfo) > nextIndex:
+		waitlistSeats = parseSeatCount(classInfo[nextIndex])
+		if waitlistSeats is not None and waitlistSeats[1] > WAITLIST_TEXT_MINIMUM:
+			nextIndex += 1 # Skip the waitlist text
+	reservedSeatsIndex = None
+	if hasReservedSeats:
+		reservedSeatsIndex = nextIndex
+		nextIndex += 1
+	return statusText, reservedSeatsIndex, nextIndex
+
+def parseStatus(currentCourse: course, classInfo: list[str], statusIndex: int):
+	"""
+	Set the status and seats of a section from its status string and the strings
+	after it, returns the index of the first string of the next section.
+
+	Examples of what follows the session, from the status on:
+	'Open, 10 of 10 seats available'
+	'Waitlist, 300 of 300 waitlist seats available. 40 of 40 seats available.'
+	'Open, 5 of 12 seats available, reserved seats available', '5 of 5'
+	'Waitlist, 295 of 300 waitlist seats available. 0 of 40 seats available.', '295 of 300', '5 of 5'
+	"""
+	statusText, reservedSeatsIndex, nextIndex = readStatus(classInfo, statusIndex)
+	status, seatsAvailable, capacity, waitlistAvailable, waitlistCapacity, _ = statusText
+	currentCourse.status = status
+	currentCourse.seatsAvailable = seatsAvailable
+	currentCourse.capacity = capacity
+	if waitlistAvailable is not None:
+		currentCourse.waitlistAvailable = waitlistAvailable
+		currentCourse.waitlistCapacity = waitlistCapacity
+	if reservedSeatsIndex is not None:
+		currentCourse.addReservedSeats(*parseSeatCount(classInfo[reservedSeatsIndex]))
+	return nextIndex
+
+def sectionLayout(classInfo: list[str], i: int):
+	"""Offset of the status string from the header classInfo[i] of a section, one of the *_STATUS_OFFSET layouts."""
+	firstDay = classInfo[i + 2].split(None, 1)[0]
+	if firstDay not in course.allDays:
+		# A status string ends with a comma
+		return MEETINGS_SUMMARY_STATUS_OFFSET if firstDay[:-1] not in course.allStatuses else MINIMAL_STATUS_OFFSET
+	try:
+		parseTime(classInfo[i + 3])
+		parseTime(classInfo[i + 4])
+		return REGULAR_STATUS_OFFSET
+	except ValueError:
+		# "-" for sections without a meeting time, anything else is the status
+		return REGULAR_STATUS_OFFSET if classInfo[i + 3] == "-" else SINGLE_DAY_STATUS_OFFSET
+
+def meetingPatternSections(classInfo: list[str]) -> Iterator[int]:
+	"""
+	Index in the card of every section parseSections yields with hasMeetingPatterns,
+	from the layout of the strings alone, without parsing the sections.
+	"""
+	sectionIndex = 0
+	i = 0
+	while i < len(classInfo):
+		statusOffset = sectionLayout(classInfo, i)
+		if statusOffset in MEETING_PATTERNS_STATUS_OFFSETS:
+			yield sectionIndex
+		i = readStatus(classInfo, i + statusOffset)[2]
+		sectionIndex += 1
+
+def parseSections(classInfo: list[str], className: str, subjectName: str, academicCareer: str, term: str,
+	dateTimeRetrieved: datetime.datetime) -> Iterator[tuple[course, int, bool]]:
+	"""
+	Walk the sr-only strings of one class card once and yield
+	(section, index of the section in the card, hasMeetingPatterns) for every section.
+	classInfo is not modified. Sections with hasMeetingPatterns have multiple meetings
+	that are only listed in their meeting patterns table, fill them in with fillMeetingPatterns.
+
+	The string after the session decides the layout of a section:
+	- days ('Tuesday Thursday'): regular section, times, classroom, instructor, dates and status follow.
+		A status instead of the start time means the meetings are in the meeting patterns table.
+	- a status ('Open,'): almost no information, only the status.
+	- anything else ('Meeting 1: Wednesday . Meeting 2: ...'): multiple meetings, a summary of
+		every meeting and the strings of the last meeting come before the status.
+
+	Example of className:
+	'Small Contemporary Ensemble | MDE 139'
+
+	Example of classInfo:
+	0. ENS Section AMS, Class Number5385
+	1. Regular Academic
+	2. Friday
+	3. 10:10 am
+	4. 1:10 pm
+	5. Frost North Studio 330
+	6. Roxana Amed, Reynaldo Sanchez
+	7. 01/13 - 04/28
+	8. Open, 10 of 10 seats available
+	9. Lecture Section C4J, Class Number9426
+	10. Regular Academic
+	11. Meeting 1: Wednesday . Meeting 2: Monday Wednesday Friday
+	12. Meeting 1: 5:05 pm. Meeting 2: 10:10 am
+	13. Meeting 1: 6:20 pm. Meeting 2: 11:00 am
+	14. Meeting 1: Cox Science 126. Meeting 2: Whitten LC 170
+	15. Meeting 1: Charles Mallery. Meeting 2: Charles Mallery
+	16. Meeting 1: 01/1304/28. Meeting 2: 01/1304/28
+	17. Monday Wednesday Friday
+	18. 10:10 am
+	19. 11:00 am
+	20. Whitten LC 170
+	21. Charles Mallery
+	22. 01/13 - 04/28
+	23. Open, 170 of 170 seats available
+	24. Lecture Section 01, Class Number7616
+	25. Regular Academic
+	26. Open, 10 of 10 seats available
+
+	Yields the sections 5385 (0, False), 9426 (1, True) and 7616 (2, False).
+	"""
+	name, courseCode = className.split(" | ")[:2]
+	subjectCode, catalogNumber = courseCode.split(" ")[:2]
+	semester, year = term.split(" ")[:2]
+	year = int(year)
+	sectionIndex = 0
+	i = 0
+	while i < len(classInfo):
+		currentCourse = course(dateTimeRetrieved)
+		currentCourse.name = name
+		currentCourse.subjectName = subjectName
+		currentCourse.subjectCode = subjectCode
+		currentCourse.catalogNumber = catalogNumber
+		currentCourse.academicCareer = academicCareer
+		currentCourse.semester = semester
+		currentCourse.year = year
+		sectionText, classNumberText = classInfo[i].split(", ")[:2]
+		sectionWords = sectionText.split(" ")
+		currentCourse.sectionType = sectionWords[0]
+		currentCourse.sectionCode = sectionWords[2]
+		currentCourse.classNumber = int(classNumberText.split(" ")[1].replace("Number", ""))
+		currentCourse.session = classInfo[i + 1]
+		statusOffset = sectionLayout(classInfo, i)
+		currentCourse.days = classInfo[i + 2].split() if statusOffset != MINIMAL_STATUS_OFFSET else []
+		if statusOffset == REGULAR_STATUS_OFFSET:
+			if classInfo[i + 3] != "-":
+				currentCourse.timeStart = parseTime(classInfo[i + 3])
+				currentCourse.timeEnd = parseTime(classInfo[i + 4])
+			currentCourse.classroom = classInfo[i + 5]
+			currentCourse.instructor = classInfo[i + 6].split(",\n\r")
+			currentCourse.startDate, currentCourse.endDate = parseDateRange(classInfo[i + 7], year)
+		hasMeetingPatterns = statusOffset in MEETING_PATTERNS_STATUS_OFFSETS
+		nextIndex = parseStatus(currentCourse, classInfo, i + statusOffset)
+		yield currentCourse, sectionIndex, hasMeetingPatterns
+		sectionIndex += 1
+		i = nextIndex
+
+def fillMeetingPatterns(currentCourse: course, meetingPatternsInfo: list[str]):
+	"""Fill the list-valued meeting fields of a section with multiple meetings from the cells of its meeting patterns table."""
+	stringsInEachRow = STRINGS_IN_EACH_TABLE_ROW if len(meetingPatternsInfo) % STRINGS_IN_EACH_TABLE_ROW == 0 else STRINGS_IN_EACH_TABLE_ROW_WITH_TOPIC
+	# create multiple meetings structure
+	currentCourse.multipleMeetings = True
+	if stringsInEachRow == STRINGS_IN_EACH_TABLE_ROW_WITH_TOPIC:
+		currentCourse.addTopic([])
+	currentCourse.startDate = []
+	currentCourse.endDate = []
+	currentCourse.instructor = []
+	currentCourse.days = []
+	currentCourse.timeStart = []
+	currentCourse.timeEnd = []
+	currentCourse.classroom = []
+
+	# create one course object that consists of information for every meeting
+	for j in range(0, len(meetingPatternsInfo), stringsInEachRow):
+		# fill in information that is different for each meeting
+		"""
+		Example of meetingPatternsInfo:
+		0: 01/15/2025 - 03/05/2025
+		1: Mark Friedman
+		2: We
+		3: 6:30PM
+		4: 8:50PM
+		5: Online Instruction ONL
+		6: 03/18/2025 - 04/22/2025
+		7: Mark Friedman
+		8: Tu
+		9: 12:30PM
+		10: 1:45PM
+		11: Stubblefield 204
+		"""
+		startDate, endDate = parseDateRange(meetingPatternsInfo[j])
+		currentCourse.startDate.append(startDate)
+		currentCourse.endDate.append(endDate)
+		currentCourse.instructor.append(meetingPatternsInfo[j + 1].replace("\n\r", " ").split(", "))
+		currentCourse.days.append(course.mapDaysAbrvToFull(meetingPatternsInfo[j + 2]))
+		if meetingPatternsInfo[j + 3] != "-":
+			currentCourse.timeStart.append(parseTime(meetingPatternsInfo[j + 3]))
+		if meetingPatternsInfo[j + 4] != "-":
+			currentCourse.timeEnd.append(parseTime(meetingPatternsInfo[j + 4]))
+		currentCourse.classroom.append(meetingPatternsInfo[j + 5])
+		if stringsInEachRow == STRINGS_IN_EACH_TABLE_ROW_WITH_TOPIC:
+			currentCourse.topic.append(meetingPatternsInfo[j + 6])
+	return currentCourse
@@ -0,0 +1,102 @@
+import datetime
+import hashlib
+import json
+from pymongo import MongoClient, UpdateOne
+
+DYNAMIC_FIELDS = ("status", "seatsAvailable", "waitlistAvailable") # fields stored in sectionsTS
+UNTRACKED_FIELDS = DYNAMIC_FIELDS + ("dateTimeRetrieved",) # fields that do not make a section "changed"
+
+def sectionKey(semester: str, year: int, classNumber: int):
+	return (semester, year, classNumber)
+
+def staticHash(sectionDocument: dict):
+	"""
+	Stable hash of the fields createCourseReplacement writes to sections,
+	ignoring the time series fields and the retrieval time.
+	"""
+	staticFields = {key: value for key, value in sectionDocument.items() if key not in UNTRACKED_FIELDS}
+	serialized = json.dumps(staticFields, sort_keys=True, default=str)
+	return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+class SectionStateCache:
+	"""
+	Last known state of every section (its time series values and the hash of
+	its static fields), kept in memory for the run and persisted in the
+	sectionsLatest collection between runs.
+
+	Example of a sectionsLatest document:
+	{
+		'semester': 'Spring',
+		'year': 2025,
+		'classNumber': 5385,
+		'status': 'Open',
+		'seatsAvailable': 10,
+		'waitlistAvailable': 300,
+		'staticHash': '5f1c...'
+	}
+	"""
+	def __init__(self, client: MongoClient):
+		self.collection = client["courses"]["sectionsLatest"]
+		self.states = {}
+
+	def prefetch(self, keys):
+		"""Load the states that are not cached yet with one query per (semester, year)."""
+		missing = {}
+		for semester, year, classNumber in keys:
+			if (semester, year, classNumber) not in self.states:
+				missing.setdefault((semester, year), []).append(classNumber)
+		for (semester, year), classNumbers in missing.items():
+			cursor = self.collection.find(
+				{"semester": semester, "year": year, "classNumber": {"$in": classNumbers}},
+				{"_id": 0}
+			)
+			for state in cursor:
+				self.states[sectionKey(state["semester"], state["year"], state["classNumber"])] = state
+
+	def get(self, key):
+		return self.states.get(key)
+
+	def save(self, states: list):
+		if len(states) == 0:
+			return
+		updates = []
+		for state in states:
+			self.states[sectionKey(state["semester"], state["year"], state["classNumber"])] = state
+			updates.append(UpdateOne(
+				{"semester": state["semester"], "year": state["year"], "classNumber": state["classNumber"]},
+				{"$set": state},
+				upsert=True
+			))
+		self.collection.bulk_write(updates, ordered=False)
+
+def reconstructDailySeries(points: list, runDates: list):
+	"""
+	Rebuild a dense daily series for one section from change-only sectionsTS
+	points by carrying the last known values forward to every run date.
+	Run dates before the first point are left out.
+
+	Example:
+	points = [{'dateTimeRetrieved': datetime(2025, 1, 1, 23), 'seatsAvailable': 10, ...},
+						{'dateTimeRetrieved': datetime(2025, 1, 3, 23), 'seatsAvailable': 8, ...}]
+	runDates = [date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3)]
+	-> seatsAvailable of 10, 10 and 8 for the three days
+	"""
+	points = sorted(points, key=lambda point: point["dateTimeRetrieved"])
+	series = []
+	lastPoint = None
+	pointIndex = 0
+	for runDate in sorted(runDates):
+		while pointIndex < len(points) and points[pointIndex]["dateTimeRetrieved"].date() <= runDate:
+			lastPoint = points[pointIndex]
+			pointIndex += 1
+		if lastPoint is None:
+			continue
+		densePoint = dict(lastPoint)
+		densePoint["dateTimeRetrieved"] = datetime.datetime.combine(runDate, lastPoint["dateTimeRetrieved"].time())
+		series.append(densePoint)
+	return series
+
+def getRunDates(client: MongoClient):
+	"""Dates of the completed scraper runs, taken from their checkpoints."""
+	checkpoints = client["courses"]["scrapeCheckpoints"].find({"complete": True}, {"runDate": 1, "_id": 0})
+	return sorted(datetime.date.fromisoformat(checkpoint["runDate"]) for checkpoint in checkpoints)
@@ -0,0 +1,145 @@
+from abc import ABC, abstractmethod
+from course import course
+from pymongo import MongoClient
+from sectionState import SectionStateCache
+from ingest import BulkIngester
+from checkpoint import FileLastRun, MongoLastRun
+from schema import ensureSchema
+from changeFeed import ChangeFeed
+
+DEFAULT_BATCH_SIZE = 1000 # maximum number of sections held in memory before they are written
+
+class CourseSink(ABC):
+	"""
+	Buffers sections as the scraper produces them and writes them out in bounded
+	batches. The buffer is also flushed whenever the subject changes, so every
+	completed subject is already saved if the run dies later on.
+
+	Example:
+	with MongoSink(client) as sink:
+		for section in scraper.scrape_term("Spring 2025"):
+			sink.add(section)
+	"""
+	def __init__(self, batchSize=DEFAULT_BATCH_SIZE, checkpoint=None):
+		self.batchSize = batchSize
+		self.checkpoint = checkpoint
+		self.buffer = []
+		self.currentUnit = None
+		self.sectionsWritten = 0
+		self.workUnitsIncomplete = 0 # the run is only complete once every work unit completed
+		self.lastRun = None # manifest of the newest saved data, see checkpoint.LastRun
+		self.unrecordedDateTime = None # newest dateTimeRetrieved written but not yet recorded in lastRun
+		self.metrics = None # RunMetrics the time spent writing is recorded to
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		if excType is None:
+			self.close()
+		else:
+			# Only the subject that was being scraped is in the buffer, drop it so it is not saved half done
+			self.buffer = []
+
+	@staticmethod
+	def workUnitOf(section: course):
+		return (section.semester, section.year, section.academicCareer, section.subjectName)
+
+	def add(self, section: course):
+		unit = CourseSink.workUnitOf(section)
+		if unit != self.currentUnit:
+			self.flush()
+			self.currentUnit = unit
+		self.buffer.append(section)
+		if len(self.buffer) >= self.batchSize:
+			self.flush()
+
+	def addAll(self, sections):
+		for section in sections:
+			self.add(section)
+
+	def flush(self):
+		if len(self.buffer) == 0:
+			return
+		if self.metrics is None:
+			self.write(self.buffer)
+		else:
+			semester, year, academicCareer, subjectName = self.currentUnit
+			workUnit = (f"{semester} {year}", academicCareer, subjectName)
+			with self.metrics.timer("write", workUnit):
+				self.write(self.buffer)
+			self.metrics.count("sectionsWritten", len(self.buffer), workUnit)
+		self.sectionsWritten += len(self.buffer)
+		newestDateTime = max(section.dateTimeRetrieved for section in self.buffer)
+		if self.unrecordedDateTime is None or newestDateTime > self.unrecordedDateTime:
+			self.unrecordedDateTime = newestDateTime
+		self.buffer = []
+
+	def recordLastRun(self):
+		# Only once a work unit is checkpointed (or the sink closed), a manifest dated
+		# today without a checkpoint would make a crashed run look complete
+		if self.lastRun is not None and self.unrecordedDateTime is not None:
+			self.lastRun.record(self.unrecordedDateTime, self.sectionsWritten)
+		self.unrecordedDateTime = None
+
+	def endWorkUnit(self, workUnit: tuple[str, str, str], completed=True):
+		# Everything of this (term, career, subject) is written before it is checkpointed,
+		# a unit that did not complete (e.g. its search timed out) is left for a resumed run
+		self.flush()
+		if not completed:
+			self.workUnitsIncomplete += 1
+		else:
+			if self.checkpoint is not None:
+				self.checkpoint.markDone(workUnit)
+			self.recordLastRun()
+
+	@abstractmethod
+	def write(self, sections: list):
+		"""Save one batch of sections, all of them from the same work unit."""
+
+	def close(self):
+		self.flush()
+		self.recordLastRun()
+
+class CsvSink(CourseSink):
+	def __init__(self, filename: str, batchSize=DEFAULT_BATCH_SIZE, checkpoint=None):
+		super().__init__(batchSize, checkpoint)
+		self.filename = filename
+		self.lastRun = FileLastRun.forCsv(filename)
+
+	def write(self, sections: list):
+		course.saveCoursesToCsv(sections, self.filename)
+
+class MongoSink(CourseSink):
+	def __init__(self, client: MongoClient, batchSize=DEFAULT_BATCH_SIZE, checkpoint=None, deltaWrites=False, changeFeed=False, changesFilename=None):
+		super().__init__(batchSize, checkpoint)
+		self.client = client
+		ensureSchema(client)
+		# Only write what changed since the last known state of each section
+		self.stateCache = SectionStateCache(client) if deltaWrites else None
+		self.ingester = BulkIngester(client)
+		self.lastRun = MongoLastRun(client)
+		# Change events to sectionChanges, or to changesFilename as JSON lines
+		self.changeFeed = ChangeFeed(client, self.stateCache, changesFilename) if changeFeed else None
+
+	def write(self, sections: list):
+		course.saveCoursesToMongodb(self.client, sections, self.stateCache, self.ingester, self.changeFeed)
+
+	def endWorkUnit(self, workUnit: tuple[str, str, str], completed=True):
+		# The removed sections of a subject are known once all of it is written, and reported before it is checkpointed
+		self.flush()
+		if self.changeFeed is not None:
+			self.changeFeed.endWorkUnit(workUnit, self.ingester, completed)
+		super().endWorkUnit(workUnit, completed)
+
+	def __exit__(self, excType, excValue, traceback):
+		super().__exit__(excType, excValue, traceback)
+		if excType is not None:
+			# Batches of the subjects that were already completed are still written
+			self.ingester.close()
+
+	def close(self):
+		try:
+			super().close()
+		finally:
+			self.ingester.close()
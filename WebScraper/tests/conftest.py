@@ -0,0 +1,32 @@
+import datetime
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from sectionParser import parseSections, fillMeetingPatterns
+
+GOLDEN_FILENAME = os.path.join(os.path.dirname(__file__), "..", "fixtures", "sections", "golden.json")
+
+def loadGolden():
+	with open(GOLDEN_FILENAME, "r") as file:
+		return json.load(file)
+
+def parseCase(case: dict, dateTimeRetrieved: datetime.datetime):
+	"""Same steps as Scraper.parseClassSections, with the recorded meeting patterns instead of the browser."""
+	sections = []
+	for section, _, hasMeetingPatterns in parseSections(case["classInfo"], case["className"], case["subjectName"],
+		case["academicCareer"], case["term"], dateTimeRetrieved):
+		if hasMeetingPatterns:
+			fillMeetingPatterns(section, case["meetingPatterns"][str(section.classNumber)])
+		sections.append(section)
+	return sections
+
+@pytest.fixture
+def resultsPageSections():
+	"""Sections of the class cards recorded from the BIL and MDE results page fixtures."""
+	golden = loadGolden()
+	dateTimeRetrieved = datetime.datetime.fromisoformat(golden["dateTimeRetrieved"])
+	return [section for case in golden["cases"] if case["description"].endswith("results page fixture")
+		for section in parseCase(case, dateTimeRetrieved)]
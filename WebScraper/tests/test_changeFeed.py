@@ -0,0 +1,84 @@
+import copy
+import json
+import pytest
+from changeFeed import ChangeFeed, changedFields, INSERTED, UPDATED, REMOVED
+
+mongomock = pytest.importorskip("mongomock")
+
+WORK_UNIT = ("Spring 2025", "Undergraduate", "Music Ensemble")
+
+@pytest.fixture
+def client():
+	return mongomock.MongoClient()
+
+def saveRun(client, sections):
+	"""What MongoSink saves for the sections of a run, without the time series and the change events."""
+	_, states = ChangeFeed(client).diff(sections)
+	client["courses"]["sectionsLatest"].insert_many(states)
+	client["courses"]["sections"].insert_many([section.to_bson() for section in sections])
+
+def readEvents(filename):
+	if not filename.exists():
+		return []
+	with open(filename, "r") as file:
+		return [json.loads(line) for line in file]
+
+def test_changedFieldsIgnoresTimeSeriesFieldsAndEmptyDefaults():
+	previousDocument = {"_id": 1, "name": "Genetics", "status": "Open", "topic": None, "instructor": []}
+	document = {"name": "Genetics II", "status": "Closed", "topic": None, "instructor": ()}
+	assert changedFields(previousDocument, document) == {"name": {"from": "Genetics", "to": "Genetics II"}}
+
+def test_firstRunInsertsEverySection(client, resultsPageSections):
+	events, states = ChangeFeed(client).diff(resultsPageSections)
+	assert [event["type"] for event in events] == [INSERTED] * len(resultsPageSections)
+	assert all("section" in event for event in events)
+	assert len(states) == len(resultsPageSections)
+
+def test_unchangedSectionsHaveNoEvents(client, resultsPageSections):
+	saveRun(client, resultsPageSections)
+	events, states = ChangeFeed(client).diff(resultsPageSections)
+	assert events == []
+	assert states == []
+
+def test_updatedSectionNamesTheChangedFields(client, resultsPageSections):
+	saveRun(client, resultsPageSections)
+	changed = copy.copy(resultsPageSections[0])
+	changed.seatsAvailable -= 1
+	changed.name = "Renamed"
+	events, _ = ChangeFeed(client).diff([changed] + resultsPageSections[1:])
+	assert len(events) == 1
+	assert events[0]["type"] == UPDATED
+	assert events[0]["classNumber"] == changed.classNumber
+	assert events[0]["changes"] == {
+		"seatsAvailable": {"from": changed.seatsAvailable + 1, "to": changed.seatsAvailable},
+		"name": {"from": resultsPageSections[0].name, "to": "Renamed"}
+	}
+
+def test_missingSectionsOfCompletedSubjectAreRemoved(client, resultsPageSections, tmp_path):
+	saveRun(client, resultsPageSections)
+	subjectSections = [section for section in resultsPageSections if section.subjectName == WORK_UNIT[2]]
+	feed = ChangeFeed(client, filename=tmp_path / "changes.jsonl")
+	feed.diff(subjectSections[1:])
+	feed.endWorkUnit(WORK_UNIT, None)
+	events = readEvents(tmp_path / "changes.jsonl")
+	assert [(event["type"], event["classNumber"]) for event in events] == [(REMOVED, subjectSections[0].classNumber)]
+	assert client["courses"]["sectionsLatest"].count_documents({"classNumber": subjectSections[0].classNumber}) == 0
+	# Only reported once
+	feed.endWorkUnit(WORK_UNIT, None)
+	assert len(readEvents(tmp_path / "changes.jsonl")) == 1
+
+def test_incompleteSubjectRemovesNothing(client, resultsPageSections, tmp_path):
+	saveRun(client, resultsPageSections)
+	feed = ChangeFeed(client, filename=tmp_path / "changes.jsonl")
+	feed.diff([section for section in resultsPageSections if section.subjectName == WORK_UNIT[2]][1:])
+	feed.endWorkUnit(WORK_UNIT, None, completed=False)
+	assert readEvents(tmp_path / "changes.jsonl") == []
+	assert client["courses"]["sectionsLatest"].count_documents({}) == len(resultsPageSections)
+
+def test_subjectWithoutSectionsRemovesNothing(client, resultsPageSections, tmp_path):
+	saveRun(client, resultsPageSections)
+	feed = ChangeFeed(client, filename=tmp_path / "changes.jsonl")
+	feed.diff([section for section in resultsPageSections if section.subjectName != WORK_UNIT[2]])
+	feed.endWorkUnit(WORK_UNIT, None)
+	assert readEvents(tmp_path / "changes.jsonl") == []
+	assert client["courses"]["sectionsLatest"].count_documents({}) == len(resultsPageSections)
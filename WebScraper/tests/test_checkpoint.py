@@ -0,0 +1,76 @@
+import csv
+import datetime
+import json
+import pytest
+from checkpoint import FileCheckpoint, COLLECTED, NOT_COLLECTED, PARTIALLY_COLLECTED
+from course import readLastCsvRow
+
+SCOPE = ("Spring 2025", "", "")
+WORK_UNITS = [("Spring 2025", "Undergraduate", "Biology"), ("Spring 2025", "Undergraduate", "Music Ensemble"), ("Spring 2025", "Graduate", "Biology")]
+
+@pytest.fixture
+def filename(tmp_path):
+	return str(tmp_path / "courses.csv")
+
+def test_resumedRunSkipsCompletedWorkUnits(filename):
+	checkpoint = FileCheckpoint.forCsv(filename, SCOPE).load()
+	checkpoint.markDone(WORK_UNITS[0])
+	resumed = FileCheckpoint.forCsv(filename, SCOPE).load()
+	assert resumed.status() == PARTIALLY_COLLECTED
+	assert [workUnit for workUnit in WORK_UNITS if not resumed.isDone(workUnit)] == WORK_UNITS[1:]
+
+def test_completeRunIsCollected(filename):
+	checkpoint = FileCheckpoint.forCsv(filename, SCOPE).load()
+	for workUnit in WORK_UNITS:
+		checkpoint.markDone(workUnit)
+	checkpoint.markRunComplete()
+	assert FileCheckpoint.forCsv(filename, SCOPE).load().status() == COLLECTED
+
+def test_otherScopeStartsOver(filename):
+	checkpoint = FileCheckpoint.forCsv(filename, SCOPE).load()
+	checkpoint.markDone(WORK_UNITS[0])
+	other = FileCheckpoint.forCsv(filename, ("Spring 2025", "Graduate", "")).load()
+	assert other.status() == NOT_COLLECTED
+	assert not other.isDone(WORK_UNITS[0])
+
+def test_checkpointOfAnotherDayStartsOver(filename):
+	checkpoint = FileCheckpoint.forCsv(filename, SCOPE).load()
+	checkpoint.markDone(WORK_UNITS[0])
+	with open(checkpoint.filename, "r") as file:
+		state = json.load(file)
+	state["runDate"] = (datetime.date.fromisoformat(state["runDate"]) - datetime.timedelta(days=1)).isoformat()
+	with open(checkpoint.filename, "w") as file:
+		json.dump(state, file)
+	assert FileCheckpoint.forCsv(filename, SCOPE).load().status() == NOT_COLLECTED
+
+def writeCsv(filename, rows, header=("name", "notes", "dateTimeRetrieved")):
+	with open(filename, "w", newline="") as file:
+		writer = csv.writer(file)
+		writer.writerow(header)
+		writer.writerows(rows)
+
+def test_lastRowOfMissingOrEmptyFileIsNone(filename):
+	assert readLastCsvRow(filename) is None
+	open(filename, "w").close()
+	assert readLastCsvRow(filename) is None
+
+@pytest.mark.parametrize("afterHeader", ["", "\n", "\r\n\r\n"])
+def test_lastRowOfHeaderOnlyFileIsNone(filename, afterHeader):
+	with open(filename, "w", newline="") as file:
+		file.write("name,notes,dateTimeRetrieved\r\n" + afterHeader)
+	assert readLastCsvRow(filename) is None
+
+@pytest.mark.parametrize("blockSize", [4, 16, 4096])
+def test_lastRowWithQuotedNewlines(filename, blockSize):
+	rows = [["General Biology", "NULL", "2025-02-27 23:05:07"],
+		["Genetics", "first line\nsecond line, \"quoted\"\nthird line", "2025-02-28 23:05:07"]]
+	writeCsv(filename, rows)
+	assert readLastCsvRow(filename, blockSize) == {"name": "Genetics", "notes": rows[1][1], "dateTimeRetrieved": "2025-02-28 23:05:07"}
+
+@pytest.mark.parametrize("blockSize", [8, 64, 4096])
+def test_lastRowMatchesDictReader(filename, blockSize):
+	rows = [[f"Section {i}", "note\nwith a newline" if i % 3 == 0 else "NULL", f"2025-02-{i % 28 + 1:02d} 23:05:07"] for i in range(200)]
+	writeCsv(filename, rows)
+	with open(filename, "r", newline="") as file:
+		expected = list(csv.DictReader(file))[-1]
+	assert readLastCsvRow(filename, blockSize) == expected
@@ -0,0 +1,148 @@
+import csv
+import datetime
+import pytest
+from course import course
+from csvToMongodb import readChunks, convertChunk
+from conftest import loadGolden, parseCase
+
+@pytest.fixture
+def goldenSections():
+	golden = loadGolden()
+	dateTimeRetrieved = datetime.datetime.fromisoformat(golden["dateTimeRetrieved"])
+	return [section for case in golden["cases"] for section in parseCase(case, dateTimeRetrieved)]
+
+def importCsv(filename, chunkSize=30000):
+	courses = []
+	coursesTS = []
+	for header, rows in readChunks(filename, chunkSize):
+		chunkCourses, chunkCoursesTS = convertChunk(header, rows)
+		courses.extend(chunkCourses)
+		coursesTS.extend(chunkCoursesTS)
+	return courses, coursesTS
+
+def expectedDocument(section: course):
+	"""to_bson of a scraped section the way the csv stores it."""
+	document = section.to_bson()
+	for field in ("timeStart", "timeEnd"):
+		# A meeting without a time has no entry in the scraped list but a NULL row in the csv
+		if section.multipleMeetings:
+			document[field] = list(document[field]) + [None] * (section.meetingCount() - len(document[field]))
+	if not section.multipleMeetings:
+		# One row holds every instructor of a single meeting joined by ", "
+		document["instructor"] = [name for names in document["instructor"] for name in names.split(", ")]
+		document["classroom"] = None if document["classroom"] == "NULL" else document["classroom"]
+	return document
+
+def test_goldenSectionsSurviveCsvRoundTrip(goldenSections, tmp_path):
+	filename = str(tmp_path / "courses.csv")
+	course.saveCoursesToCsv(goldenSections, filename)
+	courses, coursesTS = importCsv(filename)
+	assert courses == [expectedDocument(section) for section in goldenSections]
+	assert [(entry["courseInfo"]["classNumber"], entry["status"], entry["seatsAvailable"]) for entry in coursesTS] == \
+		[(section.classNumber, section.status, section.seatsAvailable) for section in goldenSections]
+
+def test_meetingWithoutTimeImportsAsNone(goldenSections, tmp_path):
+	filename = str(tmp_path / "courses.csv")
+	course.saveCoursesToCsv([section for section in goldenSections if section.classNumber == 1004], filename)
+	courses, _ = importCsv(filename)
+	assert courses[0]["timeStart"] == [datetime.datetime(1900, 1, 1, 14, 0), None]
+	assert courses[0]["timeEnd"] == [datetime.datetime(1900, 1, 1, 15, 15), None]
+
+def convertLikeTheRowLoop(filename):
+	"""The row by row conversion csvToMongodb did before it was streamed in chunks."""
+	with open(filename, "r") as file:
+		csvCourses = list(csv.DictReader(file))
+	parseTime = lambda value: datetime.datetime.strptime(value, "%I:%M %p")
+	parseDate = lambda value: datetime.datetime.strptime(value, "%m/%d/%Y")
+	courses = []
+	coursesTS = []
+	idx = 0
+	while idx < len(csvCourses):
+		course = csvCourses[idx]
+		course.pop('notes')
+		course['subjectName'] = course['subject'].split(",")[0].replace("(", "").replace("'", "").strip()
+		course['subjectCode'] = course['subject'].split(",")[1].replace(")", "").replace("'", "").strip()
+		course.pop('subject')
+		for field in ('year', 'classNumber', 'seatsAvailable', 'capacity', 'waitlistAvailable', 'waitlistCapacity', 'reservedSeatsAvailable', 'reservedSeatsCapacity'):
+			course[field] = int(course[field])
+		course['days'] = course['days'].split()
+		course['instructor'] = course['instructor'].split(", ")
+		if course['instructor'][0] == 'NULL':
+			course['instructor'] = []
+		if course['classroom'] == 'NULL':
+			course['classroom'] = None
+		if course['reservedSeatsCapacity'] == 0:
+			course.pop('reservedSeatsAvailable')
+			course.pop('reservedSeatsCapacity')
+		if course['topic'] == 'NULL':
+			course.pop('topic')
+		course['timeStart'] = parseTime(course['timeStart'])
+		course['timeEnd'] = parseTime(course['timeEnd'])
+		course['startDate'] = parseDate(course['startDate'])
+		course['endDate'] = parseDate(course['endDate'])
+		course['dateTimeRetrieved'] = datetime.datetime.strptime(course['dateTimeRetrieved'], "%Y-%m-%d %H:%M:%S")
+		courseTS = {
+			"dateTimeRetrieved": course['dateTimeRetrieved'],
+			"courseInfo": {"semester": course['semester'], "year": course['year'], "classNumber": course['classNumber']},
+			"status": course['status'],
+			"seatsAvailable": course['seatsAvailable'],
+			"waitlistAvailable": course['waitlistAvailable']
+		}
+		if 'reservedSeatsAvailable' in course:
+			courseTS['reservedSeatsAvailable'] = course['reservedSeatsAvailable']
+		coursesTS.append(courseTS)
+		course.pop('status')
+		course.pop('seatsAvailable')
+		course.pop('waitlistAvailable')
+		prevClassNum = course['classNumber']
+		course['multipleMeetings'] = course['multipleMeetings'] == 'True'
+		if course['multipleMeetings']:
+			for key in ('timeStart', 'timeEnd', 'startDate', 'endDate', 'classroom', 'days', 'instructor'):
+				course[key] = [course[key]]
+			if 'topic' in course:
+				course['topic'] = [course['topic']]
+			idx += 1
+			while idx < len(csvCourses) and int(csvCourses[idx]['classNumber']) == prevClassNum:
+				meeting = csvCourses[idx]
+				course['days'].append(meeting['days'].split())
+				course['timeStart'].append(parseTime(meeting['timeStart']))
+				course['timeEnd'].append(parseTime(meeting['timeEnd']))
+				course['startDate'].append(parseDate(meeting['startDate']))
+				course['endDate'].append(parseDate(meeting['endDate']))
+				course['classroom'].append(None if meeting['classroom'] == 'NULL' else meeting['classroom'])
+				instructor = meeting['instructor'].split(", ")
+				course['instructor'].append([] if instructor[0] == 'NULL' else instructor)
+				if 'topic' not in course:
+					course['topic'] = [None]
+				course['topic'].append(meeting['topic'] if meeting['topic'] != 'NULL' else None)
+				idx += 1
+			if all(topic is None for topic in course['topic']):
+				course.pop('topic')
+			idx -= 1
+		courses.append(course)
+		idx += 1
+	return courses, coursesTS
+
+def test_chunksMatchTheRowLoop(goldenSections, tmp_path):
+	filename = str(tmp_path / "courses.csv")
+	# The row loop could not read a meeting without a time
+	course.saveCoursesToCsv([section for section in goldenSections if section.classNumber != 1004], filename)
+	assert importCsv(filename) == convertLikeTheRowLoop(filename)
+
+@pytest.mark.parametrize("chunkSize", [1, 2, 3, 5, 8])
+def test_multipleMeetingsSplitAcrossChunksAreReassembled(goldenSections, tmp_path, chunkSize):
+	filename = str(tmp_path / "courses.csv")
+	course.saveCoursesToCsv(goldenSections, filename)
+	chunks = list(readChunks(filename, chunkSize))
+	courses, coursesTS = importCsv(filename, chunkSize)
+	assert (courses, coursesTS) == importCsv(filename)
+	# Every section is converted from one chunk, also the ones whose meetings cross a chunk boundary
+	assert sum(len(rows) for _, rows in chunks) == sum(section.meetingCount() for section in goldenSections)
+	assert [document["classNumber"] for document in courses] == [section.classNumber for section in goldenSections]
+
+def test_chunkEndingInsideASectionTakesItsRemainingMeetings(goldenSections, tmp_path):
+	filename = str(tmp_path / "courses.csv")
+	course.saveCoursesToCsv(goldenSections, filename)
+	# The first three rows are the three meetings of 9426
+	header, rows = next(readChunks(filename, 2))
+	assert [row[header.index("classNumber")] for row in rows] == ["9426"] * 3
@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+import pytest
+from bson import ObjectId
+from pymongo import ReplaceOne
+from pymongo.errors import AutoReconnect, BulkWriteError
+from ingest import BulkIngester, DUPLICATE_KEY_ERROR
+
+WRITE_CONFLICT = 112
+
+class FakeCollection:
+	"""
+	Collection with the calls BulkIngester makes. Each entry of failures is used by
+	one call: a function(collection, batch) that applies part of the batch and raises.
+	"""
+	def __init__(self, failures=(), delay=0.0):
+		self.failures = list(failures)
+		self.delay = delay
+		self.documents = {}
+		self.applied = [] # (filter, document) of every applied replacement, in order
+		self.calls = [] # batch of every call
+		self.lock = threading.Lock()
+
+	def nextFailure(self, batch):
+		with self.lock:
+			self.calls.append(list(batch))
+			return self.failures.pop(0) if len(self.failures) > 0 else None
+
+	def insert_many(self, documents, ordered=True):
+		for document in documents:
+			# Like pymongo, the _id is set on the documents before they are sent
+			document.setdefault("_id", ObjectId())
+		failure = self.nextFailure(documents)
+		if failure is not None:
+			failure(self, documents)
+		self.insert(documents)
+
+	def insert(self, documents):
+		with self.lock:
+			for document in documents:
+				self.documents[document["_id"]] = document
+
+	def find(self, query, projection=None):
+		ids = set(query["_id"]["$in"])
+		with self.lock:
+			return [{"_id": documentId} for documentId in self.documents if documentId in ids]
+
+	def bulk_write(self, operations, ordered=True):
+		failure = self.nextFailure(operations)
+		if failure is not None:
+			failure(self, operations)
+		self.apply(operations)
+
+	def apply(self, operations):
+		for operation in operations:
+			time.sleep(self.delay * random.random())
+			with self.lock:
+				self.applied.append((operation._filter, operation._doc))
+
+def writeErrorAt(indexes, code=WRITE_CONFLICT):
+	def fail(collection, operations):
+		collection.apply([operation for i, operation in enumerate(operations) if i not in indexes])
+		raise BulkWriteError({"writeErrors": [{"index": i, "code": code, "errmsg": "failed"} for i in indexes], "writeConcernErrors": []})
+	return fail
+
+def networkErrorAfter(count):
+	def fail(collection, documents):
+		collection.insert(documents[:count])
+		raise AutoReconnect("connection closed")
+	return fail
+
+def replacements(count):
+	return [ReplaceOne({"classNumber": i}, {"classNumber": i}, upsert=True) for i in range(count)]
+
+def test_bulkWriteErrorRetriesOnlyFailedOperations():
+	collection = FakeCollection([writeErrorAt({1, 3})])
+	operations = replacements(5)
+	with BulkIngester(None, workers=1, backoff=0) as ingester:
+		ingester.bulkWrite(collection, operations)
+	assert collection.calls == [operations, [operations[1], operations[3]]]
+	assert sorted(document["classNumber"] for _, document in collection.applied) == list(range(5))
+	assert ingester.batchesRetried == 1
+
+def test_duplicateKeyErrorIsNotRetried():
+	collection = FakeCollection([writeErrorAt({0}, DUPLICATE_KEY_ERROR)])
+	with pytest.raises(BulkWriteError):
+		with BulkIngester(None, workers=1, backoff=0) as ingester:
+			ingester.bulkWrite(collection, replacements(2))
+	assert len(collection.calls) == 1
+
+def test_insertAfterNetworkErrorOnlySendsUnappliedDocuments():
+	collection = FakeCollection([networkErrorAfter(2)])
+	documents = [{"classNumber": i} for i in range(5)]
+	with BulkIngester(None, workers=1, backoff=0) as ingester:
+		ingester.insertMany(collection, documents)
+	assert [len(batch) for batch in collection.calls] == [5, 3]
+	assert collection.calls[1] == documents[2:]
+	assert sorted(document["classNumber"] for document in collection.documents.values()) == list(range(5))
+	assert ingester.documentsWritten == 5
+
+def test_insertAppliedBeforeNetworkErrorIsNotSentAgain():
+	collection = FakeCollection([networkErrorAfter(3)])
+	with BulkIngester(None, workers=1, backoff=0) as ingester:
+		ingester.insertMany(collection, [{"classNumber": i} for i in range(3)])
+	# Everything was applied, the retry finds nothing left to send
+	assert len(collection.calls) == 1
+	assert len(collection.documents) == 3
+
+def test_writesOfOneKeyAreAppliedInOrder():
+	collection = FakeCollection(delay=0.001)
+	keys = list(range(20))
+	with BulkIngester(None, workers=4, batchSize=3, backoff=0) as ingester:
+		for version in range(5):
+			operations = [ReplaceOne({"classNumber": key}, {"classNumber": key, "version": version}, upsert=True) for key in keys]
+			ingester.bulkWriteByKey(collection, operations, keys)
+	versions = {}
+	for _, document in collection.applied:
+		versions.setdefault(document["classNumber"], []).append(document["version"])
+	assert versions == {key: list(range(5)) for key in keys}
+
+def test_onlyTheLastOperationOfAKeyInOneCallIsSent():
+	collection = FakeCollection()
+	operations = [ReplaceOne({"classNumber": 1}, {"classNumber": 1, "version": version}, upsert=True) for version in range(3)]
+	with BulkIngester(None, workers=2, backoff=0) as ingester:
+		ingester.bulkWriteByKey(collection, operations, [(1,)] * 3)
+	assert [document for _, document in collection.applied] == [{"classNumber": 1, "version": 2}]
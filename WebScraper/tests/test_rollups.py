@@ -0,0 +1,60 @@
+import datetime
+from rollups import applyPoint, extendRollup, finishRollup, summarizeFilled
+
+def day(dayOfMonth, hour=23):
+	return datetime.datetime(2024, 11, dayOfMonth, hour)
+
+def test_lastRetrievalOfADayWins():
+	rollup = {}
+	applyPoint(rollup, 10, 10, day(4))
+	applyPoint(rollup, 10, 8, day(4, 9))
+	applyPoint(rollup, 10, 7, day(4, 23))
+	assert rollup["firstDate"] == datetime.datetime(2024, 11, 4)
+	assert rollup["filled"] == [30.0]
+
+def test_missingDaysCarryThePreviousValue():
+	rollup = {}
+	applyPoint(rollup, 10, 10, day(4))
+	applyPoint(rollup, 10, 8, day(7))
+	assert rollup["filled"] == [0.0, 0.0, 0.0, 20.0]
+
+def test_olderRetrievalIsIgnored():
+	rollup = {}
+	applyPoint(rollup, 10, 8, day(5))
+	applyPoint(rollup, 10, 0, day(4))
+	assert rollup["firstDate"] == datetime.datetime(2024, 11, 5)
+	assert rollup["filled"] == [20.0]
+
+def test_filledIsNeverNegative():
+	rollup = applyPoint({}, 0, 5, day(4))
+	assert rollup["filled"] == [0.0]
+	rollup = applyPoint({}, 10, 12, day(4))
+	assert rollup["filled"] == [0.0]
+
+def test_extendRollupCarriesTheLastValueToLastDay():
+	rollup = applyPoint({}, 10, 5, day(4))
+	extendRollup(rollup, datetime.datetime(2024, 11, 6))
+	assert rollup["filled"] == [50.0, 50.0, 50.0]
+	# Never shortens the series
+	extendRollup(rollup, datetime.datetime(2024, 11, 5))
+	assert rollup["filled"] == [50.0, 50.0, 50.0]
+
+def test_summarizeFilled():
+	filled = [float(i * i) for i in range(16)]
+	change, weeklyChange = summarizeFilled(filled)
+	assert change == [filled[i + 1] - filled[i] for i in range(15)]
+	assert weeklyChange == [filled[6] - filled[0], filled[13] - filled[6], filled[15] - filled[13]]
+	assert sum(weeklyChange) == filled[-1] - filled[0]
+
+def test_summarizeFilledOfOneDay():
+	assert summarizeFilled([40.0]) == ([], [0.0])
+
+def test_finishRollup():
+	rollup = {}
+	applyPoint(rollup, 10, 10, day(4))
+	applyPoint(rollup, 10, 8, day(5))
+	applyPoint(rollup, 10, 7, day(6))
+	finishRollup(rollup)
+	assert rollup["lastDate"] == datetime.datetime(2024, 11, 6)
+	assert rollup["change"] == [20.0, 10.0]
+	assert rollup["weeklyChange"] == [30.0]
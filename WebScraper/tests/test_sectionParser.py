@@ -0,0 +1,28 @@
+import copy
+import datetime
+import pytest
+from conftest import loadGolden, parseCase
+from sectionParser import parseSections, meetingPatternSections
+
+GOLDEN = loadGolden()
+
+def serialize(value):
+	if isinstance(value, datetime.datetime):
+		return value.isoformat()
+	if isinstance(value, (list, tuple)): # the empty default is a shared tuple, stored as an array like a list
+		return [serialize(item) for item in value]
+	return value
+
+@pytest.mark.parametrize("case", GOLDEN["cases"], ids=[case["description"] for case in GOLDEN["cases"]])
+def test_parsedSectionsMatchGoldenCase(case):
+	dateTimeRetrieved = datetime.datetime.fromisoformat(GOLDEN["dateTimeRetrieved"])
+	classInfo = copy.deepcopy(case["classInfo"])
+	sections = [{field: serialize(value) for field, value in section.to_dict().items()} for section in parseCase(case, dateTimeRetrieved)]
+	assert sections == case["expected"]
+	assert case["classInfo"] == classInfo, "classInfo was modified"
+
+@pytest.mark.parametrize("case", GOLDEN["cases"], ids=[case["description"] for case in GOLDEN["cases"]])
+def test_meetingPatternSectionsMatchParsedLayouts(case):
+	dateTimeRetrieved = datetime.datetime.fromisoformat(GOLDEN["dateTimeRetrieved"])
+	parsed = parseSections(case["classInfo"], case["className"], case["subjectName"], case["academicCareer"], case["term"], dateTimeRetrieved)
+	assert list(meetingPatternSections(case["classInfo"])) == [sectionIndex for _, sectionIndex, hasMeetingPatterns in parsed if hasMeetingPatterns]
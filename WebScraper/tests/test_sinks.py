@@ -0,0 +1,49 @@
+import datetime
+import pytest
+from checkpoint import FileCheckpoint, NOT_COLLECTED, PARTIALLY_COLLECTED
+from course import course
+from sinks import CsvSink
+
+WORK_UNIT = ("Spring 2025", "Undergraduate", "Music Ensemble")
+
+def subjectSections(sections, workUnit):
+	return [section for section in sections if (section.academicCareer, section.subjectName) == workUnit[1:]]
+
+def test_incompleteWorkUnitIsNotCheckpointed(resultsPageSections, tmp_path):
+	filename = str(tmp_path / "courses.csv")
+	checkpoint = FileCheckpoint.forCsv(filename).load()
+	otherUnit = ("Spring 2025", "Undergraduate", "Biology")
+	with CsvSink(filename, checkpoint=checkpoint) as sink:
+		sink.addAll(subjectSections(resultsPageSections, otherUnit))
+		sink.endWorkUnit(otherUnit)
+		sink.endWorkUnit(WORK_UNIT, completed=False)
+	assert sink.workUnitsIncomplete == 1
+	resumed = FileCheckpoint.forCsv(filename).load()
+	assert resumed.isDone(otherUnit)
+	assert not resumed.isDone(WORK_UNIT)
+	assert resumed.status() == PARTIALLY_COLLECTED
+
+def test_crashBeforeFirstCheckpointIsNotCollected(resultsPageSections, tmp_path):
+	filename = str(tmp_path / "courses.csv")
+	for section in resultsPageSections:
+		section.dateTimeRetrieved = datetime.datetime.now()
+	checkpoint = FileCheckpoint.forCsv(filename).load()
+	with pytest.raises(RuntimeError):
+		with CsvSink(filename, batchSize=1, checkpoint=checkpoint) as sink:
+			# Written by the batch flushes, but the subject never ends
+			sink.addAll(subjectSections(resultsPageSections, WORK_UNIT))
+			raise RuntimeError("browser crashed")
+	assert sink.sectionsWritten > 0
+	assert course.wasDataCollectedToday(filename) == NOT_COLLECTED
+
+def test_manifestIsRecordedOnceWorkUnitIsCheckpointed(resultsPageSections, tmp_path):
+	filename = str(tmp_path / "courses.csv")
+	for section in resultsPageSections:
+		section.dateTimeRetrieved = datetime.datetime.now()
+	checkpoint = FileCheckpoint.forCsv(filename).load()
+	with CsvSink(filename, batchSize=1, checkpoint=checkpoint) as sink:
+		sink.addAll(subjectSections(resultsPageSections, WORK_UNIT))
+		assert sink.lastRun.read() is None
+		sink.endWorkUnit(WORK_UNIT)
+		assert sink.lastRun.lastDateTime() == max(section.dateTimeRetrieved for section in resultsPageSections)
+	assert course.wasDataCollectedToday(filename) == PARTIALLY_COLLECTED
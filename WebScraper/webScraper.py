@@ -1,10 +1,19 @@
 from course import course
+from sectionParser import parseSections, fillMeetingPatterns, meetingPatternSections
+from htmlSnapshot import parseClassListings, parseScriptClassListings, CLASS_LISTINGS_SCRIPT, RESULTS_CONTAINER_CLASS, CLASS_CARD_CLASS, SCREEN_READER_CLASS
+from sinks import CsvSink, MongoSink, DEFAULT_BATCH_SIZE
+from archive import ArchiveSink
+from checkpoint import FileCheckpoint, MongoCheckpoint, PARTIALLY_COLLECTED, COLLECTED
 from selenium import webdriver
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support.expected_conditions import presence_of_element_located
-from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.expected_conditions import presence_of_element_located, staleness_of
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+from metrics import RunMetrics, DEFAULT_TIMEOUT, REPORT_DIRECTORY
+from httpScraper import HttpScraper
+from asyncCrawler import AsyncCrawler
+from pipeline import ParsePipeline
 import time
 import datetime
 import copy
@@ -13,8 +22,12 @@ import sys
 import os
 from dotenv import load_dotenv
 from pymongo import MongoClient
+import multiprocessing
+from multiprocessing.util import Finalize
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from typing import Iterator
 		
-start_time = time.time()
 options = webdriver.FirefoxOptions()
 options.add_argument("--headless")
 
@@ -22,318 +35,249 @@ def eraseTerminalLine(showProgress=True):
 				if showProgress:
 						print('\033[1A', '\033[K', end='', sep='')
 
-with keep.presenting(), webdriver.Firefox(options=None) as driver:
-
-		driver.get("https://canelink.miami.edu/psp/UMIACP1D/EMPLOYEE/SA/s/WEBLIB_HCX_CM.H_CLASS_SEARCH.FieldFormula.IScript_Main")
-		wait = WebDriverWait(driver, 20)
-		shortWait = WebDriverWait(driver, 5)
-		driver.switch_to.frame("TargetContent")    
-		global currentTerm
-		global currentAcademicCareer
-		global currentSubject
-		global courses
-		courses = []
-		STRINGS_IN_EACH_SECTION = 9 # number of strings in each section of a class (if it does not have multiple meetings)
-		STRINGS_MISSING_IN_MULTIPLE_MEETINGS_SECTION = 5 # number of strings missing from a section if it has multiple meetings
-		STRINGS_IN_EACH_TABLE_ROW = 6 # number of strings in each row of the meeting patterns table (for sections with multiple meetings)
-		STRINGS_IN_EACH_TABLE_ROW_WITH_TOPIC = 7 # number of strings in each row of the meeting patterns table with the additional 'Topic' column (for sections with multiple meetings)
-		STRINGS_MISSING_IN_MINIMAL_INFO_SECTION = 6 # number of strings missing from a section with almost no information
-
-		def scrollToBottomOfElement(element: WebElement):
-				driver.execute_script("arguments[0].scrollIntoView(false);", element)
-				driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", element)
-
-		def scrollToElement(element: WebElement):
-				driver.execute_script("arguments[0].scrollIntoView();", element)
-
-		def printClassInfo(classInfo: list[str]):  
-				for i,info in enumerate(classInfo):
-						print(f"{i}.", info)
-				print()
-
-		def checkForReservedSeats(classInfo: list[str], i: int, offset: int):
-				hasReservedSeats = False
-				statusStringList = classInfo[i + offset].split(", ")
-				for j, statusString in enumerate(statusStringList):
-						if "reserved" in statusString:
-								hasReservedSeats = True
-								statusStringList.pop(j)
-								break
-				reservedSeatsOffset = 1 if statusStringList[0] != "Waitlist" else 2
-				if len(classInfo) <= i + offset + 2:
-						reservedSeatsOffset = 0
-				if not hasReservedSeats and reservedSeatsOffset > 0:
-						if classInfo[i + offset + reservedSeatsOffset].split(" ")[1] == "of":
-								hasReservedSeats = True
-				return (hasReservedSeats, statusStringList)
-		
-		def setCourseStatus(courseObject: course, classInfo: list[str], i: int, offset: int):
-				hasReservedSeats, statusStringList = checkForReservedSeats(classInfo, i, offset)
-				courseObject.status = statusStringList[0]
-				if courseObject.status == "Waitlist":
-						courseObject.seatsAvailable = int(statusStringList[1].split(". ")[1].split(" ")[0])
-						courseObject.capacity = int(statusStringList[1].split(". ")[1].split(" ")[2])
-						courseObject.waitlistAvailable = int(statusStringList[1].split(". ")[0].split(" ")[0])
-						courseObject.waitlistCapacity = int(statusStringList[1].split(". ")[0].split(" ")[2])
-						if len(classInfo) > i + offset + 1:
-								nextString = classInfo[i + offset + 1].split(" ")
-								if len(nextString) == 3 and nextString[2].isnumeric() and int(nextString[2]) > 50:
-										classInfo.pop(i + offset + 1) # Remove waitlist text from classInfo to retain structure
-				else:
-						courseObject.seatsAvailable = int(statusStringList[1].split(" ")[0])
-						courseObject.capacity = int(statusStringList[1].split(" ")[2])
-
-				if hasReservedSeats:
-						reservedSeatsText = classInfo[i + offset + 1]
-						"""
-						Example of reservedSeatsText:
-						'5 of 5'
-						"""
-						courseObject.addReservedSeats(reservedSeatsAvailable=int(reservedSeatsText.split(" ")[0]), 
-																		reservedSeatsCapacity=int(reservedSeatsText.split(" ")[2]))
-						classInfo.pop(i + offset + 1) # Remove reserved seats text from classInfo to retain structure
-
-		def fillCourseObjectWithMultipleMeetings(currentCourse: course, classWebElement: WebElement, classInfo: list[str], i: int):
-				classSectionsTable = classWebElement.find_element(By.XPATH, ".//div[@role='table']")
-				classSectionsTableButtons = classSectionsTable.find_elements(By.XPATH, ".//button[@class='MuiButtonBase-root MuiIconButton-root']")
-				currentClassSectionIndex = i // STRINGS_IN_EACH_SECTION
-				currentButton = classSectionsTableButtons[currentClassSectionIndex]
-				scrollToElement(currentButton)
-				currentButton.click()
+CLASS_SEARCH_URL = "https://canelink.miami.edu/psp/UMIACP1D/EMPLOYEE/SA/s/WEBLIB_HCX_CM.H_CLASS_SEARCH.FieldFormula.IScript_Main"
+ACADEMIC_CAREERS = ["Undergraduate", "Graduate"]
+POLL_FREQUENCY = 0.1 # seconds between two checks of a wait condition
+RESULTS_NAV_XPATH = "//div[2]//nav"
+FIRST_CLASS_HEADING_XPATH = "(//div[@class='cx-MuiGrid-root cx-MuiGrid-item cx-MuiGrid-grid-xs-12']//h2)[1]"
+FORM_BUTTONS_XPATH = "//form//div[2]//button[@class='cx-MuiButtonBase-root cx-MuiIconButton-root cx-MuiAutocomplete-popupIndicator']"
+# Expands a section, waits in the page for its meeting patterns table, reads every cell and closes it again,
+# all in one WebDriver round trip. Closes the section and calls back with null when the table did not show up in time.
+MEETING_PATTERNS_SCRIPT = """
+const [button, timeoutMs, pollMs, done] = arguments;
+button.scrollIntoView();
+button.click();
+const start = Date.now();
+(function poll() {
+	const table = document.querySelector("[aria-label='meeting patterns']");
+	if (table !== null) {
+		const cells = Array.from(table.querySelectorAll("tbody p"), cell => cell.textContent);
+		button.click();
+		done(cells);
+	} else if (Date.now() - start > timeoutMs) {
+		button.click();
+		done(null);
+	} else {
+		setTimeout(poll, pollMs);
+	}
+})();
+"""
+
+def printClassInfo(classInfo: list[str]):  
+		for i,info in enumerate(classInfo):
+				print(f"{i}.", info)
+		print()
+
+def firstClassHeading(driver):
+		headings = driver.find_elements(By.XPATH, FIRST_CLASS_HEADING_XPATH)
+		return headings[0].text if len(headings) > 0 else None
+
+def resultsReplaced(previousNav: WebElement, previousHeading: str):
+		"""Wait condition: the results of the new search are shown, not the ones of the previous search."""
+		def condition(driver):
+				navs = driver.find_elements(By.XPATH, RESULTS_NAV_XPATH)
+				if len(navs) == 0:
+						return False
+				if previousNav is None:
+						return navs[0]
 				try:
-						wait.until(presence_of_element_located((By.CSS_SELECTOR, "[aria-label='meeting patterns']")))
-				except TimeoutException:
-						print("Timed out at:", currentTerm, currentAcademicCareer, currentSubject)
-						currentButton.click()
-						currentButton.click()
-						wait.until(presence_of_element_located((By.CSS_SELECTOR, "[aria-label='meeting patterns']")))
-				meetingPatternsTable = driver.find_element(By.CSS_SELECTOR, "[aria-label='meeting patterns']")
-				meetingPatternsInfo = meetingPatternsTable.find_elements(By.XPATH, ".//tbody//p")
-				meetingPatternsInfo = list(map(lambda x: x.get_attribute("textContent"), meetingPatternsInfo)) # map list of WebElements to list of strings
-				setCourseStatus(currentCourse, classInfo, i, 3)
-				stringsInEachRow = STRINGS_IN_EACH_TABLE_ROW if len(meetingPatternsInfo) % STRINGS_IN_EACH_TABLE_ROW == 0 else STRINGS_IN_EACH_TABLE_ROW_WITH_TOPIC
-				# create multiple meetings structure
-				currentCourse.multipleMeetings = True
-				if stringsInEachRow == STRINGS_IN_EACH_TABLE_ROW_WITH_TOPIC:
-						currentCourse.addTopic([])
-				currentCourse.startDate = []
-				currentCourse.endDate = []
-				currentCourse.instructor = []
-				currentCourse.days = []
-				currentCourse.timeStart = []
-				currentCourse.timeEnd = []
-				currentCourse.classroom = []
-
-				# create one course object that consists of information for every meeting
-				for j in range(0, len(meetingPatternsInfo), stringsInEachRow):
-						# fill in information that is different for each meeting
-						"""
-						Example of meetingPatternsInfo:
-						0: 01/15/2025 - 03/05/2025
-						1: Mark Friedman
-						2: We
-						3: 6:30PM
-						4: 8:50PM
-						5: Online Instruction ONL
-						6: 03/18/2025 - 04/22/2025
-						7: Mark Friedman
-						8: Tu
-						9: 12:30PM
-						10: 1:45PM
-						11: Stubblefield 204
-						12: 03/21/2025 - 04/25/2025
-						13: Mark Friedman
-						14: Fr
-						15: 1:25PM
-						16: 4:45PM
-						17: Stubblefield 204
-						"""
-
-						currentCourse.startDate.append(datetime.datetime.strptime(meetingPatternsInfo[j].split(" - ")[0], "%m/%d/%Y"))
-						currentCourse.endDate.append(datetime.datetime.strptime(meetingPatternsInfo[j].split(" - ")[1], "%m/%d/%Y"))
-						meetingPatternsInfo[j + 1] = meetingPatternsInfo[j + 1].replace("\n\r", " ")
-						currentCourse.instructor.append(meetingPatternsInfo[j + 1].split(", "))
-						currentCourse.days.append(course.mapDaysAbrvToFull(meetingPatternsInfo[j + 2]))
-						if meetingPatternsInfo[j + 3] != "-":
-								currentCourse.timeStart.append(datetime.datetime.strptime(meetingPatternsInfo[j + 3], "%I:%M%p"))
-						if meetingPatternsInfo[j + 4] != "-":
-								currentCourse.timeEnd.append(datetime.datetime.strptime(meetingPatternsInfo[j + 4], "%I:%M%p"))
-						currentCourse.classroom.append(meetingPatternsInfo[j + 5])
-						if stringsInEachRow == STRINGS_IN_EACH_TABLE_ROW_WITH_TOPIC:
-								currentCourse.topic.append(meetingPatternsInfo[j + 6])
-						
-				# insert list of "Multiple" strings into classInfo to keep the same structure
-				for j in range(STRINGS_MISSING_IN_MULTIPLE_MEETINGS_SECTION):
-						classInfo.insert(i + 3, "Multiple")
-
-				currentButton.click() # Close the table
-				return currentCourse
-
-		def fillCourseObject(classWebElement: WebElement, classInfo: list[str], className: str, i: int):
+						previousNav.is_enabled() # Raises once the previous results were removed from the page
+				except StaleElementReferenceException:
+						return navs[0]
+				heading = firstClassHeading(driver)
+				return navs[0] if heading is not None and heading != previousHeading else False
+		return condition
+
+def dropdownItem(text: str):
+		"""Wait condition: the open dropdown list has an item with this text, returns the item."""
+		def condition(driver):
+				for item in driver.find_elements(By.XPATH, "//form//ul//li"):
+						if item.text == text:
+								return item
+				return False
+		return condition
+
+def formReady(driver):
+		"""Wait condition: no dropdown is open and all the form buttons are there."""
+		return len(driver.find_elements(By.XPATH, "//form//ul")) == 0 and len(driver.find_elements(By.XPATH, FORM_BUTTONS_XPATH)) >= 3
+
+class SearchTimeoutError(Exception):
+		"""The results of a subject search did not show up, the page may still show the previous subject's results."""
+		pass
+
+class Scraper:
+		"""
+		Drives one Firefox session through the CaneLink class search and turns the
+		results into course objects. The browser is only started by openBrowser (or
+		by entering the scraper as a context manager), so the module can be imported
+		without side effects and one warm browser can serve several crawls.
+
+		Example:
+		with Scraper(headless=True) as scraper:
+				for section in scraper.scrape_subject("Spring 2025", "Undergraduate", "Accounting"):
+						print(section)
+		"""
+
+		def __init__(self, headless=False, snapshotParsing=False, checkpoint=None, onSubjectDone=None, dateTimeRetrieved=None, batchMeetingPatterns=False, scriptExtraction=False):
+				self.headless = headless
+				self.snapshotParsing = snapshotParsing # parse each results page from one page_source instead of per-element WebDriver calls
+				self.scriptExtraction = scriptExtraction # read each results page with one injected script that returns the strings of every class card
+				self.batchMeetingPatterns = batchMeetingPatterns # read the meeting patterns of a section with one script call instead of click, wait, read and close
+				self.checkpoint = checkpoint # subjects already saved by an interrupted run are skipped
+				self.onSubjectDone = onSubjectDone # called with (term, career, subject) and whether its search completed once every section of a subject was consumed
+				self.dateTimeRetrieved = dateTimeRetrieved if dateTimeRetrieved is not None else course.currentDateTime() # shared by every section of the run
+				self.driver = None
+				self.metrics = RunMetrics() # time spent in every stage and wait, and the timeouts learned from the waits
+				self.currentTerm = "NULL"
+				self.currentAcademicCareer = "NULL"
+				self.currentSubject = "NULL"
+				self.currentClassPosition = (0, 0)
+
+		def __enter__(self):
+				self.openBrowser()
+				return self
+
+		def __exit__(self, excType, excValue, traceback):
+				self.closeBrowser()
+
+		def loadClassSearchPage(self):
+				with self.metrics.timer("navigation"):
+						self.driver.get(CLASS_SEARCH_URL)
+						self.driver.switch_to.frame("TargetContent")
+
+		def openBrowser(self):
+				self.driver = webdriver.Firefox(options=options if self.headless else None)
+				self.loadClassSearchPage()
+				return self.driver
+
+		def closeBrowser(self):
+				if self.driver is not None:
+						self.driver.quit()
+						self.driver = None
+
+		def waitFor(self, name: str, condition, timeout=None):
 				"""
-				Example of className:
-				'Small Contemporary Ensemble | MDE 139'
-
-				courseName = Small Contemporary Ensemble
-				subjectName = currentSubject
-				subjectCode = 'MDE'
-				catalogNumber = '139'
-
-				Example of classInfo:
-				0. ENS Section AMS, Class Number5385
-				1. Regular Academic
-				2. Friday
-				3. 10:10 am
-				4. 1:10 pm
-				5. Frost North Studio 330
-				6. Roxana Amed, Reynaldo Sanchez
-				7. 01/13 - 04/28
-				8. Open, 10 of 10 seats available
-				9. ENS Section CCE, Class Number5386
-				10. Regular Academic
-				11. Tuesday Thursday
-				12. 6:35 pm
-				13. 7:50 pm
-				14. Frost North Studio 330
-				15. Brian Russell
-				16. 01/13 - 04/28
-				17. Waitlist, 300 of 300 waitlist seats available. 40 of 40 seats available.
-
-				First class:
-				sectionType = 'ENS'
-				sectionCode = 'AMS'
-				classNumber = 5385
-				session = 'Regular Academic'
-				days = [Friday]
-				timeStart = 10:10 am
-				timeEnd = 1:10 pm
-				classroom = 'Frost North Studio 330'
-				instructor = ['Roxana Amed', 'Reynaldo Sanchez']
-				startDate = 01/13
-				endDate = 04/28
-				status = 'Open'
-				seatsAvailable = 10
-				capacity = 10
-				waitlistAvailable = 300
-				waitlistCapacity = 300
-
-				Second class:
-				sectionType = 'ENS'
-				sectionCode = 'CCE'
-				classNumber = 5386
-				session = 'Regular Academic'
-				days = ['Tuesday', 'Thursday']
-				timeStart = 6:35 pm
-				timeEnd = 7:50 pm
-				classroom = 'Frost North Studio 330'
-				instructor = ['Brian Russell']
-				startDate = 01/13
-				endDate = 04/28
-				status = 'Waitlist'
-				seatsAvailable = 40
-				capacity = 40
-				waitlistAvailable = 300
-				waitlistCapacity = 300
+				Wait until condition holds and record how long it took under name.
+				Without a timeout, the one learned from the earlier waits of that name is used.
+				Raises TimeoutException like WebDriverWait.until.
 				"""
+				if timeout is None:
+						timeout = self.metrics.waits.timeoutFor(name)
+				start = time.perf_counter()
 				try:
-						global currentSubject
-						currentCourse = course()
-						currentCourse.name = className.split(" | ")[0]
-						currentCourse.subjectName = currentSubject
-						currentCourse.subjectCode = className.split(" | ")[1].split(" ")[0]
-						currentCourse.catalogNumber = className.split(" | ")[1].split(" ")[1]
-						currentCourse.academicCareer = currentAcademicCareer
-						currentCourse.semester = currentTerm.split(" ")[0]
-						currentCourse.year = int(currentTerm.split(" ")[1])
-						classInfoSection = classInfo[i].split(", ")
-						currentCourse.sectionType = classInfoSection[0].split(" ")[0]
-						currentCourse.sectionCode = classInfoSection[0].split(" ")[2]
-						number = classInfoSection[1].split(" ")[1]
-						number = number.replace("Number", "")
-						currentCourse.classNumber = int(number)
-						currentCourse.session = classInfo[i + 1]
-						currentCourse.days = classInfo[i + 2].split()
-						if currentCourse.days[0] not in course.days:
-								"""
-								Example of classInfo with a section with multiple meetings:
-								0. Lecture Section C4J, Class Number9426
-								1. Regular Academic
-								2. Meeting 1: Wednesday . Meeting 2: Monday Wednesday Friday 
-								3. Meeting 1: 5:05 pm. Meeting 2: 10:10 am
-								4. Meeting 1: 6:20 pm. Meeting 2: 11:00 am
-								5. Meeting 1: Cox Science 126. Meeting 2: Whitten LC 170
-								6. Meeting 1: Charles Mallery. Meeting 2: Charles Mallery
-								7. Meeting 1: 01/1304/28. Meeting 2: 01/1304/28
-								8. Monday Wednesday Friday 
-								9. 10:10 am
-								10. 11:00 am
-								11. Whitten LC 170
-								12. Charles Mallery
-								13. 01/13 - 04/28
-								14. Open, 170 of 170 seats available
-
-								Need to get rid of [2:8] and [9:14] to match structure of
-								other instance of multiple meetings
-
-								Example of classInfo with a section with almost no information:
-								0. Lecture Section 01, Class Number7616
-								1. Regular Academic
-								2. Open, 10 of 10 seats available
-
-								Just need to take what we can get and store it
-								"""
-								# multiple meetings case
-								# check if the string is actually the status string (remove the last character, which is a comma)
-								if currentCourse.days[0][0:len(currentCourse.days[0])-1] not in course.status:
-										del classInfo[i + 2: i + 8]
-										del classInfo[i + 3: i + 8]
-										return fillCourseObjectWithMultipleMeetings(currentCourse, classWebElement, classInfo, i)
-								# almost no information case
-								setCourseStatus(currentCourse, classInfo, i, 2)
-								currentCourse.days = []
-								# insert list of "-" strings into classInfo to keep the same structure
-								for j in range(STRINGS_MISSING_IN_MINIMAL_INFO_SECTION):
-										classInfo.insert(i + 2, "-")
-								return currentCourse
-						try:  # This is where a course with multiple meetings diverges
-								currentCourse.timeStart = datetime.datetime.strptime(classInfo[i + 3], "%I:%M %p")
-								currentCourse.timeEnd = datetime.datetime.strptime(classInfo[i + 4], "%I:%M %p")
-						except(ValueError):
-								if classInfo[i + 3] != "-":
-										return fillCourseObjectWithMultipleMeetings(currentCourse, classWebElement, classInfo, i)
-						currentCourse.classroom = classInfo[i + 5]
-						currentCourse.instructor = classInfo[i + 6].split(",\n\r")
-						dateString = classInfo[i + 7].split(" - ")
-						if dateString[0] == "02/29":
-								currentCourse.startDate = datetime.datetime(currentCourse.year, 2, 29)
-						else:
-								currentCourse.startDate = datetime.datetime.strptime(dateString[0], "%m/%d")
-								currentCourse.startDate = currentCourse.startDate.replace(year=currentCourse.year)
-						if dateString[1] == "02/29":
-								currentCourse.endDate = datetime.datetime(currentCourse.year, 2, 29)
-						else:
-								currentCourse.endDate = datetime.datetime.strptime(dateString[1], "%m/%d")
-								currentCourse.endDate = currentCourse.endDate.replace(year=currentCourse.year)
-						setCourseStatus(currentCourse, classInfo, i, 8)
+						result = WebDriverWait(self.driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition)
+				except TimeoutException:
+						self.metrics.recordWait(name, time.perf_counter() - start, timedOut=True)
+						raise
+				self.metrics.recordWait(name, time.perf_counter() - start)
+				return result
+
+		def scrollToBottomOfElement(self, element: WebElement):
+				self.driver.execute_script("arguments[0].scrollIntoView(false);", element)
+				self.driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", element)
+
+		def scrollToElement(self, element: WebElement):
+				self.driver.execute_script("arguments[0].scrollIntoView();", element)
 
-						return currentCourse
+		def readMeetingPatterns(self, button: WebElement):
+				"""
+				Cells of the meeting patterns table behind button, read with MEETING_PATTERNS_SCRIPT.
+				None when the table did not show up within the learned timeout, the section is
+				closed again so it can be read the slow way.
+				"""
+				timeout = self.metrics.waits.timeoutFor("meeting patterns")
+				self.driver.set_script_timeout(timeout + DEFAULT_TIMEOUT)
+				start = time.perf_counter()
+				cells = self.driver.execute_async_script(MEETING_PATTERNS_SCRIPT, button, timeout * 1000, POLL_FREQUENCY * 1000)
+				self.metrics.recordWait("meeting patterns", time.perf_counter() - start, timedOut=cells is None)
+				return cells
+
+		def readSectionMeetingPatterns(self, classWebElement: WebElement, sectionIndex: int):
+				"""Cells of the meeting patterns table of the section at sectionIndex of a class card."""
+				if classWebElement is None: # Parsed from a page snapshot, look the class up only now that it is needed
+						classWebElement = self.findClassWebElement(self.currentClassPosition)
+				classSectionsTable = classWebElement.find_element(By.XPATH, ".//div[@role='table']")
+				classSectionsTableButtons = classSectionsTable.find_elements(By.XPATH, ".//button[@class='MuiButtonBase-root MuiIconButton-root']")
+				currentButton = classSectionsTableButtons[sectionIndex]
+				if self.batchMeetingPatterns:
+						meetingPatternsInfo = self.readMeetingPatterns(currentButton)
+				else:
+						meetingPatternsInfo = None
+				if meetingPatternsInfo is None:
+						self.scrollToElement(currentButton)
+						currentButton.click()
+						try:
+								self.waitFor("meeting patterns", presence_of_element_located((By.CSS_SELECTOR, "[aria-label='meeting patterns']")))
+						except TimeoutException:
+								print("Timed out at:", self.currentTerm, self.currentAcademicCareer, self.currentSubject)
+								self.metrics.count("retries")
+								currentButton.click()
+								currentButton.click()
+								self.waitFor("meeting patterns retry", presence_of_element_located((By.CSS_SELECTOR, "[aria-label='meeting patterns']")), DEFAULT_TIMEOUT)
+						meetingPatternsTable = self.driver.find_element(By.CSS_SELECTOR, "[aria-label='meeting patterns']")
+						meetingPatternsInfo = meetingPatternsTable.find_elements(By.XPATH, ".//tbody//p")
+						meetingPatternsInfo = list(map(lambda x: x.get_attribute("textContent"), meetingPatternsInfo)) # map list of WebElements to list of strings
+						currentButton.click() # Close the table
+				return meetingPatternsInfo
+
+		def getResultsParentDiv(self):
+				return self.driver.find_elements(By.XPATH, "//div[@class='cx-MuiGrid-root cx-MuiGrid-container cx-MuiGrid-spacing-xs-1 cx-MuiGrid-direction-xs-column']/child::div")[2]
+
+		def findClassWebElement(self, position: tuple[int, int]):
+				classesDivIndex, classIndex = position
+				classesDivs = self.getResultsParentDiv().find_elements(By.XPATH, "./div/child::div")
+				return classesDivs[classesDivIndex].find_elements(By.XPATH, "./div[@class='cx-MuiGrid-root cx-MuiGrid-item cx-MuiGrid-grid-xs-12']")[classIndex]
+
+		def parseClassSections(self, classWebElement: WebElement, classInfo: list[str], className: str, DEBUG=False):
+				if DEBUG:
+						printClassInfo(classInfo)
+				sections = parseSections(classInfo, className, self.currentSubject, self.currentAcademicCareer, self.currentTerm, self.dateTimeRetrieved)
+				try:
+						for classSection, sectionIndex, hasMeetingPatterns in self.metrics.timed("parsing", sections):
+								self.metrics.count("sections")
+								if hasMeetingPatterns:
+										self.metrics.count("meetingPatterns")
+										with self.metrics.timer("meetingPatterns"):
+												fillMeetingPatterns(classSection, self.readSectionMeetingPatterns(classWebElement, sectionIndex))
+								if DEBUG:
+										if classSection.multipleMeetings:
+												print("MULTIPLE MEETINGS")
+										print(classSection)
+										print()
+								yield classSection
 				except Exception as e:
 						print(type(e).__name__, e)
-						print("Error in fillCourseObject")
+						print("Error in parseClassSections")
 						print("ClassInfo:")
 						printClassInfo(classInfo)
-						print("i:", i)
 						print("className:", className)
 						raise e
-						
-									 
-		def getAllClasses(DEBUG=False):
-				global courses
-				parentDiv = driver.find_elements(By.XPATH, "//div[@class='cx-MuiGrid-root cx-MuiGrid-container cx-MuiGrid-spacing-xs-1 cx-MuiGrid-direction-xs-column']/child::div")[2]
+				if DEBUG: print()
+
+		def getClassListingsFromScript(self):
+				# One round trip for the whole results page, only the strings of the class cards are sent back
+				with self.metrics.timer("extraction"):
+						classListings = self.driver.execute_script(CLASS_LISTINGS_SCRIPT, RESULTS_CONTAINER_CLASS, CLASS_CARD_CLASS, SCREEN_READER_CLASS)
+						return parseScriptClassListings(classListings)
+
+		def getAllClassesFromListings(self, classListings, DEBUG=False):
+				for className, classInfo, position in classListings:
+						self.currentClassPosition = position
+						yield from self.parseClassSections(None, classInfo, className, DEBUG)
+
+		def getAllClassesFromSnapshot(self, DEBUG=False):
+				# One round trip for the whole results page, the class listings are parsed in-process
+				with self.metrics.timer("extraction"):
+						classListings = parseClassListings(self.driver.page_source)
+				yield from self.getAllClassesFromListings(classListings, DEBUG)
+
+		def getClassListingsFromWebDriver(self):
+				"""Yield (className, classInfo, class WebElement) for every class card, reading the page element by element."""
+				parentDiv = self.getResultsParentDiv()
 				# while True:
 				# 		try:
-				# 				scrollToBottomOfElement(parentDiv)
-				# 				shortWait.until(presence_of_element_located((By.XPATH, "//form/../child::p")))
+				# 				self.scrollToBottomOfElement(parentDiv)
+				# 				self.shortWait.until(presence_of_element_located((By.XPATH, "//form/../child::p")))
 				# 				break
 				# 		except TimeoutException:
 				# 				continue  
@@ -348,230 +292,541 @@ with keep.presenting(), webdriver.Firefox(options=None) as driver:
 								classInfo = c.find_elements(By.XPATH, ".//span[@class='sr-only']")
 								classInfo.pop(0) # Remove useless element 
 								classInfo = list(map(lambda x: x.get_attribute("textContent"), classInfo)) # map list of WebElements to list of strings
-								if DEBUG:
-										printClassInfo(classInfo)
-								i = 0
-								while i < len(classInfo):
-										classSection = fillCourseObject(c, classInfo, className, i)
-										if DEBUG:
-												if classSection.multipleMeetings:
-														print("MULTIPLE MEETINGS")
-												print(classSection)
-												print()
-										courses.append(classSection)
-										i += STRINGS_IN_EACH_SECTION
-								if DEBUG: print()
-
-		def uncheckShowOpenClassesOnly():
-				showOpenClassesOnlyCheckbox = driver.find_element(By.XPATH, "//input[@type='checkbox']")
+								yield className, classInfo, c
+
+		def getAllClasses(self, DEBUG=False):
+				if self.scriptExtraction:
+						yield from self.getAllClassesFromListings(self.getClassListingsFromScript(), DEBUG)
+						return
+				if self.snapshotParsing:
+						yield from self.getAllClassesFromSnapshot(DEBUG)
+						return
+				for className, classInfo, c in self.metrics.timed("extraction", self.getClassListingsFromWebDriver()):
+						yield from self.parseClassSections(c, classInfo, className, DEBUG)
+
+		def uncheckShowOpenClassesOnly(self):
+				showOpenClassesOnlyCheckbox = self.driver.find_element(By.XPATH, "//input[@type='checkbox']")
 				showOpenClassesOnlyCheckbox.click()
 
-		def clickSearchButton():
-				searchButton = driver.find_element(By.XPATH, "//button[@type='submit']")
-				searchButton.click()
-				try:
-						wait.until(presence_of_element_located((By.XPATH, "//div[2]//nav")))
-				except TimeoutException:
-						print("Timed out at:", currentTerm, currentAcademicCareer, currentSubject)
-
-		def getAllSubjects(DEBUG=False, showProgress=True):
+		def clickSearchButton(self):
+				with self.metrics.timer("navigation"):
+						searchButton = self.driver.find_element(By.XPATH, "//button[@type='submit']")
+						previousNavs = self.driver.find_elements(By.XPATH, RESULTS_NAV_XPATH)
+						previousNav = previousNavs[0] if len(previousNavs) > 0 else None
+						previousHeading = firstClassHeading(self.driver) if previousNav is not None else None
+						searchButton.click()
+						try:
+								self.waitFor("search results", resultsReplaced(previousNav, previousHeading))
+						except TimeoutException:
+								# The learned timeout can be a few seconds, one slow response must not pass for the results
+								print("Timed out at:", self.currentTerm, self.currentAcademicCareer, self.currentSubject)
+								self.metrics.count("retries")
+								try:
+										self.waitFor("search results retry", resultsReplaced(previousNav, previousHeading), DEFAULT_TIMEOUT)
+								except TimeoutException:
+										raise SearchTimeoutError(f"No search results for {self.currentTerm} {self.currentAcademicCareer} {self.currentSubject}") from None
+
+		def getAllSubjects(self, DEBUG=False, showProgress=True):
 				# Go through all subjects and get all classes
-				subjectDropdown = driver.find_elements(By.XPATH, "//form//div[2]//button[@class='cx-MuiButtonBase-root cx-MuiIconButton-root cx-MuiAutocomplete-popupIndicator']")[2]
-				subjectDropdown.click()
-				subjectDropdownList = driver.find_element(By.XPATH, "//form//ul")
-				subjectDropdownListItems = subjectDropdownList.find_elements(By.TAG_NAME, 'li')
-				subjectListLength = len(subjectDropdownListItems)
-				clickAcademicCareerDropdown() # Close subject dropdown by clicking on academic career dropdown
-				for i in range(subjectListLength):
+				subjectDropdown = self.driver.find_elements(By.XPATH, FORM_BUTTONS_XPATH)[2]
+				with self.metrics.timer("navigation"):
 						subjectDropdown.click()
-						subjectDropdownList = driver.find_element(By.XPATH, "//form//ul")
+						subjectDropdownList = self.waitFor("subject list", presence_of_element_located((By.XPATH, "//form//ul")))
 						subjectDropdownListItems = subjectDropdownList.find_elements(By.TAG_NAME, 'li')
+				subjectListLength = len(subjectDropdownListItems)
+				self.clickAcademicCareerDropdown() # Close subject dropdown by clicking on academic career dropdown
+				for i in range(subjectListLength):
+						with self.metrics.timer("navigation"):
+								subjectDropdown.click()
+								subjectDropdownList = self.waitFor("subject list", presence_of_element_located((By.XPATH, "//form//ul")))
+								subjectDropdownListItems = subjectDropdownList.find_elements(By.TAG_NAME, 'li')
 						item = subjectDropdownListItems[i]
-						global currentSubject 
-						currentSubject = item.text
-						scrollToElement(item)
+						if self.checkpoint is not None and self.checkpoint.isDone((self.currentTerm, self.currentAcademicCareer, item.text)):
+								self.clickAcademicCareerDropdown() # Close subject dropdown, this subject was saved by an earlier run
+								continue
+						self.currentSubject = item.text
+						self.metrics.startWorkUnit((self.currentTerm, self.currentAcademicCareer, self.currentSubject))
+						self.scrollToElement(item)
 						item.click()
-						clickSearchButton()
-						if showProgress: print("Current Subject:", currentSubject)
-						getAllClasses(DEBUG)
+						try:
+								self.clickSearchButton()
+						except SearchTimeoutError as e:
+								# Not checkpointed, a resumed run searches it again
+								print("Skipped:", e)
+								self.metrics.count("subjectsSkipped")
+								self.subjectDone(completed=False)
+								continue
+						if showProgress: print("Current Subject:", self.currentSubject)
+						yield from self.getAllClasses(DEBUG)
+						self.subjectDone()
 						eraseTerminalLine(showProgress)
 
-		def setSubject(subject: str, DEBUG=False):
-				subjectDropdown = driver.find_element(By.XPATH, "//form//div[4]//button[@class='MuiButtonBase-root MuiIconButton-root MuiAutocomplete-popupIndicator']")
-				subjectDropdown.click()
-				wait.until(presence_of_element_located((By.XPATH, "//form//ul")))
-				subjectDropdownList = driver.find_element(By.XPATH, "//form//ul")
-				subjectDropdownListItems = subjectDropdownList.find_elements(By.TAG_NAME, 'li')
+		def getSubjectDropdownListOfItems(self):
+				with self.metrics.timer("navigation"):
+						subjectDropdown = self.driver.find_elements(By.XPATH, FORM_BUTTONS_XPATH)[2]
+						subjectDropdown.click()
+						subjectDropdownList = self.waitFor("subject list", presence_of_element_located((By.XPATH, "//form//ul")))
+						subjectDropdownListItems = subjectDropdownList.find_elements(By.TAG_NAME, 'li')
+						return subjectDropdownListItems
+
+		def selectSubject(self, subject: str):
+				"""
+				Search the classes of subject, False when it is not in the subject dropdown.
+				Raises SearchTimeoutError when the results did not show up.
+				"""
+				subjectDropdownListItems = self.getSubjectDropdownListOfItems()
 				for item in subjectDropdownListItems:
 						if item.text == subject:
-								global currentSubject
-								currentSubject = item.text
-								scrollToElement(item)
+								self.currentSubject = item.text
+								self.metrics.startWorkUnit((self.currentTerm, self.currentAcademicCareer, self.currentSubject))
+								self.scrollToElement(item)
 								item.click()
-								clickSearchButton()
-								getAllClasses(DEBUG)
-								break
+								self.clickSearchButton()
+								return True
+				return False
 
-		def clickAcademicCareerDropdown():
-				formButtons = driver.find_elements(By.XPATH, "//form//div[2]//button[@class='cx-MuiButtonBase-root cx-MuiIconButton-root cx-MuiAutocomplete-popupIndicator']")
-				formButtons[1].click()
+		def setSubject(self, subject: str, DEBUG=False):
+				if self.selectSubject(subject):
+						yield from self.getAllClasses(DEBUG)
+						self.subjectDone()
 
-		def setAcademicCareer(academicCareer: str):
-				global currentAcademicCareer
-				clickAcademicCareerDropdown()
-				# wait.until(presence_of_element_located((By.XPATH, "//form//ul")))
-				time.sleep(1) # Wait for the dropdown to appear and list to load
-				academicCareerDropdownList = driver.find_element(By.XPATH, "//form//ul")
-				academicCareerDropdownListItems = academicCareerDropdownList.find_elements(By.TAG_NAME, 'li')
-				for item in academicCareerDropdownListItems:
-						if item.text == academicCareer:
-								item.click()
-								currentAcademicCareer = academicCareer
-								break
+		def subjectDone(self, completed=True):
+				if self.onSubjectDone is not None:
+						self.onSubjectDone((self.currentTerm, self.currentAcademicCareer, self.currentSubject), completed)
 
-		def setTerm(term: str):
-				termDropdown = driver.find_element(By.XPATH, "//form//div[2]//button")
-				termDropdown.click()
-				termDropdownList = driver.find_element(By.XPATH, "//form//div[2]//ul")
-				termDropdownListItems = termDropdownList.find_elements(By.TAG_NAME, 'li')
-				for item in termDropdownListItems:
-						if item.text == term:
-								global currentTerm
-								currentTerm = item.text
-								item.click()
-								time.sleep(2)
-								break
+		def clickAcademicCareerDropdown(self):
+				formButtons = self.driver.find_elements(By.XPATH, FORM_BUTTONS_XPATH)
+				formButtons[1].click()
 
-		def getNextTerm(item: WebElement):
-				global currentTerm
-				currentTerm = item.text
-				scrollToElement(item)
-				item.click()
-				wait.until(presence_of_element_located((By.TAG_NAME, 'form')))
-
-		def getTermDropdownListOfItems():
-				termDropdown = driver.find_element(By.XPATH, "//form//div[2]//button")
-				scrollToElement(termDropdown)
-				termDropdown.click()
-				wait.until(presence_of_element_located((By.XPATH, "//form//div[2]//ul")))
-				termDropdownList = driver.find_element(By.XPATH, "//form//div[2]//ul")
-				termDropdownListItems = termDropdownList.find_elements(By.TAG_NAME, 'li')
-				return termDropdownListItems
-		
-		def getAllSubjectsForUndergradAndGrad(DEBUG=False, showProgress=True):
-				global currentAcademicCareer
-				uncheckShowOpenClassesOnly()
-				setAcademicCareer("Undergraduate")
-				if showProgress: print("Current Academic Career:", currentAcademicCareer)
-				getAllSubjects(DEBUG, showProgress)
+		def setAcademicCareer(self, academicCareer: str):
+				with self.metrics.timer("navigation"):
+						self.clickAcademicCareerDropdown()
+						# Wait for the dropdown to appear and its list to load
+						item = self.waitFor("academic career list", dropdownItem(academicCareer))
+						item.click()
+						self.currentAcademicCareer = academicCareer
+
+		def setTerm(self, term: str):
+				with self.metrics.timer("navigation"):
+						termDropdown = self.driver.find_element(By.XPATH, "//form//div[2]//button")
+						termDropdown.click()
+						termDropdownList = self.driver.find_element(By.XPATH, "//form//div[2]//ul")
+						termDropdownListItems = termDropdownList.find_elements(By.TAG_NAME, 'li')
+						for item in termDropdownListItems:
+								if item.text == term:
+										self.currentTerm = item.text
+										item.click()
+										# The form is rebuilt for the new term
+										self.waitFor("term list closed", staleness_of(termDropdownList))
+										self.waitFor("form ready", formReady)
+										break
+
+		def getNextTerm(self, item: WebElement):
+				with self.metrics.timer("navigation"):
+						self.currentTerm = item.text
+						self.scrollToElement(item)
+						item.click()
+						self.waitFor("form ready", formReady)
+
+		def getTermDropdownListOfItems(self):
+				with self.metrics.timer("navigation"):
+						termDropdown = self.driver.find_element(By.XPATH, "//form//div[2]//button")
+						self.scrollToElement(termDropdown)
+						termDropdown.click()
+						termDropdownList = self.waitFor("term list", presence_of_element_located((By.XPATH, "//form//div[2]//ul")))
+						termDropdownListItems = termDropdownList.find_elements(By.TAG_NAME, 'li')
+						return termDropdownListItems
+
+		def getAllSubjectsForUndergradAndGrad(self, DEBUG=False, showProgress=True):
+				self.uncheckShowOpenClassesOnly()
+				self.setAcademicCareer("Undergraduate")
+				if showProgress: print("Current Academic Career:", self.currentAcademicCareer)
+				yield from self.getAllSubjects(DEBUG, showProgress)
 				eraseTerminalLine(showProgress)
-				setAcademicCareer("Graduate")
-				if showProgress: print("Current Academic Career:", currentAcademicCareer)
-				getAllSubjects(DEBUG, showProgress)
+				self.setAcademicCareer("Graduate")
+				if showProgress: print("Current Academic Career:", self.currentAcademicCareer)
+				yield from self.getAllSubjects(DEBUG, showProgress)
 				eraseTerminalLine(showProgress)
 
-		def getAllTerms(DEBUG=False):
-				termDropdownListItems = getTermDropdownListOfItems()
+		def getAllTerms(self, DEBUG=False):
+				termDropdownListItems = self.getTermDropdownListOfItems()
 				termDropdownLength = len(termDropdownListItems)
-				clickAcademicCareerDropdown() # Close term dropdown by clicking on academic career dropdown
+				self.clickAcademicCareerDropdown() # Close term dropdown by clicking on academic career dropdown
 				i = 0
 				while i < termDropdownLength :
-						termDropdownListItems = getTermDropdownListOfItems()
+						termDropdownListItems = self.getTermDropdownListOfItems()
 						item = termDropdownListItems[i]
 						if "Non-credit Term" in item.text:
 								i += 1
 								item = termDropdownListItems[i]
-						getNextTerm(item)
-						getAllSubjectsForUndergradAndGrad(DEBUG)
+						self.getNextTerm(item)
+						yield from self.getAllSubjectsForUndergradAndGrad(DEBUG)
 						i += 1
 
-		def getOneTerm(term: str, DEBUG=False, showProgress=True):
-				global currentTerm
-				termDropdownListItems = getTermDropdownListOfItems()
+		def getOneTerm(self, term: str, DEBUG=False, showProgress=True):
+				termDropdownListItems = self.getTermDropdownListOfItems()
 				for item in termDropdownListItems:
 						if item.text == term:
-								getNextTerm(item)
+								self.getNextTerm(item)
 								break
-				if showProgress: print("Current Term:", currentTerm)
-				getAllSubjectsForUndergradAndGrad(DEBUG, showProgress)
+				if showProgress: print("Current Term:", self.currentTerm)
+				yield from self.getAllSubjectsForUndergradAndGrad(DEBUG, showProgress)
 				eraseTerminalLine(showProgress)
 
-		def getOneTermOneAcademicCareer(term: str, career: str, DEBUG=False):
-				termDropdownListItems = getTermDropdownListOfItems()
+		def selectTerm(self, term: str):
+				termDropdownListItems = self.getTermDropdownListOfItems()
+				for item in termDropdownListItems:
+						if item.text == term:
+								self.getNextTerm(item)
+								break
+
+		def getTermList(self):
+				termDropdownListItems = self.getTermDropdownListOfItems()
+				terms = [item.text for item in termDropdownListItems if "Non-credit Term" not in item.text]
+				self.clickAcademicCareerDropdown() # Close term dropdown by clicking on academic career dropdown
+				return terms
+
+		def getSubjectList(self):
+				subjectDropdownListItems = self.getSubjectDropdownListOfItems()
+				subjects = [item.text for item in subjectDropdownListItems]
+				self.clickAcademicCareerDropdown() # Close subject dropdown by clicking on academic career dropdown
+				return subjects
+
+		def getWorkUnits(self, term="", career="", subject=""):
+				"""
+				Build the list of (term, academic career, subject) work units that a
+				scrape covers. Empty strings mean "all", just like in main.
+
+				Example of work units:
+				[('Spring 2025', 'Undergraduate', 'Accounting'),
+				 ('Spring 2025', 'Undergraduate', 'Aerospace Science'),
+				 ...
+				 ('Spring 2025', 'Graduate', 'Women and Gender Studies')]
+				"""
+				terms = [term] if term != "" else self.getTermList()
+				careers = [career] if career != "" else ACADEMIC_CAREERS
+				if subject != "":
+						return [(t, c, subject) for t in terms for c in careers]
+				workUnits = []
+				for t in terms:
+						self.selectTerm(t)
+						for c in careers:
+								self.setAcademicCareer(c)
+								for s in self.getSubjectList():
+										workUnits.append((t, c, s))
+				return workUnits
+
+		def getOneTermOneAcademicCareer(self, term: str, career: str, DEBUG=False):
+				termDropdownListItems = self.getTermDropdownListOfItems()
 				for item in termDropdownListItems:
 						if item.text == term:
-								getNextTerm(item)
+								self.getNextTerm(item)
 								break
-				uncheckShowOpenClassesOnly()
-				setAcademicCareer(career)
-				getAllSubjects(DEBUG)
+				self.uncheckShowOpenClassesOnly()
+				self.setAcademicCareer(career)
+				yield from self.getAllSubjects(DEBUG)
 
-		def getOneTermOneAcademicCareerOneSubject(term: str, career: str, subject: str, DEBUG=False):
-				termDropdownListItems = getTermDropdownListOfItems()
+		def getOneTermOneAcademicCareerOneSubject(self, term: str, career: str, subject: str, DEBUG=False):
+				termDropdownListItems = self.getTermDropdownListOfItems()
 				for item in termDropdownListItems:
 						if item.text == term:
-								getNextTerm(item)
+								self.getNextTerm(item)
 								break
-				uncheckShowOpenClassesOnly()
-				setAcademicCareer(career)
-				setSubject(subject, DEBUG)
-
-		def main(DEBUG=False, Term=None, Career=None, Subject=None, filename="WebScraper/courses.csv", saveData=True, showProgress=True, checkIfRan=True):
-				load_dotenv()
-				client = MongoClient(os.getenv("MONGO_URI"))
-				if checkIfRan and course.wasDataCollectedToday(filename, client):
-					print("Data was already collected today. Returning...")
-					return
+				self.uncheckShowOpenClassesOnly()
+				self.setAcademicCareer(career)
+				yield from self.setSubject(subject, DEBUG)
+
+		def scrape_term(self, term: str, career="", DEBUG=False, showProgress=True) -> Iterator[course]:
+				"""
+				Yield every section offered in a term, for one academic career or for
+				both undergraduate and graduate careers when career is empty.
+				"""
+				if self.driver is None:
+						self.openBrowser()
+				self.loadClassSearchPage()
+				if career == "":
+						yield from self.getOneTerm(term, DEBUG, showProgress)
+				else:
+						yield from self.getOneTermOneAcademicCareer(term, career, DEBUG)
+
+		def prepareSearch(self, term: str, career: str):
+				# The search form is only reloaded when the term or academic career differs from the previous search
+				if self.driver is None:
+						self.openBrowser()
+				if term != self.currentTerm or career != self.currentAcademicCareer:
+						self.loadClassSearchPage()
+						self.selectTerm(term)
+						self.uncheckShowOpenClassesOnly()
+						self.setAcademicCareer(career)
+
+		def scrape_subject(self, term: str, career: str, subject: str, DEBUG=False) -> Iterator[course]:
+				"""
+				Yield every section of one subject. The search form is only reloaded when
+				the term or academic career differs from the previous search, otherwise the
+				next subject is searched from the current page.
+				"""
+				self.prepareSearch(term, career)
+				yield from self.setSubject(subject, DEBUG)
+
+		def scrapeSubjectOrSkip(self, term: str, career: str, subject: str):
+				"""
+				Every section of one subject as a list and whether its search completed.
+				A subject whose search timed out is skipped with no sections.
+				"""
 				try:
-						if Term != "" and Career != "" and Subject != "":
-								sys.stdout.write("Getting data for " + Term + " " + Career + " " + Subject + "\n")
-								sys.stdout.flush()
-								getOneTermOneAcademicCareerOneSubject(Term, Career, Subject, DEBUG)
-						elif Term != "" and Career != "":
-								sys.stdout.write("Getting data for " + Term + " " + Career + "\n")
-								sys.stdout.flush()
-								getOneTermOneAcademicCareer(Term, Career, DEBUG)
-						elif Term != "":
-								sys.stdout.write("Getting data for " + Term + "\n")
-								sys.stdout.flush()
-								getOneTerm(Term, DEBUG, showProgress)
+						return list(self.scrape_subject(term, career, subject)), True
+				except SearchTimeoutError as e:
+						print("Skipped:", e)
+						self.metrics.count("subjectsSkipped")
+						return [], False
+
+		def captureClassListings(self):
+				"""(className, classInfo, class WebElement or position of the class card) of every class card of the results page."""
+				if self.scriptExtraction:
+						return self.getClassListingsFromScript()
+				if self.snapshotParsing:
+						with self.metrics.timer("extraction"):
+								return parseClassListings(self.driver.page_source)
+				return list(self.metrics.timed("extraction", self.getClassListingsFromWebDriver()))
+
+		def captureSubject(self, term: str, career: str, subject: str):
+				"""
+				The raw strings of one subject for pipeline.parseSubject: the strings of every
+				class card and the meeting patterns of the sections that only list their
+				meetings in the meeting patterns table, the only part that needs the page.
+				Nothing else is parsed, so the browser can move on to the next subject.
+
+				Example of a payload:
+				{"workUnit": ("Spring 2025", "Undergraduate", "Biology"),
+				 "classListings": [("General Biology | BIL 150", ["Lecture Section C4J, Class Number9426", ...]), ...],
+				 "meetingPatterns": {(0, 0): ["01/15/2025 - 03/05/2025", "Mark Friedman", "We", ...]},
+				 "dateTimeRetrieved": datetime.datetime(2025, 2, 28, 23, 0),
+				 "complete": True}
+				complete is False when the search timed out, the subject is then not checkpointed.
+				"""
+				self.prepareSearch(term, career)
+				payload = {"workUnit": (term, career, subject), "classListings": [], "meetingPatterns": {}, "dateTimeRetrieved": self.dateTimeRetrieved, "complete": True}
+				try:
+						if not self.selectSubject(subject):
+								return payload
+				except SearchTimeoutError as e:
+						# Handed on like any other subject, the pipeline does not checkpoint it
+						print("Skipped:", e)
+						self.metrics.count("subjectsSkipped")
+						payload["complete"] = False
+						return payload
+				for cardIndex, (className, classInfo, classCard) in enumerate(self.captureClassListings()):
+						payload["classListings"].append((className, classInfo))
+						classWebElement = classCard if isinstance(classCard, WebElement) else None
+						if classWebElement is None:
+								self.currentClassPosition = classCard
+						# Only the layout of the strings is needed to know which sections to expand, the pipeline parses them
+						for sectionIndex in meetingPatternSections(classInfo):
+								self.metrics.count("meetingPatterns")
+								with self.metrics.timer("meetingPatterns"):
+										payload["meetingPatterns"][(cardIndex, sectionIndex)] = self.readSectionMeetingPatterns(classWebElement, sectionIndex)
+				return payload
+
+workerScraper = None
+
+def initWorker(snapshotParsing=False, dateTimeRetrieved=None, batchMeetingPatterns=False, scriptExtraction=False):
+		global workerScraper
+		workerScraper = Scraper(headless=True, snapshotParsing=snapshotParsing, dateTimeRetrieved=dateTimeRetrieved, batchMeetingPatterns=batchMeetingPatterns,
+														scriptExtraction=scriptExtraction)
+		workerScraper.openBrowser()
+		# Quit the browser when the worker process exits
+		Finalize(None, workerScraper.closeBrowser, exitpriority=10)
+
+def scrapeWorkUnit(workUnit: tuple[str, str, str]):
+		"""
+		Scrape one (term, academic career, subject) work unit with the worker's own
+		browser and return the course objects found for it, with the run metrics
+		collected since the previous work unit and whether the search completed.
+		"""
+		unitCourses, complete = workerScraper.scrapeSubjectOrSkip(*workUnit)
+		runMetrics = workerScraper.metrics.toDict()
+		# Keep the learned timeouts, only report every stage and wait once
+		workerScraper.metrics.reset()
+		return unitCourses, runMetrics, complete
+
+def scrapeInParallel(workUnits: list[tuple[str, str, str]], maxWorkers: int, showProgress=True, snapshotParsing=False, onSubjectDone=None, dateTimeRetrieved=None, metrics=None, batchMeetingPatterns=False, scriptExtraction=False):
+		"""
+		Spread the work units over up to maxWorkers independent browser sessions
+		(one per worker process) and yield their courses.
+		Courses are yielded in work unit order, so the output matches a sequential run.
+		Only twice maxWorkers work units are submitted ahead of the one being yielded,
+		so one slow subject does not leave the rest of the crawl waiting in memory.
+		onSubjectDone is called with each work unit and whether its search completed
+		once all of its courses were consumed.
+		The run metrics of the workers are merged into metrics when it is given.
+		"""
+		workers = max(1, min(maxWorkers, len(workUnits)))
+		with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=initWorker, initargs=(snapshotParsing, dateTimeRetrieved, batchMeetingPatterns, scriptExtraction)) as executor:
+				# Futures of the submitted work units, oldest first
+				pending = deque()
+				submitted = 0
+				for i in range(len(workUnits)):
+						while submitted < len(workUnits) and len(pending) < 2 * workers:
+								pending.append(executor.submit(scrapeWorkUnit, workUnits[submitted]))
+								submitted += 1
+						unitCourses, runMetrics, complete = pending.popleft().result()
+						if metrics is not None:
+								metrics.merge(runMetrics)
+						yield from unitCourses
+						if onSubjectDone is not None:
+								onSubjectDone(workUnits[i], complete)
+						if showProgress:
+								print(f"Finished {i + 1}/{len(workUnits)}:", *workUnits[i])
+
+def reportRunMetrics(metrics: RunMetrics, metricsDirectory: str, httpScraper=None, crawler=None, sink=None):
+		"""Print the metrics of a run and write its JSON report and Prometheus textfile to metricsDirectory."""
+		# Retries counted by the parts that retry on their own
+		if httpScraper is not None:
+				metrics.count("retries", httpScraper.requestsRetried)
+		if crawler is not None:
+				metrics.count("retries", crawler.requestsRetried)
+		if isinstance(sink, MongoSink):
+				metrics.count("retries", sink.ingester.batchesRetried)
+		print(metrics.report())
+		if metricsDirectory is not None:
+				print("Run metrics saved to", metrics.writeReport(metricsDirectory))
+
+def main(DEBUG=False, Term=None, Career=None, Subject=None, filename="WebScraper/courses.csv", saveData=True, showProgress=True, checkIfRan=True, workers=1, snapshotParsing=False, batchSize=DEFAULT_BATCH_SIZE, deltaWrites=False, archiveRoot=None, batchMeetingPatterns=False, scriptExtraction=False, httpEndpoint=None, requestsPerSecond=None, metricsDirectory=REPORT_DIRECTORY, parsePipeline=False, parseWorkers=0, changeFeed=False, changesFilename=None):
+		load_dotenv()
+		client = MongoClient(os.getenv("MONGO_URI"))
+		# The Parquet archive keeps its checkpoint and manifest next to its directory, like courses.csv
+		savedTo = archiveRoot if archiveRoot is not None else filename
+		if checkIfRan and course.wasDataCollectedToday(savedTo, client if savedTo is None else None) == COLLECTED:
+			print("Data was already collected today. Returning...")
+			return
+		sink = None
+		runCheckpoint = None
+		if saveData:
+			if archiveRoot is not None:
+				runCheckpoint = FileCheckpoint.forCsv(archiveRoot, (Term, Career, Subject)).load()
+				sink = ArchiveSink(archiveRoot, batchSize, runCheckpoint)
+			elif filename is not None:
+				runCheckpoint = FileCheckpoint.forCsv(filename, (Term, Career, Subject)).load()
+				sink = CsvSink(filename, batchSize, runCheckpoint)
+			else:
+				runCheckpoint = MongoCheckpoint(client, (Term, Career, Subject)).load()
+				sink = MongoSink(client, batchSize, runCheckpoint, deltaWrites, changeFeed, changesFilename)
+			if runCheckpoint.status() == COLLECTED:
+				runCheckpoint.reset() # Asked to collect again, start from scratch
+			elif runCheckpoint.status() == PARTIALLY_COLLECTED:
+				print("Resuming interrupted run,", len(runCheckpoint.completed), "subjects were already saved")
+		onSubjectDone = sink.endWorkUnit if sink is not None else None
+		scraper = Scraper(snapshotParsing=snapshotParsing, checkpoint=runCheckpoint, onSubjectDone=onSubjectDone, batchMeetingPatterns=batchMeetingPatterns,
+													scriptExtraction=scriptExtraction)
+		if sink is not None:
+			sink.metrics = scraper.metrics
+		httpScraper = None
+		crawler = None # rate limited concurrent crawl over HTTP, it saves the sections itself
+		pipeline = None # parses and saves each subject while the browser captures the next one
+		try:
+				scraper.openBrowser()
+				if httpEndpoint is not None:
+						sys.stdout.write("Getting data for " + " ".join(filter(None, [Term, Career, Subject])) + " over HTTP\n")
+						sys.stdout.flush()
+						# The browser lists the work units and only scrapes the ones the HTTP requests fail for
+						workUnits = scraper.getWorkUnits(Term, Career, Subject)
+						if runCheckpoint is not None:
+								workUnits = [workUnit for workUnit in workUnits if not runCheckpoint.isDone(workUnit)]
+						scraper.onSubjectDone = None # Called by scrapeWorkUnits for every work unit, also the ones the browser scraped
+						httpScraper = HttpScraper(httpEndpoint, dateTimeRetrieved=scraper.dateTimeRetrieved)
+						if requestsPerSecond is not None:
+								crawler = AsyncCrawler(httpScraper, requestsPerSecond)
 						else:
-								sys.stdout.write("Getting data for all terms\n")
-								sys.stdout.flush()
-								getAllTerms(DEBUG)
-						if saveData:
-							if checkIfRan and course.wasDataCollectedToday(filename, client):
-								print("Data was already collected today. Returning...")
-								return
-							global courses
-							if filename is not None:
-								sys.stdout.write("Saving data to " + filename + "\n")
-								sys.stdout.flush()
-								course.save_courses_to_csv(courses, filename)
-								print("Data saved to", filename)
-							else:
-								sys.stdout.write("Saving data to MongoDB\n")
-								sys.stdout.flush()
-								course.saveCoursesToMongodb(client, courses)
-								print("Data saved to MongoDB")
+								sections = httpScraper.scrapeWorkUnits(workUnits, scraper, onSubjectDone, showProgress)
+				elif parsePipeline:
+						sys.stdout.write("Getting data for " + " ".join(filter(None, [Term, Career, Subject])) + " with a parse pipeline\n")
+						sys.stdout.flush()
+						workUnits = scraper.getWorkUnits(Term, Career, Subject)
+						if runCheckpoint is not None:
+								workUnits = [workUnit for workUnit in workUnits if not runCheckpoint.isDone(workUnit)]
+						scraper.onSubjectDone = None # The pipeline checkpoints every subject once it is saved
+						pipeline = ParsePipeline(sink, parseWorkers, metrics=scraper.metrics, showProgress=showProgress)
+				elif workers > 1:
+						sys.stdout.write("Getting data for " + " ".join(filter(None, [Term, Career, Subject])) + " with " + str(workers) + " workers\n")
+						sys.stdout.flush()
+						workUnits = scraper.getWorkUnits(Term, Career, Subject)
+						if runCheckpoint is not None:
+								workUnits = [workUnit for workUnit in workUnits if not runCheckpoint.isDone(workUnit)]
+						scraper.closeBrowser()
+						sections = scrapeInParallel(workUnits, workers, showProgress, snapshotParsing, onSubjectDone, scraper.dateTimeRetrieved, scraper.metrics, batchMeetingPatterns, scriptExtraction)
+				elif Term != "" and Career != "" and Subject != "":
+						sys.stdout.write("Getting data for " + Term + " " + Career + " " + Subject + "\n")
+						sys.stdout.flush()
+						sections = scraper.getOneTermOneAcademicCareerOneSubject(Term, Career, Subject, DEBUG)
+				elif Term != "" and Career != "":
+						sys.stdout.write("Getting data for " + Term + " " + Career + "\n")
+						sys.stdout.flush()
+						sections = scraper.getOneTermOneAcademicCareer(Term, Career, DEBUG)
+				elif Term != "":
+						sys.stdout.write("Getting data for " + Term + "\n")
+						sys.stdout.flush()
+						sections = scraper.getOneTerm(Term, DEBUG, showProgress)
+				else:
+						sys.stdout.write("Getting data for all terms\n")
+						sys.stdout.flush()
+						sections = scraper.getAllTerms(DEBUG)
+				# Sections are written subject by subject while the crawl is running
+				if sink is not None:
+					sys.stdout.write("Saving data to " + (savedTo if savedTo is not None else "MongoDB") + "\n")
+					sys.stdout.flush()
+					with sink:
+						if crawler is not None:
+							crawler.run(workUnits, sink, scraper, showProgress)
+						elif pipeline is not None:
+							pipeline.run(scraper, workUnits)
 						else:
-							print("Data not saved")
-						
-						client.close()
-							
-				except Exception as e:
-						print(type(e).__name__, e)
-						print("Current Term:", currentTerm)
-						print("Current Academic Career:", currentAcademicCareer)
-						print("Current Subject:", currentSubject)
-						client.close()
-						raise e
-
-		main(DEBUG=True, Term="Spring 2025", Career="", Subject="",
-				 filename=None, saveData=False, showProgress=False,
-				 checkIfRan=False)
-
-executed_time = time.time() - start_time
-minutes = executed_time // 60
-seconds = executed_time % 60
-print("Execution time:", minutes, "minutes and", seconds, "seconds")
\ No newline at end of file
+							sink.addAll(sections)
+					if sink.workUnitsIncomplete == 0:
+						runCheckpoint.markRunComplete()
+					else:
+						print(sink.workUnitsIncomplete, "subjects did not complete, the run is left to be resumed")
+					print(sink.sectionsWritten, "sections saved to", savedTo if savedTo is not None else "MongoDB")
+					if isinstance(sink, MongoSink) and sink.changeFeed is not None:
+						print(sink.changeFeed.eventsWritten, "change events written to", changesFilename if changesFilename is not None else "sectionChanges")
+				else:
+					if crawler is not None:
+						crawler.run(workUnits, None, scraper, showProgress)
+					elif pipeline is not None:
+						pipeline.run(scraper, workUnits)
+					else:
+						for _ in sections:
+							pass
+					print("Data not saved")
+				reportRunMetrics(scraper.metrics, metricsDirectory, httpScraper, crawler, sink)
+				scraper.closeBrowser()
+				if httpScraper is not None:
+						httpScraper.close()
+				
+				client.close()
+				if sink is not None and sink.workUnitsIncomplete > 0:
+						# run.py resumes a run that exits with an error
+						sys.exit(1)
+					
+		except Exception as e:
+				print(type(e).__name__, e)
+				print("Current Term:", scraper.currentTerm)
+				print("Current Academic Career:", scraper.currentAcademicCareer)
+				print("Current Subject:", scraper.currentSubject)
+				reportRunMetrics(scraper.metrics, metricsDirectory, httpScraper, crawler, sink)
+				scraper.closeBrowser()
+				if httpScraper is not None:
+						httpScraper.close()
+				client.close()
+				raise e
+
+if __name__ == "__main__":
+		start_time = time.time()
+		with keep.presenting():
+				main(DEBUG=True, Term="Spring 2025", Career="", Subject="",
+						 filename=None, saveData=False, showProgress=False,
+						 checkIfRan=False, workers=int(os.getenv("SCRAPER_WORKERS", 1)), httpEndpoint=os.getenv("CANELINK_SEARCH_API"))
+
+		executed_time = time.time() - start_time
+		minutes = executed_time // 60
+		seconds = executed_time % 60
+		print("Execution time:", minutes, "minutes and", seconds, "seconds")
@@ -52,6 +52,16 @@ db.getCollection("sections").aggregate(
   { maxTimeMS: 60000, allowDiskUse: true }
 );
 
+// Find all instructors for a specific course from the precomputed catalog
+// (kept up to date by WebScraper/catalog.py, same result as the query above)
+use("courses");
+subjectCode = "ECE";
+catalogNumber = "421";
+db.getCollection("courseCatalog").findOne(
+	{ subjectCode: `${subjectCode}`, catalogNumber: `${catalogNumber}` },
+	{ instructors: 1, terms: 1, offerings: 1, _id: 0 }
+);
+
 // Match courses with time series data
 use("courses");
 db.getCollection("sections").aggregate(